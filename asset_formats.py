@@ -0,0 +1,213 @@
+"""Read and write the equipment sheets as CSV, Parquet or JSON Lines tables.
+
+A table source is a directory with one table per asset type, named after its
+sheet (``Laptop.csv``, ``PC.parquet``, ``Monitor.jsonl`` ...), or with one
+directory per asset type (``Laptop/``) whose part files are read in name order.
+A single table file can be given too; its name gives the asset type. The first
+row of a table holds the field names of the asset records (any header the sheet
+schema accepts works as well), and rows go through the same schema extractor as
+the workbook sheets, so the records are identical to ``read_excel_data``.
+
+Parquet needs pyarrow (or fastparquet). When pyarrow is installed it is also
+used to parse CSV and JSON Lines, which is several times faster than pandas.
+
+Convert the workbook into tables with:
+    python asset_formats.py OUTPUT_DIR [--format csv|parquet|jsonl] [--workbook PATH]
+"""
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from process_assets import (
+    DEFAULT_SHEET_SCHEMA, SHEET_NAMES, SHEET_SCHEMAS, STREAM_CHUNK_ROWS, WORKBOOK_PATH,
+    compile_sheet_schema, iter_workbook_sheets, read_excel_data,
+)
+
+try:
+    import pyarrow
+    import pyarrow.json
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# File extension -> table format, in the order tried when several tables match
+TABLE_FORMATS = {
+    '.parquet': 'parquet',
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+FORMAT_EXTENSIONS = {'parquet': '.parquet', 'csv': '.csv', 'jsonl': '.jsonl'}
+
+
+def is_table_source(path):
+    """True for a table directory or a single CSV / Parquet / JSON Lines file."""
+    return os.path.isdir(path) or os.path.splitext(path)[1].lower() in TABLE_FORMATS
+
+
+def _table_format(path):
+    return TABLE_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def find_tables(source, sheet_name):
+    """Return the table files holding a sheet's rows, in read order."""
+    if not os.path.isdir(source):
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return [source] if stem == sheet_name and _table_format(source) else []
+
+    candidates = []
+    for ext in TABLE_FORMATS:
+        path = os.path.join(source, sheet_name + ext)
+        if os.path.isfile(path):
+            candidates.append([path])
+    part_dir = os.path.join(source, sheet_name)
+    if os.path.isdir(part_dir):
+        parts = sorted(os.path.join(part_dir, name) for name in os.listdir(part_dir) if _table_format(name))
+        if parts:
+            candidates.append(parts)
+    if len(candidates) > 1:
+        print(f"  Warning: Several tables for {sheet_name} in {source}, using {candidates[0][0]}")
+    return candidates[0] if candidates else []
+
+
+def _read_csv(path):
+    # Every cell is read as text, like a worksheet cell; the schema converts types
+    return pd.read_csv(path, dtype=str, engine='pyarrow' if pyarrow else 'c')
+
+
+def _read_jsonl(path):
+    if pyarrow is not None:
+        try:
+            return pyarrow.json.read_json(path).to_pandas()
+        except pyarrow.ArrowInvalid:
+            pass  # Mixed value types in a column; pandas copes with those
+    return pd.read_json(path, lines=True, dtype=False, convert_dates=False)
+
+
+def read_table(path):
+    """Load a whole table file into a DataFrame with its header as the columns."""
+    fmt = _table_format(path)
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    if fmt == 'csv':
+        return _read_csv(path)
+    return _read_jsonl(path)
+
+
+def iter_table_chunks(path, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield a table file as DataFrames of at most ``chunk_rows`` rows."""
+    fmt = _table_format(path)
+    if fmt == 'parquet' and pyarrow is not None:
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif fmt == 'csv':
+        with pd.read_csv(path, dtype=str, chunksize=chunk_rows) as reader:
+            yield from reader
+    elif fmt == 'jsonl':
+        with pd.read_json(path, lines=True, dtype=False, convert_dates=False, chunksize=chunk_rows) as reader:
+            yield from reader
+    else:
+        yield read_table(path)
+
+
+def _extract_table(frames, sheet_name, path):
+    """Run the sheet schema over the DataFrames of one table file."""
+    extract = None
+    for frame in frames:
+        if extract is None:
+            extract = compile_sheet_schema(sheet_name, list(frame.columns))
+            if extract is None:
+                print(f"  Skipping {path}")
+                return
+        yield from extract(frame)
+
+
+def read_table_data(source, sheet_name):
+    """Read a sheet's table(s) from a table source and extract the asset data."""
+    paths = find_tables(source, sheet_name)
+    if not paths and os.path.isdir(source):
+        print(f"  Warning: No {sheet_name} table found in {source}")
+    assets = []
+    try:
+        for path in paths:
+            assets.extend(_extract_table([read_table(path)], sheet_name, path))
+    except Exception as e:
+        print(f"Error reading {sheet_name}: {e}")
+        import traceback
+        traceback.print_exc()
+    return assets
+
+
+def stream_table_data(source, sheet_name, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield a sheet's asset records from a table source, ``chunk_rows`` rows at a time."""
+    paths = find_tables(source, sheet_name)
+    if not paths and os.path.isdir(source):
+        print(f"  Warning: No {sheet_name} table found in {source}")
+    try:
+        for path in paths:
+            yield from _extract_table(iter_table_chunks(path, chunk_rows), sheet_name, path)
+    except Exception as e:
+        print(f"Error reading {sheet_name}: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+def table_columns(sheet_name):
+    """Columns written for a sheet: the schema's fields, PurchaseType after Serial."""
+    schema = SHEET_SCHEMAS.get(sheet_name, DEFAULT_SHEET_SCHEMA)
+    columns = [field for field, _, _, _ in schema['fields']]
+    if schema.get('purchase_type') is not None:
+        columns.insert(1, 'PurchaseType')
+    return columns
+
+
+def write_table(assets, columns, path):
+    """Write asset records as a table file; the format follows the file extension."""
+    fmt = _table_format(path)
+    if fmt == 'jsonl':
+        with open(path, 'w', encoding='utf-8') as f:
+            for asset in assets:
+                f.write(json.dumps({column: asset.get(column) for column in columns}, ensure_ascii=False) + '\n')
+        return
+    # Object columns keep ints as ints next to missing values instead of turning them into floats
+    df = pd.DataFrame({column: pd.Series([asset.get(column) for asset in assets], dtype=object)
+                       for column in columns})
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding='utf-8')
+
+
+def convert_workbook(workbook_path, output_dir, fmt='csv', sheet_names=SHEET_NAMES):
+    """Write one table per sheet of a workbook to ``output_dir``; returns the paths written."""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for sheet_name, rows in iter_workbook_sheets(workbook_path, sheet_names):
+        assets = read_excel_data(workbook_path, sheet_name, rows=rows)
+        path = os.path.join(output_dir, sheet_name + FORMAT_EXTENSIONS[fmt])
+        write_table(assets, table_columns(sheet_name), path)
+        print(f"  {sheet_name}: {len(assets)} record(s) -> {path}")
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert the equipment workbook into CSV, Parquet or JSON Lines tables.')
+    parser.add_argument('output_dir', help='directory to write one table per sheet into')
+    parser.add_argument('--format', choices=sorted(FORMAT_EXTENSIONS), default='csv',
+                        help='table format (default: csv)')
+    parser.add_argument('--workbook', default=WORKBOOK_PATH,
+                        help=f'workbook to convert (default: {WORKBOOK_PATH!r})')
+    args = parser.parse_args(argv)
+
+    print(f"Converting {args.workbook} to {args.format}...")
+    start = time.perf_counter()
+    convert_workbook(args.workbook, args.output_dir, args.format)
+    print(f"Done in {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
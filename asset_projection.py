@@ -0,0 +1,244 @@
+"""Asset values as of any month-end, and projected years ahead.
+
+CurrentValue (see calculate_asset_value) is an asset's value at the price
+catalog's market_price_date, taken as the end of that month. A depreciation
+schedule gives the share of its value an asset keeps at each age, and the value
+at another date is CurrentValue times the schedule's retention at the asset's
+age then over its retention at the valuation date. Ages come from PurchaseDate;
+assets without one are taken to be the schedule's ``assumed_age`` years old at
+the valuation date. Before its purchase date an asset is worth nothing.
+
+Retention only depends on the asset type and purchase date, so a projection
+keeps one row of factors per distinct pair and the values at any date are one
+vectorized multiply. Projections are cached per price catalog, schedule, date
+grid and inventory.
+
+    python asset_projection.py [workbooks ...] [--years 5] [--as-of 2025-06-30 ...]
+"""
+import argparse
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from process_assets import SHEET_NAMES, WORKBOOK_PATH, get_price_catalog, load_assets, use_price_catalog
+
+# Depreciation schedules by name. "declining" keeps (1 - rate) of the value per
+# year of age and "straight_line" loses 1 / life of the new value per year;
+# neither goes below ``floor``. Rates and lives are per asset type.
+DEPRECIATION_SCHEDULES = {
+    'declining': {
+        'method': 'declining',
+        'rate': {'Laptop': 0.30, 'PC': 0.25, 'Monitor': 0.20, 'Printer Scaneer': 0.20, 'Server Room': 0.15},
+        'default_rate': 0.20,
+        'floor': 0.05,
+        'assumed_age': 2,
+    },
+    'straight_line': {
+        'method': 'straight_line',
+        'life': {'Laptop': 4, 'PC': 5, 'Monitor': 6, 'Printer Scaneer': 5, 'Server Room': 7},
+        'default_life': 5,
+        'floor': 0.05,
+        'assumed_age': 2,
+    },
+}
+DEFAULT_SCHEDULE = 'declining'
+
+# Projections kept by project_values()
+PROJECTION_CACHE_SIZE = 16
+
+_DAYS_PER_YEAR = 365.25
+
+_projections = OrderedDict()
+
+
+def month_end(date):
+    """The last day of date's month, as a Timestamp."""
+    return pd.Timestamp(date).normalize() + pd.offsets.MonthEnd(0)
+
+
+def valuation_date(catalog=None):
+    """The month-end CurrentValue refers to: the end of the catalog's market_price_date."""
+    if catalog is None:
+        catalog = get_price_catalog()
+    date = catalog.data.get('market_price_date') or catalog.version
+    if date is None:
+        raise ValueError('The price catalog has no market_price_date')
+    return month_end(date)
+
+
+def month_ends(start, end):
+    """Every month-end from start's month to end's month."""
+    return pd.date_range(month_end(start), month_end(end), freq='ME')
+
+
+def projection_dates(years=5, start=None, monthly=False):
+    """The valuation date and the same month-end 1 to ``years`` years later.
+
+    With ``monthly`` every month-end in between is included as well.
+    """
+    start = month_end(start if start is not None else valuation_date())
+    if monthly:
+        return month_ends(start, start + pd.DateOffset(years=years))
+    return pd.DatetimeIndex([month_end(start + pd.DateOffset(years=k)) for k in range(years + 1)])
+
+
+def _schedule(schedule):
+    return DEPRECIATION_SCHEDULES[schedule] if isinstance(schedule, str) else schedule
+
+
+def retention(schedule, asset_types, ages):
+    """Share of its value each asset keeps at its age in years.
+
+    ``ages`` has one row per entry of ``asset_types`` and may have several columns.
+    """
+    spec = _schedule(schedule)
+    ages = np.asarray(ages, dtype=float)
+    grown = np.maximum(ages, 0.0)
+    if spec['method'] == 'declining':
+        rates = np.array([spec['rate'].get(asset_type, spec['default_rate']) for asset_type in asset_types])
+        kept = (1.0 - rates.reshape((-1,) + (1,) * (ages.ndim - 1))) ** grown
+    elif spec['method'] == 'straight_line':
+        lives = np.array([spec['life'].get(asset_type, spec['default_life']) for asset_type in asset_types])
+        kept = 1.0 - grown / lives.reshape((-1,) + (1,) * (ages.ndim - 1))
+    else:
+        raise ValueError(f"Unknown depreciation method {spec['method']!r}")
+    kept = np.maximum(kept, spec['floor'])
+    return np.where(ages < 0, 0.0, kept)
+
+
+class ValueProjection:
+    """Values of an inventory on a grid of month-ends (see project_values())."""
+
+    def __init__(self, current_values, asset_types, serials, purchase_dates, dates, schedule, as_of):
+        self.dates = pd.DatetimeIndex(dates)
+        self.schedule = _schedule(schedule)
+        self.as_of = as_of
+        self.current_values = np.asarray(current_values, dtype=float)
+        self.asset_types = asset_types
+        self.serials = serials
+
+        # One factor row per distinct (asset type, purchase date)
+        type_codes, types = pd.factorize(asset_types)
+        date_codes, purchased = pd.factorize(purchase_dates)  # No date: -1
+        self.codes, groups = pd.factorize(type_codes * (len(purchased) + 1) + date_codes + 1)
+        self.group_types = types[groups // (len(purchased) + 1)].tolist()
+        group_dates = pd.to_datetime(pd.Series(np.append(purchased, None)[groups % (len(purchased) + 1) - 1],
+                                               dtype=object), errors='coerce')
+        ages = ((as_of - group_dates).dt.days / _DAYS_PER_YEAR).to_numpy(dtype=float)
+        self.ages = np.where(np.isnan(ages), self.schedule['assumed_age'], ages)
+        self.factors = self._factors(self.dates)
+
+    def _factors(self, dates):
+        """Value at each date relative to the valuation date, per group (groups x dates)."""
+        years = ((pd.DatetimeIndex(dates) - self.as_of).days / _DAYS_PER_YEAR).to_numpy(dtype=float)
+        then = retention(self.schedule, self.group_types, self.ages[:, None] + years[None, :])
+        now = retention(self.schedule, self.group_types, np.maximum(self.ages, 0.0))
+        return then / now[:, None]
+
+    def at(self, date):
+        """Every asset's value at date's month-end, rounded to 2 places."""
+        date = month_end(date)
+        if date in self.dates:
+            factors = self.factors[:, self.dates.get_loc(date)]
+        else:
+            factors = self._factors([date])[:, 0]
+        return np.round(self.current_values * factors[self.codes], 2)
+
+    def matrix(self):
+        """Asset x date DataFrame of values, indexed by AssetType and Serial."""
+        index = pd.MultiIndex.from_arrays([self.asset_types, self.serials], names=['AssetType', 'Serial'])
+        return pd.DataFrame(np.round(self.current_values[:, None] * self.factors[self.codes], 2),
+                            index=index, columns=self.dates)
+
+    def totals(self):
+        """Date x asset type DataFrame of total values, with a Total column."""
+        group_values = np.bincount(self.codes, weights=self.current_values, minlength=len(self.group_types))
+        by_group = group_values[:, None] * self.factors
+        types = list(dict.fromkeys(self.group_types))
+        type_codes = np.array([types.index(asset_type) for asset_type in self.group_types], dtype=np.intp)
+        by_type = np.zeros((len(types), len(self.dates)))
+        np.add.at(by_type, type_codes, by_group)
+        totals = pd.DataFrame(by_type.T, index=self.dates, columns=types)
+        totals['Total'] = by_type.sum(axis=0)
+        return totals
+
+
+def _inventory_key(current_values, *columns):
+    """Digest of the inventory columns a projection depends on."""
+    digest = hashlib.sha256(current_values.tobytes())
+    for column in columns:
+        codes, uniques = pd.factorize(column)
+        digest.update(codes.tobytes())
+        digest.update(repr(uniques.tolist()).encode())
+    return digest.hexdigest()
+
+
+def project_values(assets, dates=None, schedule=DEFAULT_SCHEDULE, catalog=None):
+    """ValueProjection of valued assets over month-ends (default: projection_dates()).
+
+    Projections are cached per (catalog version, schedule, dates, inventory), so
+    asking again for the same inventory returns the same object.
+    """
+    if catalog is None:
+        catalog = get_price_catalog()
+    as_of = valuation_date(catalog)
+    dates = projection_dates(start=as_of) if dates is None else pd.DatetimeIndex([month_end(date) for date in dates])
+    current_values = np.array([asset['CurrentValue'] for asset in assets], dtype=float)
+    asset_types = np.array([asset['AssetType'] for asset in assets], dtype=object)
+    serials = np.array([asset.get('Serial') for asset in assets], dtype=object)
+    purchase_dates = np.array([asset.get('PurchaseDate') for asset in assets], dtype=object)
+
+    key = (catalog.digest or catalog.version, json.dumps(_schedule(schedule), sort_keys=True), tuple(dates),
+           _inventory_key(current_values, asset_types, serials, purchase_dates))
+    projection = _projections.get(key)
+    if projection is None:
+        projection = ValueProjection(current_values, asset_types, serials, purchase_dates, dates, schedule, as_of)
+        _projections[key] = projection
+        if len(_projections) > PROJECTION_CACHE_SIZE:
+            _projections.popitem(last=False)
+    else:
+        _projections.move_to_end(key)
+    return projection
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Value the inventory as of month-ends and project it years ahead.')
+    parser.add_argument('workbooks', nargs='*',
+                        help=f'Excel workbooks or table sources to read (default: {WORKBOOK_PATH!r})')
+    parser.add_argument('--years', type=int, default=5, help='years to project ahead (default: 5)')
+    parser.add_argument('--monthly', action='store_true', help='include every month-end, not just whole years')
+    parser.add_argument('--as-of', action='append', default=[], metavar='DATE',
+                        help='also value the inventory at this month-end (repeatable)')
+    parser.add_argument('--schedule', choices=sorted(DEPRECIATION_SCHEDULES), default=DEFAULT_SCHEDULE,
+                        help=f'depreciation schedule (default: {DEFAULT_SCHEDULE})')
+    parser.add_argument('--price-catalog', default=None,
+                        help='price catalog file (default: price_catalog.json next to process_assets.py)')
+    parser.add_argument('--output', default=None, help='write the asset x date values to this CSV file')
+    args = parser.parse_args(argv)
+
+    from batch_valuation import value_assets
+    use_price_catalog(args.price_catalog)
+    assets = value_assets(load_assets(args.workbooks or [WORKBOOK_PATH], SHEET_NAMES))
+    as_of = valuation_date()
+    dates = projection_dates(args.years, as_of, args.monthly).union([month_end(date) for date in args.as_of])
+
+    start = time.perf_counter()
+    projection = project_values(assets, dates, args.schedule)
+    print(f"\nValues by month-end ({args.schedule} schedule, CurrentValue as of {as_of:%Y-%m-%d}), "
+          f"{len(assets)} assets x {len(dates)} dates in {time.perf_counter() - start:.3f}s:")
+    totals = projection.totals()
+    totals.index = totals.index.strftime('%Y-%m-%d')
+    print(totals.map(lambda value: f"{value:,.0f}").to_string())
+    if args.output:
+        matrix = projection.matrix()
+        matrix.columns = matrix.columns.strftime('%Y-%m-%d')
+        matrix.to_csv(args.output)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Columnar valuation of a whole inventory at once.
+
+``value_frame`` takes the inventory as a DataFrame and returns the MarketPrice,
+CurrentValue, DepreciationRate and RemarkCategory columns, identical row for row
+to ``value_asset``. Columns are dictionary-encoded, so catalog prices are
+looked up once per distinct price key (asset type, name, model, processor,
+generation) and remarks and models are scanned once per distinct text.
+``classify_frame`` is classify_depreciation() over columns, reading the same
+depreciation tables, and current values are rounded once per distinct
+unrounded value.
+"""
+import numpy as np
+import pandas as pd
+
+from process_assets import (
+    NORMAL_DEPRECIATION, PC_SPECIAL_SERIALS, PROLIANT_DEPRECIATION, RECONDITION_MASK, RECONDITIONED_DEPRECIATION,
+    SPECIAL_SERIAL_DEPRECIATION, condition_of, get_price_catalog, keyword_flags, keyword_masks,
+)
+
+# Columns value_frame() reads; missing ones count as absent fields
+VALUATION_COLUMNS = ['AssetType', 'Serial', 'PurchaseType', 'Name', 'Model', 'Processor', 'Gen', 'Remarks']
+
+
+def _encode(frame, name, default):
+    """Dictionary-encode a column: (codes, distinct values), ``default`` for missing fields.
+
+    Missing cells get code -1, which indexes the ``default`` appended last.
+    """
+    if name not in frame:
+        return np.full(len(frame), -1, dtype=np.intp), np.array([default], dtype=object)
+    codes, uniques = pd.factorize(frame[name])
+    values = np.empty(len(uniques) + 1, dtype=object)
+    values[:-1] = uniques.tolist()
+    values[-1] = default
+    return codes, values
+
+
+def _contains(texts, word):
+    """Which of the (distinct) texts contain word, case-insensitively; non-text never does."""
+    return np.array([isinstance(text, str) and word in text.lower() for text in texts], dtype=bool)
+
+
+def frame_keyword_flags(frame):
+    """keyword_flags() of every row: (Remarks masks, masks of all text columns)."""
+    remark_masks = keyword_masks(frame['Remarks']) if 'Remarks' in frame else np.zeros(len(frame), dtype=object)
+    text_masks = np.zeros(len(frame), dtype=object)
+    for name in frame.columns:
+        if not (pd.api.types.is_numeric_dtype(frame[name]) or pd.api.types.is_bool_dtype(frame[name])):
+            text_masks |= keyword_masks(frame[name])
+    return remark_masks, text_masks
+
+
+def _price_keys(frame):
+    """Codes of each row's (AssetType, Name, Model, Processor, Gen) and the distinct keys."""
+    columns = [_encode(frame, name, default) for name, default in
+               [('AssetType', None), ('Name', ''), ('Model', ''), ('Processor', ''), ('Gen', 0)]]
+    combined, count = np.zeros(len(frame), dtype=np.int64), 1
+    for codes, values in columns:
+        # Fold in one column at a time and renumber, so the codes never overflow
+        combined, uniques = pd.factorize(combined * len(values) + (codes % len(values)))
+        count = len(uniques)
+    first = np.empty(count, dtype=np.intp)
+    first[combined[::-1]] = np.arange(len(frame) - 1, -1, -1)
+    keys = zip(*(values[codes[first]] for codes, values in columns))
+    return combined, keys
+
+
+def price_lookups(frame, catalog=None):
+    """Catalog lookups of every row, done once per distinct price key.
+
+    Returns ``(codes, lookups)``: row i was priced by ``lookups[codes[i]]``, an
+    (asset type, (new, recond) price, catalog entry) triple (see PriceCatalog.lookup).
+    """
+    if catalog is None:
+        catalog = get_price_catalog()
+    codes, keys = _price_keys(frame)
+    lookups = [(asset_type,) + catalog.lookup({'AssetType': asset_type, 'Name': name, 'Model': model,
+                                              'Processor': processor, 'Gen': gen})
+               for asset_type, name, model, processor, gen in keys]
+    return codes, lookups
+
+
+def reconditioned_prices(frame):
+    """Rows priced at the reconditioned price of a catalog entry."""
+    codes, values = _encode(frame, 'PurchaseType', None)
+    return (values == 'reconditioned')[codes]
+
+
+def market_prices(frame, catalog=None):
+    """MarketPrice column: one catalog lookup per distinct price key."""
+    codes, lookups = price_lookups(frame, catalog)
+    pairs = np.empty((len(lookups), 2), dtype=object)
+    pairs[:] = [pair for _, pair, _ in lookups]
+    return pairs[codes, reconditioned_prices(frame).astype(np.intp)]
+
+
+# Depreciation table per row class (see depreciation_classes), each indexed by
+# remark condition: [class][condition] -> (multiplier, DepreciationRate, RemarkCategory)
+DEPRECIATION_TABLES = [
+    NORMAL_DEPRECIATION,
+    RECONDITIONED_DEPRECIATION,
+    [PROLIANT_DEPRECIATION] * len(NORMAL_DEPRECIATION),
+    [SPECIAL_SERIAL_DEPRECIATION + (category,) for _, _, category in NORMAL_DEPRECIATION],
+]
+NORMAL, RECONDITIONED, PROLIANT, SPECIAL_SERIAL = range(len(DEPRECIATION_TABLES))
+
+
+def depreciation_classes(frame, flags=None):
+    """Index into DEPRECIATION_TABLES and remark condition of every row, as two arrays.
+
+    ``flags`` may give the rows' keyword flags already known, as returned by
+    frame_keyword_flags(); otherwise the frame's text columns are scanned.
+    """
+    remark_masks, text_masks = flags if flags is not None else frame_keyword_flags(frame)
+    recondition_note = (text_masks & RECONDITION_MASK).astype(bool)
+    codes, values = _encode(frame, 'AssetType', None)
+    pc = (values == 'PC')[codes]
+    laptop = (values == 'Laptop')[codes]
+    codes, values = _encode(frame, 'PurchaseType', None)
+    reconditioned = laptop & ((values == 'reconditioned')[codes] | recondition_note)
+    codes, values = _encode(frame, 'Model', '')
+    proliant = pc & (_contains(values, 'proliant') & _contains(values, 'dl380'))[codes]
+    codes, values = _encode(frame, 'Serial', None)
+    special_serial = pc & ~proliant & np.array([value in PC_SPECIAL_SERIALS for value in values], dtype=bool)[codes]
+
+    classes = np.select([proliant, special_serial, reconditioned], [PROLIANT, SPECIAL_SERIAL, RECONDITIONED], NORMAL)
+    codes, remark_masks = pd.factorize(remark_masks)
+    conditions = np.array([condition_of(mask) for mask in remark_masks.tolist()], dtype=np.intp)[codes]
+    return classes, conditions
+
+
+def classify_frame(frame, flags=None):
+    """classify_depreciation() of every row: (multipliers, DepreciationRate labels, RemarkCategory labels).
+
+    ``flags`` is passed on to depreciation_classes().
+    """
+    classes, conditions = depreciation_classes(frame, flags)
+    table = np.array(DEPRECIATION_TABLES, dtype=object)[classes, conditions]
+    return table[:, 0].astype(float), table[:, 1], table[:, 2]
+
+
+def value_frame(frame, catalog=None, flags=None):
+    """Value every row of an inventory DataFrame.
+
+    ``flags`` is passed on to classify_frame(). Returns a DataFrame
+    with MarketPrice, CurrentValue, DepreciationRate and RemarkCategory holding
+    plain Python values.
+    """
+    if not len(frame):
+        return pd.DataFrame({column: pd.Series(dtype=object) for column in
+                             ['MarketPrice', 'CurrentValue', 'DepreciationRate', 'RemarkCategory']})
+    prices = market_prices(frame, catalog)
+    multipliers, rates, categories = classify_frame(frame, flags)
+
+    # round() per distinct product, so values match the scalar path exactly
+    codes, raw = pd.factorize(prices.astype(float) * multipliers)
+    values = np.array([round(value, 2) for value in raw.tolist()], dtype=object)[codes]
+
+    return pd.DataFrame({'MarketPrice': prices, 'CurrentValue': values,
+                         'DepreciationRate': rates, 'RemarkCategory': categories}, index=frame.index)
+
+
+def assets_frame(assets):
+    """The VALUATION_COLUMNS of asset records as a DataFrame, plus their keyword flags.
+
+    Remarks only matter through the keyword flags stored at ingestion, so they
+    are left out and no text is scanned again.
+    """
+    frame = pd.DataFrame({name: [asset.get(name) for asset in assets] for name in VALUATION_COLUMNS
+                          if name != 'Remarks'}, dtype=object)
+    remark_masks, text_masks = zip(*(keyword_flags(asset) for asset in assets)) if assets else ((), ())
+    return frame, (np.array(remark_masks, dtype=object), np.array(text_masks, dtype=object))
+
+
+def value_assets(assets, catalog=None):
+    """Value a list of asset records in one batch, setting the same fields as value_asset()."""
+    if not assets:
+        return assets
+    frame, flags = assets_frame(assets)
+    result = value_frame(frame, catalog, flags)
+    for asset, price, value, rate, category in zip(assets, result['MarketPrice'].tolist(), result['CurrentValue'].tolist(),
+                                                   result['DepreciationRate'].tolist(), result['RemarkCategory'].tolist()):
+        asset['MarketPrice'] = price
+        asset['CurrentValue'] = value
+        asset['DepreciationRate'] = rate
+        asset['RemarkCategory'] = category
+    return assets
@@ -0,0 +1,86 @@
+"""Approximate matching of asset names and models against price catalog keys.
+
+Keys are normalized (lower-cased, with spaces and punctuation dropped) and
+indexed by character trigram. A query gathers the keys that share its trigrams
+from the inverted index and scores them by the Dice coefficient of the two
+trigram sets. Overlaps are counted from the posting lists in one vectorized
+pass and only keys reaching the score threshold are ranked.
+
+Trigram overlap can't tell "440-G4" from "440-G2", so a key only matches if it
+contains every number in the query: model numbers have to agree. Nor does the
+model name say which processor a unit has; processor_tier() reads the tier
+("i5", "ryzen7", ...) from a processor, key or note so callers can check that
+too.
+"""
+import re
+from collections import defaultdict
+
+import numpy as np
+
+NGRAM = 3
+
+_NUMBER = re.compile(r'\d+')
+_TIER = re.compile(r'(?<![a-z0-9])(i[3579]|ryzen\s*[3579])(?![0-9])')
+
+
+def normalize_key(text):
+    """Lower-cased text with everything but letters and digits removed."""
+    return ''.join(ch for ch in str(text).lower() if ch.isalnum())
+
+
+def numbers(text):
+    """Set of the digit runs in text."""
+    return frozenset(_NUMBER.findall(str(text)))
+
+
+def processor_tier(text):
+    """Processor tier named in text, e.g. "i5" or "ryzen7", or None."""
+    match = _TIER.search(str(text).lower())
+    return match.group(1).replace(' ', '') if match else None
+
+
+def ngrams(text, n=NGRAM):
+    """Set of character n-grams of normalized text (the text itself if shorter)."""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NgramIndex:
+    """Inverted index from character n-grams to catalog keys."""
+
+    def __init__(self, keys, n=NGRAM):
+        self.keys = list(keys)
+        self.n = n
+        postings = defaultdict(list)
+        sizes = []
+        self.numbers = [numbers(key) for key in self.keys]
+        for i, key in enumerate(self.keys):
+            grams = ngrams(normalize_key(key), n)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.sizes = np.array(sizes, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def match(self, text, min_score=0.0):
+        """Return (best key, Dice similarity in [0, 1]) for text, or (None, 0.0).
+
+        Keys missing one of the query's numbers are skipped, as are keys scoring
+        below ``min_score``. Ties go to the key listed first in the catalog.
+        """
+        grams = ngrams(normalize_key(text), self.n)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return None, 0.0
+        counts = np.bincount(np.concatenate(hits), minlength=len(self.keys))
+        scores = 2 * counts / (len(grams) + self.sizes)
+        candidates = np.flatnonzero((counts > 0) & (scores >= min_score))
+        query_numbers = numbers(text)
+        for best in candidates[np.argsort(-scores[candidates], kind='stable')].tolist():
+            if query_numbers <= self.numbers[best]:
+                return self.keys[best], float(scores[best])
+        return None, 0.0
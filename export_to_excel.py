@@ -8,8 +8,9 @@ def main():
     with open(path / 'all_assets_data.json', 'r', encoding='utf-8') as f:
         data = json.load(f)
 
+    group_names = list(data['groups'])
     rows = []
-    for group in ['A', 'B', 'C']:
+    for group in group_names:
         for asset in data['groups'][group]['assets']:
             row = {
                 'Group': group,
@@ -36,12 +37,13 @@ def main():
     df = pd.DataFrame(rows)
     asset_type_order = ['Laptop', 'PC', 'Monitor', 'Printer Scaneer', 'Server Room']
     df['_sort_key'] = df['Asset Type'].apply(lambda x: asset_type_order.index(x) if x in asset_type_order else 99)
-    df = df.sort_values(['_sort_key', 'Group', 'Serial']).drop(columns=['_sort_key']).reset_index(drop=True)
-    total_value = sum(data['groups'][g]['total_value'] for g in ['A', 'B', 'C'])
-    target = total_value / 3
+    df['_group_key'] = df['Group'].map(group_names.index)
+    df = df.sort_values(['_sort_key', '_group_key', 'Serial']).drop(columns=['_sort_key', '_group_key']).reset_index(drop=True)
+    total_value = sum(data['groups'][g]['total_value'] for g in group_names)
+    target = total_value / len(group_names)
 
     summary_rows = []
-    for g in ['A', 'B', 'C']:
+    for g in group_names:
         val = data['groups'][g]['total_value']
         cnt = data['groups'][g]['count']
         var = ((val - target) / target) * 100
@@ -51,7 +53,7 @@ def main():
             'Total Value (BDT)': round(val, 2),
             'Variance %': round(var, 2),
         })
-    total_assets = sum(data['groups'][g]['count'] for g in ['A', 'B', 'C'])
+    total_assets = sum(data['groups'][g]['count'] for g in group_names)
     summary_rows.append({
         'Group': 'TOTAL',
         'Total Assets': total_assets,
@@ -65,7 +67,7 @@ def main():
         df_summary.to_excel(w, sheet_name='Summary', index=False)
         df.to_excel(w, sheet_name='All Assets', index=False)
         ws = w.sheets['All Assets']
-        ws.column_dimensions['A'].width = 8
+        ws.column_dimensions['A'].width = max(8, max(len(g) for g in group_names) + 2)
         ws.column_dimensions['B'].width = 14
         ws.column_dimensions['C'].width = 8
         ws.column_dimensions['D'].width = 24
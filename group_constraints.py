@@ -0,0 +1,255 @@
+"""Constraints on the division into groups: pinned assets, must-link and cannot-link.
+
+A constraints file is a JSON object with any of:
+    pinned           - [{"match": SELECTOR, "group": NAME}, ...]: matching assets go to that group
+    must_link        - asset fields, e.g. ["User"]: assets sharing a value of one stay together
+    must_link_ignore - values of those fields that link nothing, e.g. "In Stock"
+    cannot_link      - [[SELECTOR, SELECTOR], ...]: assets matching the first never share a
+                       group with assets matching the second
+A SELECTOR is {field: value}; an asset matches when every field does, text
+fields by case-insensitive substring and others by equality.
+
+Must-linked assets are collapsed into one item worth their total value. Pinned
+items are placed first, then the others largest first into the lightest group
+their cannot-link partners leave open, and moves and swaps of unconstrained
+items narrow the remaining gap. Constraints that can't all hold are reported,
+as are the ones that rule out an even division.
+
+    python process_assets.py --constraints constraints.json
+"""
+import heapq
+import json
+from collections import defaultdict
+
+import numpy as np
+
+from partitioning import _best_transfer
+from process_assets import assign_groups
+
+CONSTRAINT_KEYS = {'pinned', 'must_link', 'must_link_ignore', 'cannot_link'}
+
+
+def load_constraints(path, group_names=None):
+    """Constraints from a JSON file (see the module docstring).
+
+    With ``group_names``, pins must name one of those groups.
+    """
+    with open(path, encoding='utf-8') as f:
+        constraints = json.load(f)
+    unknown = set(constraints) - CONSTRAINT_KEYS
+    if unknown:
+        raise ValueError(f"{path}: unknown constraint key(s) {', '.join(sorted(unknown))}")
+    for r, rule in enumerate(constraints.get('pinned', [])):
+        if not isinstance(rule, dict) or not isinstance(rule.get('match'), dict) or 'group' not in rule:
+            raise ValueError(f"{path}: pin #{r + 1} needs a \"match\" selector and a \"group\"")
+        if group_names is not None and rule['group'] not in group_names:
+            raise ValueError(f"{path}: pin #{r + 1} names group {rule['group']!r}, not one of "
+                             f"{', '.join(group_names)}")
+    for r, pair in enumerate(constraints.get('cannot_link', [])):
+        if not (isinstance(pair, list) and len(pair) == 2 and all(isinstance(side, dict) for side in pair)):
+            raise ValueError(f"{path}: cannot-link #{r + 1} must be a pair of selectors")
+    return constraints
+
+
+def matches(asset, selector):
+    """Whether an asset matches a selector: text by case-insensitive substring, the rest by equality."""
+    for field, wanted in selector.items():
+        value = asset.get(field)
+        if isinstance(wanted, str) and isinstance(value, str):
+            if wanted.lower() not in value.lower():
+                return False
+        elif value != wanted:
+            return False
+    return True
+
+
+def select(assets, selector):
+    """Indices of the assets matching a selector, testing each distinct combination of its fields once."""
+    known = {}
+    selected = []
+    for i, asset in enumerate(assets):
+        key = tuple(asset.get(field) for field in selector)
+        if key not in known:
+            known[key] = matches(asset, selector)
+        if known[key]:
+            selected.append(i)
+    return selected
+
+
+def _describe(selector):
+    return ', '.join(f"{field}={value!r}" for field, value in selector.items())
+
+
+def must_link_sets(assets, fields, ignore=()):
+    """Set index of every asset, and a description of each set, linking by equal field values."""
+    parent = list(range(len(assets)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    ignore = {str(value).strip().lower() for value in ignore}
+    reasons = {}
+    for field in fields:
+        first = {}
+        for i, asset in enumerate(assets):
+            value = asset.get(field)
+            key = str(value).strip().lower() if value is not None else ''
+            if not key or key in ignore:
+                continue
+            if key in first:
+                a, b = find(i), find(first[key])
+                if a != b:
+                    parent[a] = b
+                reasons.setdefault(b, f"{field}={value!r}")
+            else:
+                first[key] = i
+    roots = [find(i) for i in range(len(assets))]
+    ids = {}
+    sets = np.array([ids.setdefault(root, len(ids)) for root in roots], dtype=np.intp)
+    descriptions = [None] * len(ids)
+    for root, index in ids.items():
+        descriptions[index] = reasons.get(root)
+    return sets, descriptions
+
+
+def constrained_partition(assets, values, group_names, constraints):
+    """Group of each asset under the constraints, and a report.
+
+    ``group_names[g]`` names group g. The report lists the must-link sets, the
+    constraints that had to be broken ("broken") and the reasons an even
+    division was out of reach ("limits").
+    """
+    values = np.asarray(values, dtype=float)
+    group_count = len(group_names)
+    group_index = {name: g for g, name in enumerate(group_names)}
+    sets, descriptions = must_link_sets(assets, constraints.get('must_link', []),
+                                        constraints.get('must_link_ignore', []))
+    set_count = len(descriptions)
+    set_values = np.bincount(sets, weights=values, minlength=set_count)
+    set_sizes = np.bincount(sets, minlength=set_count)
+    broken = []
+
+    # Pins, per set
+    pins = {}
+    for r, rule in enumerate(constraints.get('pinned', [])):
+        if rule['group'] not in group_index:
+            raise ValueError(f"Pin #{r + 1} names unknown group {rule['group']!r}")
+        g = group_index[rule['group']]
+        for i in select(assets, rule['match']):
+            s = sets[i]
+            if s in pins and pins[s][0] != g:
+                through = f" through must-link {descriptions[s]}" if descriptions[s] else ''
+                broken.append(f"pin #{r + 1} ({_describe(rule['match'])} -> {rule['group']}) conflicts with "
+                              f"pin #{pins[s][1] + 1}{through}")
+            else:
+                pins.setdefault(s, (g, r))
+
+    # Cannot-link pairs of sets
+    forbidden = defaultdict(set)
+    for r, (first, second) in enumerate(constraints.get('cannot_link', [])):
+        first_sets, second_sets = defaultdict(set), defaultdict(set)
+        for i in select(assets, first):
+            first_sets[sets[i]].add(i)
+        for i in select(assets, second):
+            second_sets[sets[i]].add(i)
+        for a in first_sets:
+            for b in second_sets:
+                if a == b and len(first_sets[a] | second_sets[b]) == 1:
+                    continue  # one asset matching both selectors
+                if a == b:
+                    broken.append(f"cannot-link #{r + 1} ({_describe(first)} / {_describe(second)}) "
+                                  f"joins assets must-linked by {descriptions[a]}")
+                else:
+                    forbidden[a].add(b)
+                    forbidden[b].add(a)
+
+    # Pinned sets first, then the rest largest first into the lightest open group
+    set_labels = np.full(set_count, -1, dtype=np.int32)
+    totals = [0.0] * group_count
+    for s, (g, _) in pins.items():
+        set_labels[s] = g
+        totals[g] += set_values[s]
+    pinned_totals = list(totals)
+    heap = [(total, g) for g, total in enumerate(totals)]
+    heapq.heapify(heap)
+    free = np.array([s for s in np.argsort(-set_values, kind='stable').tolist() if s not in pins], dtype=np.intp)
+    for s in free.tolist():
+        taken = {set_labels[other] for other in forbidden.get(s, ())} - {-1}
+        skipped = []
+        while heap and heap[0][1] in taken:
+            skipped.append(heapq.heappop(heap))
+        if heap:
+            total, g = heapq.heappop(heap)
+        else:
+            total, g = skipped.pop(0)
+            broken.append(f"cannot-link for {_describe_set(assets, sets, descriptions, s)}: every group "
+                          f"already holds a partner")
+        heapq.heappush(heap, (total + set_values[s], g))
+        for item in skipped:
+            heapq.heappush(heap, item)
+        set_labels[s] = g
+    for s, (g, r) in pins.items():
+        if any(set_labels[other] == g for other in forbidden.get(s, ())):
+            broken.append(f"pin #{r + 1} puts {_describe_set(assets, sets, descriptions, s)} "
+                          f"next to a cannot-link partner")
+
+    # Moves and swaps of unconstrained sets between the heaviest and lightest groups
+    totals = np.bincount(set_labels, weights=set_values, minlength=group_count)
+    movable = np.array([s for s in free.tolist() if s not in forbidden], dtype=np.intp)
+    for _ in range(len(movable) + 1):
+        heavy, light = int(totals.argmax()), int(totals.argmin())
+        step = _best_transfer(set_values, movable[set_labels[movable] == heavy],
+                              movable[set_labels[movable] == light], totals[heavy] - totals[light])
+        if step is None:
+            break
+        _, i, j = step
+        set_labels[i] = light
+        totals[heavy] -= set_values[i]
+        totals[light] += set_values[i]
+        if j >= 0:
+            set_labels[j] = heavy
+            totals[heavy] += set_values[j]
+            totals[light] -= set_values[j]
+
+    labels = set_labels[sets]
+    target = values.sum() / group_count
+    limits = []
+    for g, total in enumerate(pinned_totals):
+        if total > target:
+            limits.append(f"pins put BDT {total:,.0f} in Group {group_names[g]}, over the BDT {target:,.0f} target")
+    for s in np.flatnonzero(set_values > target).tolist():
+        if set_sizes[s] > 1:
+            limits.append(f"must-link {descriptions[s]} keeps {set_sizes[s]} assets worth BDT {set_values[s]:,.0f} "
+                          f"together, over the BDT {target:,.0f} target")
+    totals = np.bincount(labels, weights=values, minlength=group_count)
+    unconstrained = assign_groups(values, group_count)[3]
+    return labels, {
+        'sets': int((set_sizes > 1).sum()), 'linked': int(set_sizes[set_sizes > 1].sum()),
+        'pinned': int(sum(set_sizes[s] for s in pins)), 'cannot_link': sum(map(len, forbidden.values())) // 2,
+        'broken': list(dict.fromkeys(broken)), 'limits': limits,
+        'spread': float(totals.max() - totals.min()),
+        'unconstrained_spread': float(max(unconstrained) - min(unconstrained)),
+    }
+
+
+def _describe_set(assets, sets, descriptions, s):
+    if descriptions[s]:
+        return f"must-link {descriptions[s]}"
+    asset = assets[int(np.flatnonzero(sets == s)[0])]
+    return f"{asset.get('AssetType')} {asset.get('Serial')}"
+
+
+def print_constraint_report(report, path):
+    """Print what the constraints did to the division."""
+    print(f"  Constraints from {path}: {report['pinned']} pinned asset(s), {report['linked']} asset(s) in "
+          f"{report['sets']} must-link set(s), {report['cannot_link']} cannot-link pair(s)")
+    for message in report['broken']:
+        print(f"  Warning: could not keep {message}")
+    print(f"  Spread BDT {report['spread']:,.2f} (BDT {report['unconstrained_spread']:,.2f} without constraints)")
+    if report['limits']:
+        print("  Perfect balance is out of reach because:")
+        for message in report['limits']:
+            print(f"    {message}")
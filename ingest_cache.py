@@ -0,0 +1,160 @@
+"""On-disk cache of parsed sheets, keyed by a hash of each sheet's raw XML.
+
+An .xlsx file is a zip archive with one XML part per worksheet. A sheet's cache
+key is the SHA-256 of its cell data (with shared-string references replaced by
+the strings themselves, so edits elsewhere in the workbook don't change it),
+the workbook styles and the parser's own inputs (parser_signature: PARSER_VERSION,
+the sheet's schema, the keywords flagged at ingestion, ...). Unchanged sheets are
+therefore served from the cache even after other sheets were edited.
+"""
+import hashlib
+import os
+import pickle
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+from process_assets import parser_signature
+
+DEFAULT_CACHE_DIR = '.ingest_cache'
+DEFAULT_CACHE_SIZE_MB = 256
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_SHEET_DATA = re.compile(rb'<sheetData\s*/>|<sheetData\b[^>]*>.*?</sheetData>', re.DOTALL)
+_SHARED_STRING = re.compile(rb'<si\b[^>]*>(.*?)</si>', re.DOTALL)
+_SHARED_STRING_CELL = re.compile(rb'(<c\b[^>]*\bt="s"[^>]*>\s*<v>)(\d+)(</v>)')
+_STRING_CELL_TYPE = re.compile(rb'<c\b[^>]*\bt="s"')
+
+
+def _part_path(target):
+    """Zip member name of a relationship target found in xl/_rels/workbook.xml.rels."""
+    return target.lstrip('/') if target.startswith('/') else 'xl/' + target
+
+
+def sheet_fingerprints(file_path, sheet_names):
+    """Return {sheet_name: cache key} for the sheets present in an .xlsx workbook.
+
+    Returns an empty dict when the file can't be read as an .xlsx archive, which
+    simply means nothing from it is cached.
+    """
+    try:
+        archive = zipfile.ZipFile(file_path)
+    except (OSError, zipfile.BadZipFile):
+        return {}
+
+    with archive:
+        try:
+            workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+            rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        except (KeyError, ET.ParseError):
+            return {}
+
+        targets = {}
+        shared_strings_part = styles_part = None
+        for rel in rels.iter(f'{_PKG_REL_NS}Relationship'):
+            targets[rel.get('Id')] = _part_path(rel.get('Target', ''))
+            if rel.get('Type', '').endswith('/sharedStrings'):
+                shared_strings_part = _part_path(rel.get('Target', ''))
+            elif rel.get('Type', '').endswith('/styles'):
+                styles_part = _part_path(rel.get('Target', ''))
+
+        shared_strings_xml = archive.read(shared_strings_part) if shared_strings_part in archive.namelist() else b''
+        shared_strings = _SHARED_STRING.findall(shared_strings_xml)
+        styles_digest = hashlib.sha256(archive.read(styles_part) if styles_part in archive.namelist() else b'').digest()
+
+        fingerprints = {}
+        for sheet in workbook.iter(f'{_MAIN_NS}sheet'):
+            sheet_name = sheet.get('name')
+            part = targets.get(sheet.get(f'{_REL_NS}id'))
+            if sheet_name not in sheet_names or part not in archive.namelist():
+                continue
+            match = _SHEET_DATA.search(archive.read(part))
+            sheet_data = match.group(0) if match else b''
+
+            # Inline the shared strings each cell refers to
+            resolved = [0]
+
+            def inline(cell):
+                index = int(cell.group(2))
+                if index >= len(shared_strings):
+                    return cell.group(0)
+                resolved[0] += 1
+                return cell.group(1) + shared_strings[index] + cell.group(3)
+
+            sheet_data = _SHARED_STRING_CELL.sub(inline, sheet_data)
+
+            digest = hashlib.sha256()
+            digest.update(parser_signature(sheet_name).encode('utf-8') + b'\0')
+            digest.update(styles_digest)
+            digest.update(sheet_data)
+            if resolved[0] != len(_STRING_CELL_TYPE.findall(sheet_data)):
+                # Some string cells weren't inlined; depend on the whole string table instead
+                digest.update(hashlib.sha256(shared_strings_xml).digest())
+            fingerprints[sheet_name] = digest.hexdigest()
+        return fingerprints
+
+
+class IngestCache:
+    """Parsed asset records stored as pickles, evicted least-recently-used beyond a size limit."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pickle')
+
+    def get(self, key):
+        """Return the cached assets for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                assets = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        os.utime(path)  # Mark as recently used
+        self.hits += 1
+        return assets
+
+    def put(self, key, assets):
+        """Store parsed assets under a key, then trim the cache to its size limit."""
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(assets, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least-recently-used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def summary(self):
+        return f"Ingestion cache: {self.hits} hit(s), {self.misses} miss(es), {self.evictions} eviction(s)"
@@ -0,0 +1,73 @@
+"""Multi-keyword search in asset text (Aho-Corasick).
+
+All keywords are compiled into one automaton: a trie of the keywords whose
+failure links are folded into a full transition table, so a text is read once,
+one character at a time, however many keywords there are. ``scan`` returns a
+bit mask with bit i set when keyword i occurs in the text, case-insensitively.
+Inventories repeat the same remarks and notes over and over, so results are
+remembered per distinct text.
+"""
+from collections import deque
+
+# Distinct texts whose masks a matcher remembers
+KEYWORD_MEMO_LIMIT = 65536
+
+
+class KeywordMatcher:
+    """Finds which of a fixed list of keywords occur in a text."""
+
+    def __init__(self, keywords):
+        self.keywords = [keyword.lower() for keyword in keywords]
+        goto = [{}]
+        output = [0]
+        for i, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                if ch not in goto[state]:
+                    goto[state][ch] = len(goto)
+                    goto.append({})
+                    output.append(0)
+                state = goto[state][ch]
+            output[state] |= 1 << i
+
+        # Breadth-first, so a state's failure target (a shorter suffix) is complete first
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            output[state] |= output[fail[state]]
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for ch, target in goto[state].items():
+                fail[target] = delta[fail[state]].get(ch, 0)
+                queue.append(target)
+        self.delta = delta
+        self.output = output
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def mask(self, keywords):
+        """Bit mask of the given keywords."""
+        value = 0
+        for keyword in keywords:
+            value |= 1 << self.keywords.index(keyword.lower())
+        return value
+
+    def scan(self, text):
+        """Bit mask of the keywords found in text."""
+        found = self._memo.get(text)
+        if found is None:
+            found = 0
+            state = 0
+            delta = self.delta
+            output = self.output
+            for ch in text.lower():
+                state = delta[state].get(ch, 0)
+                found |= output[state]
+            if len(self._memo) >= KEYWORD_MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[text] = found
+        return found
@@ -0,0 +1,196 @@
+"""How robust the group balance is when market prices are uncertain.
+
+The A/B/C assignment stays fixed while prices are drawn at random: every
+catalog entry that priced some asset (a market price key, a price rule or a
+type's default) gets one price factor per draw, taken from a triangular
+distribution over the entry's range with its catalog price as the mode. The
+range is the entry's ``"range": [low, high]`` in the catalog file, or the
+catalog price +/- ``price_uncertainty`` (a share, 0.15 unless the catalog sets
+it). Assets priced by the same entry move together, and reconditioned prices
+move with new ones.
+
+An asset's value is linear in its entry's price, so the inventory reduces to an
+entries x groups matrix of value per unit of price factor and each draw's group
+totals are one matrix product. Draws are made in chunks, each from its own
+child of the seed, so results depend on the seed but not on ``jobs``.
+
+    python monte_carlo.py [workbooks ...] [--draws 10000] [--seed 0] [--jobs N]
+
+Without workbooks the assignment in all_assets_data.json is used.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from batch_valuation import assets_frame, classify_frame, price_lookups, reconditioned_prices, value_assets
+from process_assets import (
+    GROUP_NAMES, SHEET_NAMES, assign_groups, get_price_catalog, load_assets, parse_group_names, partition_names,
+    use_price_catalog,
+)
+
+# Relative price uncertainty of catalog entries without a "range"
+PRICE_UNCERTAINTY = 0.15
+
+# Draws per chunk; each chunk has its own random stream
+DRAW_CHUNK = 1000
+
+# Percentiles of the max group deviation reported
+DEVIATION_PERCENTILES = [5, 50, 90, 95, 99]
+
+
+def load_assignment(path='all_assets_data.json'):
+    """Assets, group index of each and group names from an all_assets_data.json file."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assets, labels = [], []
+    names = list(data['groups'])
+    for group, name in enumerate(names):
+        group_assets = data['groups'][name]['assets']
+        assets.extend(group_assets)
+        labels.extend([group] * len(group_assets))
+    return assets, np.array(labels, dtype=np.intp), names
+
+
+def entry_range(catalog, asset_type, price, entry):
+    """(low, high) price factors of a catalog entry whose new price is ``price``."""
+    spec = None
+    if entry[0] == 'key':
+        spec = catalog.data['market_prices'][asset_type][entry[1]]
+    elif entry[0] == 'rule':
+        spec = json.loads(entry[1])
+    if isinstance(spec, dict) and 'range' in spec:
+        low, high = spec['range']
+        if not low <= price <= high:
+            raise ValueError(f"{asset_type} {entry[1]!r}: price {price} outside its range [{low}, {high}]")
+        return (low / price, high / price) if price else (1.0, 1.0)
+    uncertainty = catalog.data.get('price_uncertainty', PRICE_UNCERTAINTY)
+    return 1.0 - uncertainty, 1.0 + uncertainty
+
+
+def balance_weights(assets, labels, group_count, catalog=None):
+    """What the Monte Carlo draws act on, for valued-from-scratch assets.
+
+    Returns ``(weights, low, high)``: weights[e, g] is group g's value at price
+    factor 1 of the assets priced by entry e, which may vary between low[e] and
+    high[e] times its price.
+    """
+    if catalog is None:
+        catalog = get_price_catalog()
+    frame, flags = assets_frame(assets)
+    codes, lookups = price_lookups(frame, catalog)
+    pairs = np.array([pair for _, pair, _ in lookups], dtype=float).reshape(-1, 2)
+    prices = pairs[codes, reconditioned_prices(frame).astype(np.intp)]
+    multipliers, _, _ = classify_frame(frame, flags)
+
+    # Price keys matched by the same entry share one factor
+    entry_codes, entries = pd.factorize(pd.Series([(asset_type, entry) for asset_type, _, entry in lookups],
+                                                  dtype=object))
+    ranges = np.ones((len(entries), 2))
+    for code, (asset_type, pair, entry) in zip(entry_codes.tolist(), lookups):
+        ranges[code] = entry_range(catalog, asset_type, pair[0], entry)
+
+    weights = np.zeros((len(entries), group_count))
+    np.add.at(weights, (entry_codes[codes], labels), prices * multipliers)
+    return weights, ranges[:, 0], ranges[:, 1]
+
+
+def triangular_factors(rng, low, high, count):
+    """count x entries price factors, triangular between low and high with mode 1."""
+    u = rng.random((count, len(low)))
+    width = high - low
+    below = np.divide(1.0 - low, width, out=np.zeros_like(width), where=width > 0)
+    rising = low + np.sqrt(u * width * (1.0 - low))
+    falling = high - np.sqrt((1.0 - u) * width * (high - 1.0))
+    return np.where(u < below, rising, falling)
+
+
+def _draw_chunk(task):
+    """Group totals of one chunk of draws."""
+    seed, count, weights, low, high = task
+    return triangular_factors(np.random.default_rng(seed), low, high, count) @ weights
+
+
+def simulate_totals(weights, low, high, draws=10000, seed=0, jobs=1):
+    """draws x groups matrix of group totals under random prices."""
+    counts = [DRAW_CHUNK] * (draws // DRAW_CHUNK) + ([draws % DRAW_CHUNK] if draws % DRAW_CHUNK else [])
+    tasks = [(child, count, weights, low, high)
+             for child, count in zip(np.random.SeedSequence(seed).spawn(len(counts)), counts)]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunks = list(executor.map(_draw_chunk, tasks))
+    else:
+        chunks = [_draw_chunk(task) for task in tasks]
+    return np.concatenate(chunks) if chunks else np.empty((0, weights.shape[1]))
+
+
+def max_deviation(totals):
+    """Largest distance of a group total from the mean group total: (absolute, relative) per row."""
+    totals = np.atleast_2d(totals)
+    mean = totals.mean(axis=1)
+    deviation = np.abs(totals - mean[:, None]).max(axis=1)
+    return deviation, np.divide(deviation, mean, out=np.zeros_like(deviation), where=mean > 0)
+
+
+def balance_report(totals, point):
+    """Percentiles of the max group deviation and the variance of the group totals.
+
+    The first row is the point estimate at catalog prices.
+    """
+    point = np.atleast_2d(point)
+    columns = [*max_deviation(totals), totals.var(axis=1)]
+    rows = {'at catalog prices': [column[0] for column in [*max_deviation(point), point.var(axis=1)]]}
+    for q in DEVIATION_PERCENTILES:
+        rows[f'p{q}'] = [np.percentile(column, q) for column in columns]
+    report = pd.DataFrame.from_dict(rows, orient='index', columns=['Max deviation', 'Max deviation %', 'Variance'])
+    report['Max deviation %'] *= 100
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Test the group balance against random market prices.')
+    parser.add_argument('workbooks', nargs='*',
+                        help='Excel workbooks or table sources to read and divide afresh '
+                             '(default: the groups in --assignment)')
+    parser.add_argument('--assignment', default='all_assets_data.json',
+                        help='grouped assets written by process_assets.py (default: all_assets_data.json)')
+    parser.add_argument('--groups', type=parse_group_names, default=GROUP_NAMES, metavar='N|NAMES',
+                        help='with workbooks: number of groups or their comma-separated names (default: A,B,C)')
+    parser.add_argument('--draws', type=int, default=10000, help='random price draws (default: 10000)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='make draws in this many worker processes (default: 1)')
+    parser.add_argument('--price-catalog', default=None,
+                        help='price catalog file (default: price_catalog.json next to process_assets.py)')
+    parser.add_argument('--output', default=None, help='write every draw\'s group totals to this CSV file')
+    args = parser.parse_args(argv)
+
+    use_price_catalog(args.price_catalog)
+    if args.workbooks:
+        assets = value_assets(load_assets(args.workbooks, SHEET_NAMES))
+        _, labels, _, _ = assign_groups([asset['CurrentValue'] for asset in assets], len(args.groups))
+        names = partition_names(args.groups)
+    else:
+        assets, labels, names = load_assignment(args.assignment)
+        print(f"Using the groups in {args.assignment}")
+
+    start = time.perf_counter()
+    weights, low, high = balance_weights(assets, labels, len(names))
+    totals = simulate_totals(weights, low, high, args.draws, args.seed, args.jobs)
+    report = balance_report(totals, weights.sum(axis=0))
+    print(f"\n{args.draws} price draws over {len(weights)} catalog entries x {len(assets)} assets "
+          f"(seed {args.seed}) in {time.perf_counter() - start:.3f}s")
+    spread = pd.DataFrame({'Mean': totals.mean(axis=0), 'Std': totals.std(axis=0)}, index=names)
+    print(spread.map(lambda value: f"{value:,.0f}").to_string())
+    print('\nMax deviation of a group total from the mean, and variance of the group totals:')
+    print(report.map(lambda value: f"{value:,.2f}").to_string())
+    if args.output:
+        pd.DataFrame(totals, columns=names).to_csv(args.output, index_label='Draw')
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,773 @@
+"""Partition engines: ways of dividing asset values into groups of equal total.
+
+Every engine takes the values and a group count and returns the group index of
+each value. ``partition`` turns that into what divide_into_groups() reports,
+the same (order, labels, running, totals) as assign_groups():
+    greedy - assign_groups(): largest value first, each to the lightest group
+    kk     - Karmarkar-Karp largest differencing, k-way: every value starts
+             as a partial partition (value, 0, ..., 0); the two partials with
+             the largest spread are merged, largest subset sum against the
+             smallest, until one partition is left. A heap keeps the merges
+             O(n log n) and subsets are linked lists joined in O(1).
+    balanced - greedy on several criteria at once: total value, the count of
+             each asset type and optionally each type's value, every one as a
+             share of its per-group target and weighted (see BALANCE_WEIGHTS).
+             Each value goes to the group with the lowest weighted load.
+    location - keeps the assets of each Location in one group where the
+             balance allows (location_partition): whole locations are handed
+             out greedily, then moved or swapped, and one is split only when
+             nothing else brings the totals within LOCATION_TOLERANCE.
+    portfolio - races greedy, kk, refinement, annealing and randomized
+             restarts across worker processes under one deadline and keeps
+             the lowest variance (run_portfolio in portfolio.py).
+Big items, such as servers next to many small peripherals, are where
+differencing usually beats greedy.
+
+Any engine's result can then be refined by local search (refine_partition):
+values are moved or swapped between a heavy and a light group whenever that
+narrows their gap, optionally after a simulated annealing phase, until no such
+step is left or a wall-clock budget runs out.
+
+After an inventory change, incremental_partition() keeps the previous groups
+(read back from all_assets_data.json): assets still there stay put, new ones
+go to the lightest groups and the balance is then restored with as few
+reassignments of placed assets as it takes.
+
+    python partitioning.py [workbooks ...] [--groups N|NAMES]
+"""
+import argparse
+import heapq
+import json
+import time
+
+import numpy as np
+
+from process_assets import (
+    BALANCE_WEIGHTS, GROUP_NAMES, SHEET_NAMES, WORKBOOK_PATH, assign_groups, load_assets, parse_balance_weights,
+    parse_group_names,
+)
+
+DEFAULT_ENGINE = 'greedy'
+
+# Smallest drop in the sum of squared group totals a refinement step must make
+REFINE_TOLERANCE = 1e-6
+
+# Annealing steps between clock checks, and the share of the budget annealing may use
+ANNEAL_BLOCK = 1024
+ANNEAL_SHARE = 0.5
+
+# Points of the variance trajectory printed after refinement
+TRAJECTORY_POINTS = 8
+
+# Largest deviation of a group total from the target, as a share of the target,
+# that incremental re-partitioning leaves alone
+REBALANCE_TOLERANCE = 0.001
+
+# Heaviest and lightest groups paired up for each incremental rebalancing step
+REBALANCE_PAIRS = 3
+
+# Spread of the group totals the location engine accepts, as a share of the target
+LOCATION_TOLERANCE = 0.01
+
+# Location values (lowercase) that name no physical place; such assets go wherever balances best
+UNPLACED_LOCATIONS = {'', 'user'}
+
+
+def greedy_partition(values, group_count=3):
+    """Group of each value under assign_groups()."""
+    return assign_groups(values, group_count)[1]
+
+
+def karmarkar_karp(values, group_count=3):
+    """Group of each value under k-way largest differencing.
+
+    Groups are numbered by final total, largest first.
+    """
+    values = np.asarray(values, dtype=float)
+    # Subsets as linked lists of value indices: (head, tail), -1 when empty
+    next_item = [-1] * len(values)
+    empty = (-1, -1)
+    padding = (0.0,) * (group_count - 1)
+    heap = [(-value, i, (value,) + padding, ((i, i),) + (empty,) * (group_count - 1))
+            for i, value in enumerate(values.tolist())]
+    heapq.heapify(heap)
+    counter = len(heap)
+
+    while len(heap) > 1:
+        _, _, sums_a, subsets_a = heapq.heappop(heap)
+        _, _, sums_b, subsets_b = heapq.heappop(heap)
+        # Both are sorted by sum, largest first: pair a's largest with b's smallest
+        merged = []
+        for j in range(group_count):
+            (head_a, tail_a), (head_b, tail_b) = subsets_a[j], subsets_b[group_count - 1 - j]
+            if head_a < 0:
+                subset = (head_b, tail_b)
+            elif head_b < 0:
+                subset = (head_a, tail_a)
+            else:
+                next_item[tail_a] = head_b
+                subset = (head_a, tail_b)
+            merged.append((sums_a[j] + sums_b[group_count - 1 - j], subset))
+        merged.sort(key=lambda item: -item[0])
+        sums = tuple(total for total, _ in merged)
+        heapq.heappush(heap, (sums[-1] - sums[0], counter, sums, tuple(subset for _, subset in merged)))
+        counter += 1
+
+    labels = np.zeros(len(values), dtype=np.int32)
+    if heap:
+        for group, (head, _) in enumerate(heap[0][3]):
+            members = []
+            while head >= 0:
+                members.append(head)
+                head = next_item[head]
+            labels[members] = group
+    return labels
+
+
+def _inverse(targets):
+    """1 / targets, 0 where a target is 0 (nothing to balance)."""
+    return np.divide(1.0, targets, out=np.zeros_like(targets), where=targets > 0)
+
+
+def balanced_partition(values, group_count=3, asset_types=None, weights=None):
+    """Group of each value, balancing value and per-type counts (and per-type value).
+
+    Values are taken largest first. A group's load is the weighted sum of its
+    total value, its count of the value's asset type and that type's value, each
+    over its per-group target; the value goes to the group with the lowest load
+    (ties to the earlier group). ``weights`` updates BALANCE_WEIGHTS.
+    """
+    weights = dict(BALANCE_WEIGHTS, **(weights or {}))
+    values = np.asarray(values, dtype=float)
+    if asset_types is None:
+        asset_types = np.zeros(len(values), dtype=np.intp)
+    _, type_codes = np.unique(np.asarray(asset_types, dtype=object).astype(str), return_inverse=True)
+    type_count = int(type_codes.max()) + 1 if len(values) else 0
+    value_scale = weights['value'] * float(_inverse(np.array([values.sum() / group_count]))[0])
+    count_scale = (weights['count'] * _inverse(np.bincount(type_codes, minlength=type_count) / group_count)).tolist()
+    type_value_scale = (weights['type_value'] *
+                        _inverse(np.bincount(type_codes, weights=values, minlength=type_count) / group_count)).tolist()
+
+    order = np.argsort(-values, kind='stable')
+    labels = np.empty(len(values), dtype=np.int32)
+    value_load = [0.0] * group_count
+    type_load = [[0.0] * group_count for _ in range(type_count)]
+    groups = range(group_count)
+    block_labels = []
+    for value, code in zip(values[order].tolist(), type_codes[order].tolist()):
+        loads = type_load[code]
+        group = min(groups, key=lambda g: value_load[g] + loads[g])
+        value_load[group] += value * value_scale
+        loads[group] += count_scale[code] + value * type_value_scale[code]
+        block_labels.append(group)
+    labels[order] = block_labels
+    return labels
+
+
+def location_codes(locations):
+    """Location index of every asset (-1 where unplaced, see UNPLACED_LOCATIONS) and the locations."""
+    index = {}
+    codes = np.empty(len(locations), dtype=np.intp)
+    for i, location in enumerate(locations):
+        key = str(location).strip().lower() if location is not None else ''
+        codes[i] = -1 if key in UNPLACED_LOCATIONS else index.setdefault(key, len(index))
+    return codes, list(index)
+
+
+def location_scatter(codes, labels, group_count=3):
+    """(locations split between groups, placed assets outside their location's main group)."""
+    placed = codes >= 0
+    counts = np.bincount(codes[placed] * group_count + np.asarray(labels)[placed],
+                         minlength=(int(codes.max()) + 1) * group_count if placed.any() else 0)
+    counts = counts.reshape(-1, group_count)
+    return int(((counts > 0).sum(axis=1) > 1).sum()), int(counts.sum() - counts.max(axis=1).sum())
+
+
+def _piece_step(values, codes, labels, heavy, light, gap):
+    """Best move or swap of whole location pieces or unplaced assets between two groups, applied."""
+    sides = []
+    for group in (heavy, light):
+        members = labels == group
+        unplaced = np.flatnonzero(members & (codes < 0))
+        placed = members & (codes >= 0)
+        present = np.flatnonzero(np.bincount(codes[placed], minlength=1))
+        piece_values = np.bincount(codes[placed], weights=values[placed], minlength=1)[present]
+        sides.append((present, unplaced, np.concatenate([piece_values, values[unplaced]])))
+    (heavy_pieces, heavy_unplaced, heavy_values), (light_pieces, light_unplaced, light_values) = sides
+    step = _best_transfer(np.concatenate([heavy_values, light_values]), np.arange(len(heavy_values)),
+                          np.arange(len(heavy_values), len(heavy_values) + len(light_values)), gap)
+    if step is None:
+        return False
+    _, i, j = step
+    moves = [(i, heavy_pieces, heavy_unplaced, heavy, light)]
+    if j >= 0:
+        moves.append((j - len(heavy_values), light_pieces, light_unplaced, light, heavy))
+    for item, pieces, unplaced, source, target in moves:
+        if item < len(pieces):
+            labels[(codes == pieces[item]) & (labels == source)] = target
+        else:
+            labels[unplaced[item - len(pieces)]] = target
+    return True
+
+
+def _fill(values, candidates, labels, target, half):
+    """Move candidates to ``target``, largest first, while their total stays within half; whether any moved."""
+    candidates = candidates[np.argsort(-values[candidates], kind='stable')]
+    moved, shift = [], 0.0
+    for i, value in zip(candidates.tolist(), values[candidates].tolist()):
+        if 0 < value <= half - shift:
+            moved.append(i)
+            shift += value
+    labels[moved] = target
+    return bool(moved)
+
+
+def _split_step(values, codes, labels, heavy, light, gap):
+    """Move part of one location from the heavy group to the light one, largest assets first; applied."""
+    placed = (labels == heavy) & (codes >= 0)
+    present = np.flatnonzero(np.bincount(codes[placed], minlength=1))
+    if not placed.any():
+        return False
+    half = gap / 2
+    piece_values = np.bincount(codes[placed], weights=values[placed], minlength=1)
+    in_light = set(codes[(labels == light) & (codes >= 0)].tolist())
+    # Rather a location already in the light group, then one piece that covers the shift alone
+    code = min(present.tolist(), key=lambda c: (c not in in_light, piece_values[c] < half, piece_values[c]))
+    if _fill(values, np.flatnonzero(placed & (codes == code)), labels, light, half):
+        return True
+    # Nothing of that location fits: the best move or swap of single assets
+    step = _best_transfer(values, np.flatnonzero(labels == heavy), np.flatnonzero(labels == light), gap)
+    if step is None:
+        return False
+    _, i, j = step
+    labels[i] = light
+    if j >= 0:
+        labels[j] = heavy
+    return True
+
+
+def _location_step(values, codes, labels, heavy, light, gap):
+    """Narrow the gap between two groups, splitting a location only when nothing else helps; applied."""
+    return (_fill(values, np.flatnonzero((labels == heavy) & (codes < 0)), labels, light, gap / 2) or
+            _piece_step(values, codes, labels, heavy, light, gap) or
+            _split_step(values, codes, labels, heavy, light, gap))
+
+
+def location_partition(values, group_count=3, locations=None, tolerance=LOCATION_TOLERANCE):
+    """Group of each value, keeping assets of the same location together where the balance allows.
+
+    Whole locations and unplaced assets are first handed out largest first,
+    each to the lightest group. While the spread of the group totals is over
+    ``tolerance`` times the target, unplaced assets and whole location pieces
+    are moved or swapped from heavy groups to light ones; when no such step
+    helps, one location is split, moving its largest assets first.
+    Finally, location pieces outside their location's main group are merged
+    into it wherever the spread stays within the tolerance.
+    """
+    values = np.asarray(values, dtype=float)
+    codes, names = location_codes([None] * len(values) if locations is None else locations)
+    allowed = tolerance * values.sum() / group_count if group_count else 0.0
+
+    # Whole locations, then unplaced assets, as blocks for the greedy
+    unplaced = np.flatnonzero(codes < 0)
+    blocks = codes.copy()
+    blocks[unplaced] = len(names) + np.arange(len(unplaced))
+    block_values = np.concatenate([np.bincount(codes[codes >= 0], weights=values[codes >= 0],
+                                               minlength=len(names)), values[unplaced]])
+    labels = greedy_partition(block_values, group_count)[blocks].astype(np.int32)
+
+    totals = np.bincount(labels, weights=values, minlength=group_count)
+    for _ in range(len(values) + 1):
+        if totals.max() - totals.min() <= allowed or not any(
+                _location_step(values, codes, labels, heavy, light, totals[heavy] - totals[light])
+                for heavy, light in _group_pairs(totals) if totals[heavy] - totals[light] > REFINE_TOLERANCE):
+            break
+        totals = np.bincount(labels, weights=values, minlength=group_count)
+
+    # Merge stray pieces into their location's main group while the spread allows
+    if names:
+        placed = codes >= 0
+        flat = codes[placed] * group_count + labels[placed]
+        counts = np.bincount(flat, minlength=len(names) * group_count).reshape(-1, group_count)
+        piece_values = np.bincount(flat, weights=values[placed], minlength=len(names) * group_count)
+        piece_values = piece_values.reshape(-1, group_count)
+        spread = max(totals.max() - totals.min(), allowed)
+        for code in np.flatnonzero((counts > 0).sum(axis=1) > 1).tolist():
+            main = int(counts[code].argmax())
+            for group in np.argsort(piece_values[code], kind='stable').tolist():
+                if group == main or not counts[code, group]:
+                    continue
+                moved = totals.copy()
+                moved[group] -= piece_values[code, group]
+                moved[main] += piece_values[code, group]
+                if moved.max() - moved.min() <= spread:
+                    totals = moved
+                    labels[(codes == code) & (labels == group)] = main
+    return labels
+
+
+PARTITION_ENGINES = {
+    'greedy': greedy_partition,
+    'kk': karmarkar_karp,
+    'balanced': balanced_partition,
+    'location': location_partition,
+}
+
+
+def group_running(values, labels, group_count=3):
+    """(order, labels, running, totals) of a partition, as assign_groups() returns them.
+
+    Values are walked largest first and running[i] is value i's group total
+    right after adding it.
+    """
+    values = np.asarray(values, dtype=float)
+    labels = np.asarray(labels, dtype=np.int32)
+    order = np.argsort(-values, kind='stable')
+    running = np.empty(len(values))
+    totals = [0.0] * group_count
+    for group in range(group_count):
+        members = order[labels[order] == group]
+        if len(members):
+            running[members] = np.cumsum(values[members])
+            totals[group] = float(running[members[-1]])
+    return order, labels, running, totals
+
+
+def _best_transfer(values, source, target, gap, moves=True, aim=None, source_values=None):
+    """Best move or swap of values from group members ``source`` to ``target``.
+
+    Shifting x of value from the heavier group to the lighter one lowers their
+    squared totals by 2x(gap - x), best at x = gap / 2; ``aim`` asks for the
+    shift closest to another amount instead. ``source_values``, the values of a
+    ``source`` already in ascending order, saves sorting it. Returns (drop,
+    moved from source, moved from target or -1), or None if nothing helps.
+    """
+    if not len(source) or not (moves or len(target)):
+        return None
+    half = gap / 2 if aim is None else aim
+    if source_values is None:
+        order = np.argsort(values[source], kind='stable')
+        source, source_values = source[order], values[source][order]
+    last = len(source) - 1
+    candidates = []
+    if moves:
+        i = int(np.searchsorted(source_values, half))
+        for k in {max(i - 1, 0), min(i, last)}:
+            candidates.append((source_values[k], source[k], -1))
+    if len(target):
+        # For every target value, the source values just below and above it + half
+        target_values = values[target]
+        positions = np.searchsorted(source_values, target_values + half)
+        for k in (np.maximum(positions - 1, 0), np.minimum(positions, last)):
+            shifts = source_values[k] - target_values
+            best = int(np.argmin(np.abs(shifts - half)))
+            candidates.append((shifts[best], source[k[best]], target[best]))
+    shift, i, j = min(candidates, key=lambda candidate: abs(candidate[0] - half))
+    drop = 2 * shift * (gap - shift)
+    return (drop, int(i), int(j)) if drop > REFINE_TOLERANCE else None
+
+
+def _group_pairs(totals):
+    """(heavy, light) group pairs to balance: heaviest with lightest first, then each with the others."""
+    by_total = np.argsort(totals, kind='stable')
+    lightest, heaviest = by_total[0], by_total[-1]
+    return [(heaviest, lightest)] + [(heaviest, g) for g in by_total[1:-1]] + \
+           [(g, lightest) for g in by_total[-2:0:-1]]
+
+
+def _improving_step(values, labels, totals, type_codes):
+    """The first helpful move or swap, from the heaviest / lightest group pairs outwards."""
+    for heavy, light in _group_pairs(totals):
+        gap = totals[heavy] - totals[light]
+        if gap <= REFINE_TOLERANCE:
+            continue
+        source, target = np.flatnonzero(labels == heavy), np.flatnonzero(labels == light)
+        if type_codes is None:
+            step = _best_transfer(values, source, target, gap)
+        else:
+            # Swaps within one asset type only, so no group's type counts change
+            steps = [_best_transfer(values, source[type_codes[source] == code], target[type_codes[target] == code],
+                                    gap, moves=False) for code in np.unique(type_codes[source])]
+            steps = [step for step in steps if step is not None]
+            step = max(steps) if steps else None
+        if step is not None:
+            return (heavy, light) + step[1:]
+    return None
+
+
+def _anneal(values, labels, totals, type_codes, deadline, rng):
+    """Simulated annealing on the sum of squared group totals until deadline; the best labels found."""
+    group_count = len(totals)
+    totals = totals.tolist()
+    label_list = labels.tolist()
+    value_list = values.tolist()
+    codes = type_codes.tolist() if type_codes is not None else None
+    start = time.perf_counter()
+    scale = float(np.mean(np.abs(values))) ** 2 if len(values) else 0.0
+    best, best_labels = sum(total * total for total in totals), labels.copy()
+    current = best
+    while len(values) > 1 and scale > 0:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        temperature = scale * (deadline - now) / max(deadline - start, 1e-9)
+        picks = rng.integers(0, len(values), size=(ANNEAL_BLOCK, 2)).tolist()
+        groups = rng.integers(0, group_count, size=ANNEAL_BLOCK).tolist()
+        thresholds = (-temperature * np.log(1.0 - rng.random(ANNEAL_BLOCK))).tolist()
+        for (i, j), g, threshold in zip(picks, groups, thresholds):
+            a = label_list[i]
+            # Move i to group g, or (when g is its own group, or types must be kept) swap i and j
+            swap = codes is not None or g == a
+            if swap:
+                b = label_list[j]
+                if a == b or (codes is not None and codes[i] != codes[j]):
+                    continue
+                shift = value_list[i] - value_list[j]
+            else:
+                b, shift = g, value_list[i]
+            delta = 2 * shift * (shift - totals[a] + totals[b])
+            if delta < threshold:
+                totals[a] -= shift
+                totals[b] += shift
+                label_list[i] = b
+                if swap:
+                    label_list[j] = a
+                current += delta
+        if current < best - REFINE_TOLERANCE:
+            best, best_labels = current, np.array(label_list, dtype=np.int32)
+    return best_labels
+
+
+def refine_partition(values, labels, group_count=3, budget=1.0, asset_types=None, anneal=False, seed=0):
+    """Improve the value balance of a partition by local search within ``budget`` seconds.
+
+    Each step moves one value, or swaps two, between a heavy and a light group,
+    picking the value(s) whose shift best halves their gap (see _best_transfer),
+    and the search stops once no step lowers the variance. With ``asset_types``
+    only values of the same type are swapped, so per-type counts are kept. With
+    ``anneal`` up to ANNEAL_SHARE of the budget first goes to simulated annealing,
+    whose temperature falls with the time left, so how far it gets (and so its
+    result for a given ``seed``) depends on the machine.
+    Returns (labels, trajectory, converged): the trajectory is (seconds,
+    variance) after each improvement and converged tells whether the search
+    ran out of steps before the budget.
+    """
+    start = time.perf_counter()
+    deadline = start + budget
+    values = np.asarray(values, dtype=float)
+    labels = np.array(labels, dtype=np.int32)
+    type_codes = None
+    if asset_types is not None:
+        type_codes = np.unique(np.asarray(asset_types, dtype=object).astype(str), return_inverse=True)[1]
+    totals = np.bincount(labels, weights=values, minlength=group_count)
+    trajectory = [(0.0, float(np.var(totals)))]
+
+    if anneal:
+        labels = _anneal(values, labels, totals, type_codes, start + budget * ANNEAL_SHARE,
+                         np.random.default_rng(seed))
+        totals = np.bincount(labels, weights=values, minlength=group_count)
+        trajectory.append((time.perf_counter() - start, float(np.var(totals))))
+
+    converged = False
+    while time.perf_counter() < deadline:
+        step = _improving_step(values, labels, totals, type_codes)
+        if step is None:
+            converged = True
+            break
+        heavy, light, i, j = step
+        labels[i] = light
+        totals[heavy] -= values[i]
+        totals[light] += values[i]
+        if j >= 0:
+            labels[j] = heavy
+            totals[heavy] += values[j]
+            totals[light] -= values[j]
+        trajectory.append((time.perf_counter() - start, float(np.var(totals))))
+    return labels, trajectory, converged
+
+
+def format_trajectory(trajectory, points=TRAJECTORY_POINTS):
+    """A few (seconds, variance) points of a refinement trajectory, first and last included."""
+    if len(trajectory) > points:
+        picks = np.linspace(0, len(trajectory) - 1, points).round().astype(int)
+        trajectory = [trajectory[i] for i in sorted(set(picks.tolist()))]
+    return ', '.join(f"{seconds:.3f}s {variance:,.2f}" for seconds, variance in trajectory)
+
+
+def partition(values, group_count=3, engine=DEFAULT_ENGINE, asset_types=None, weights=None,
+              refine=None, anneal=False, seed=0, locations=None, location_tolerance=None, portfolio_time=None,
+              portfolio_jobs=None):
+    """Divide values into groups with a partition engine; returns (order, labels, running, totals).
+
+    ``asset_types`` and ``weights`` are for the balanced engine, ``locations``
+    and ``location_tolerance`` for the location engine and ``portfolio_time``
+    and ``portfolio_jobs`` for the portfolio (see portfolio.py), which also
+    takes ``seed``. ``refine`` is
+    a time budget in seconds for refine_partition(), whose progress is printed;
+    a balanced partition is refined by same-type swaps only.
+    """
+    if engine == 'greedy':
+        result = assign_groups(values, group_count)
+        if not refine:
+            return result
+        labels = result[1]
+    elif engine == 'balanced':
+        labels = balanced_partition(values, group_count, asset_types, weights)
+    elif engine == 'location':
+        labels = location_partition(values, group_count, locations,
+                                    LOCATION_TOLERANCE if location_tolerance is None else location_tolerance)
+    elif engine == 'portfolio':
+        from portfolio import PORTFOLIO_TIME, run_portfolio
+        labels = run_portfolio(values, group_count, PORTFOLIO_TIME if portfolio_time is None else portfolio_time,
+                               portfolio_jobs, seed)
+    else:
+        labels = PARTITION_ENGINES[engine](values, group_count)
+    if refine:
+        labels, trajectory, converged = refine_partition(values, labels, group_count, refine,
+                                                         asset_types if engine == 'balanced' else None, anneal, seed)
+        print(f"  Refined the {engine} partition in {len(trajectory) - 1} step(s), {trajectory[-1][0]:.3f}s"
+              f"{' (converged)' if converged else ' (time budget used up)'}: "
+              f"variance {trajectory[0][1]:,.2f} -> {trajectory[-1][1]:,.2f}")
+        print(f"  Variance trajectory: {format_trajectory(trajectory)}")
+    return group_running(values, labels, group_count)
+
+
+def asset_key(asset):
+    """Identity of an asset between runs: its type, serial, name and model."""
+    return (asset.get('AssetType'), asset.get('Serial'), asset.get('Name'), asset.get('Model'))
+
+
+def asset_keys(assets):
+    """asset_key() of every asset, numbered when the same key repeats."""
+    seen = {}
+    keys = []
+    for asset in assets:
+        key = asset_key(asset)
+        seen[key] = seen.get(key, -1) + 1
+        keys.append(key + (seen[key],))
+    return keys
+
+
+def load_previous_assignment(path='all_assets_data.json'):
+    """{asset key: (group name, value)} of the groups in an all_assets_data.json file."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    names, assets = [], []
+    for name, group in data['groups'].items():
+        names.extend([name] * len(group['assets']))
+        assets.extend(group['assets'])
+    return {key: (name, asset.get('CurrentValue')) for key, name, asset in zip(asset_keys(assets), names, assets)}
+
+
+def _sorted_members(values, labels, group_count, mask=None):
+    """{group: (indices, values)} of each group's members (those in ``mask``) in ascending value order."""
+    order = np.argsort(values, kind='stable')
+    if mask is not None:
+        order = order[mask[order]]
+    return {g: (members, values[members]) for g in range(group_count)
+            for members in [order[labels[order] == g]]}
+
+
+def _move_member(members, i, value, source, target):
+    """Move member i (worth ``value``) from group ``source`` to ``target`` in _sorted_members() output."""
+    indices, values = members[source]
+    lo, hi = np.searchsorted(values, value, 'left'), np.searchsorted(values, value, 'right')
+    k = lo + int(np.flatnonzero(indices[lo:hi] == i)[0])
+    members[source] = (np.delete(indices, k), np.delete(values, k))
+    # Equal values stay in index order, as a stable sort leaves them
+    indices, values = members[target]
+    lo, hi = np.searchsorted(values, value, 'left'), np.searchsorted(values, value, 'right')
+    k = lo + int(np.searchsorted(indices[lo:hi], i))
+    members[target] = (np.insert(indices, k, i), np.insert(values, k, value))
+
+
+def _rebalance_step(values, totals, members, new_members, limit):
+    """The reassignment that best brings every group within ``limit`` of the mean.
+
+    ``members`` and ``new_members`` hold each group's assets and its new ones
+    in value order (see _sorted_members). The REBALANCE_PAIRS heaviest groups
+    are paired with the lightest; for each pair a move of a new asset (free),
+    a move and a swap are tried, each aiming to bring one of the two to the
+    mean. A step that gets every group within the limit wins, the cheapest
+    first; otherwise the one that cuts the largest deviation most per
+    reassignment. Returns (heavy, light, i, j or -1) or None.
+    """
+    target = totals.mean()
+    deviation = np.abs(totals - target)
+    worst = deviation.max()
+    if worst <= limit:
+        return None
+    by_total = np.argsort(totals, kind='stable')
+    heavies = [g for g in by_total[::-1][:REBALANCE_PAIRS].tolist() if totals[g] > target]
+    lights = [g for g in by_total[:REBALANCE_PAIRS].tolist() if totals[g] < target]
+    best_key, best = None, None
+    for heavy in heavies:
+        source = members[heavy][0]
+        for light in lights:
+            gap = totals[heavy] - totals[light]
+            aim = min(totals[heavy] - target, target - totals[light])
+            # No swap leaves the largest deviation below floor (the swap shifts at
+            # most the spread of the two groups' values), so the swap, which scans
+            # the light group, is skipped when it can't win
+            heavy_values, light_values = members[heavy][1], members[light][1]
+            reach = 0.0
+            if len(heavy_values) and len(light_values):
+                reach = min(max(gap / 2, heavy_values[0] - light_values[-1]), heavy_values[-1] - light_values[0])
+            rest = np.delete(deviation, [heavy, light])
+            floor = max(abs(totals[heavy] - reach - target), abs(totals[light] + reach - target),
+                        rest.max() if len(rest) else 0.0)
+            swap_bound = (0, 2, floor) if floor <= limit else (1, -(worst - floor) / 2, 2)
+            for (candidates, candidate_values), moves, others, cost in ((new_members[heavy], True, source[:0], 0),
+                                                                        (members[heavy], True, source[:0], 1),
+                                                                        (members[heavy], False, members[light][0], 2)):
+                if cost == 2 and best_key is not None and best_key <= swap_bound:
+                    continue
+                step = _best_transfer(values, candidates, others, gap, moves, aim, candidate_values)
+                if step is None:
+                    continue
+                _, i, j = step
+                shift = values[i] - (values[j] if j >= 0 else 0.0)
+                after = deviation.copy()
+                after[heavy] = abs(totals[heavy] - shift - target)
+                after[light] = abs(totals[light] + shift - target)
+                if after.max() <= limit:
+                    key = (0, cost, after.max())
+                elif after.max() < worst:
+                    key = (1, -(worst - after.max()) / max(cost, 0.5), cost)
+                else:
+                    continue
+                if best_key is None or key < best_key:
+                    best_key, best = key, (heavy, light, i, j)
+    return best
+
+
+def incremental_partition(values, keys, previous, group_names, tolerance=REBALANCE_TOLERANCE):
+    """Re-partition after an inventory change, reassigning as few placed assets as possible.
+
+    ``previous`` maps asset keys to their (group name, value) of the last run
+    and ``group_names[g]`` names group g. Assets found there keep their group
+    (unless it no longer exists); the others are placed largest first in the
+    lightest group. While a group is more than ``tolerance`` of the target off,
+    values are moved (or swapped) from the heaviest to the lightest group, new
+    assets first since moving them costs no handover. Returns the labels and a
+    summary: kept, added, revalued and removed counts and the reassignments as
+    (asset index, old group, new group).
+    """
+    values = np.asarray(values, dtype=float)
+    group_index = {name: g for g, name in enumerate(group_names)}
+    group_count = len(group_names)
+    labels = np.full(len(values), -1, dtype=np.int32)
+    revalued = 0
+    for i, key in enumerate(keys):
+        entry = previous.get(key)
+        if entry is not None and entry[0] in group_index:
+            labels[i] = group_index[entry[0]]
+            revalued += entry[1] != values[i]
+    kept = labels >= 0
+    matched = set(keys).intersection(previous)
+    original = labels.copy()
+
+    # New assets, largest first, each to the lightest group
+    totals = np.bincount(labels[kept], weights=values[kept], minlength=group_count)
+    added = np.flatnonzero(~kept)
+    added = added[np.argsort(-values[added], kind='stable')]
+    heap = [(total, g) for g, total in enumerate(totals.tolist())]
+    heapq.heapify(heap)
+    for i, value in zip(added.tolist(), values[added].tolist()):
+        total, g = heap[0]
+        heapq.heapreplace(heap, (total + value, g))
+        labels[i] = g
+    totals = np.bincount(labels, weights=values, minlength=group_count)
+
+    # Rebalance heavy and light groups until all are within tolerance, keeping
+    # each group's members sorted as they move so no step rescans the inventory
+    limit = tolerance * values.sum() / group_count
+    members = _sorted_members(values, labels, group_count)
+    new_members = _sorted_members(values, labels, group_count, ~kept)
+    for _ in range(len(values)):
+        step = _rebalance_step(values, totals, members, new_members, limit)
+        if step is None:
+            break
+        heavy, light, i, j = step
+        for index, source, group in ((i, heavy, light), (j, light, heavy)):
+            if index < 0:
+                continue
+            labels[index] = group
+            totals[source] -= values[index]
+            totals[group] += values[index]
+            _move_member(members, index, values[index], source, group)
+            if not kept[index]:
+                _move_member(new_members, index, values[index], source, group)
+
+    moved = np.flatnonzero(kept & (labels != original))
+    return labels, {
+        'kept': int(kept.sum()), 'added': len(added), 'revalued': int(revalued),
+        'removed': len(previous) - len(matched),
+        'moves': [(i, int(original[i]), int(labels[i])) for i in moved.tolist()],
+    }
+
+
+def partition_variance(totals):
+    """Variance of the group totals."""
+    return float(np.var(totals))
+
+
+def type_counts(labels, asset_types, group_count=3):
+    """{asset type: count in each group} of a partition."""
+    counts = {}
+    for label, asset_type in zip(np.asarray(labels).tolist(), asset_types):
+        counts.setdefault(asset_type, [0] * group_count)[label] += 1
+    return counts
+
+
+def count_skew(counts):
+    """{asset type: most minus fewest of the type in a group} from type_counts()."""
+    return {asset_type: max(per_group) - min(per_group) for asset_type, per_group in counts.items()}
+
+
+def compare_engines(values, group_count=3, engines=None, asset_types=None, weights=None, locations=None):
+    """Group totals, their variance, per-type count skew, location scatter and run time of each engine."""
+    results = {}
+    codes = location_codes(locations)[0] if locations is not None else None
+    for engine in engines or PARTITION_ENGINES:
+        start = time.perf_counter()
+        _, labels, _, totals = partition(values, group_count, engine, asset_types, weights, locations=locations)
+        seconds = time.perf_counter() - start
+        results[engine] = {'totals': totals, 'variance': partition_variance(totals),
+                           'spread': max(totals) - min(totals), 'seconds': seconds}
+        if asset_types is not None:
+            results[engine]['count_skew'] = count_skew(type_counts(labels, asset_types, group_count))
+        if codes is not None:
+            results[engine]['location_scatter'] = location_scatter(codes, labels, group_count)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare partition engines on the inventory.')
+    parser.add_argument('workbooks', nargs='*',
+                        help=f'Excel workbooks or table sources to read (default: {WORKBOOK_PATH!r})')
+    parser.add_argument('--groups', type=parse_group_names, default=GROUP_NAMES, metavar='N|NAMES',
+                        help='number of groups or their comma-separated names (default: A,B,C)')
+    parser.add_argument('--balance', type=parse_balance_weights, default=None, metavar='WEIGHTS',
+                        help='weights of the balanced engine, e.g. value=1,count=0.5,type_value=0 '
+                             f'(default: {",".join(f"{k}={v:g}" for k, v in BALANCE_WEIGHTS.items())})')
+    args = parser.parse_args(argv)
+
+    from batch_valuation import value_assets
+    assets = value_assets(load_assets(args.workbooks or [WORKBOOK_PATH], SHEET_NAMES))
+    values = [asset['CurrentValue'] for asset in assets]
+    asset_types = [asset['AssetType'] for asset in assets]
+    locations = [asset.get('Location') for asset in assets]
+    print(f"\n{len(values)} assets into {len(args.groups)} groups:")
+    for engine, result in compare_engines(values, len(args.groups), asset_types=asset_types, weights=args.balance,
+                                          locations=locations).items():
+        skew = ', '.join(f"{asset_type} {count}" for asset_type, count in result['count_skew'].items())
+        print(f"  {engine:<8} variance {result['variance']:>16,.2f}  spread BDT {result['spread']:>12,.2f}  "
+              f"in {result['seconds']:.3f}s")
+        print(f"           count skew per type: {skew}")
+        print(f"           locations split: {result['location_scatter'][0]}, "
+              f"assets away from their location's main group: {result['location_scatter'][1]}")
+
+
+if __name__ == '__main__':
+    main()
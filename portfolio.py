@@ -0,0 +1,223 @@
+"""Portfolio partitioning: several partition strategies raced across cores.
+
+Which heuristic divides an inventory best depends on its values: differencing
+wins with a few big items, local search with many small ones, and randomized
+restarts sometimes find what both miss. The portfolio runs them all in worker
+processes under one wall-clock deadline:
+    greedy, kk              - the plain engines
+    greedy + refine,
+    kk + refine             - the engine, then local search (refine_partition)
+    anneal #S               - greedy, then simulated annealing and local search, seed S
+    restarts #S             - greedy on values jittered by up to RESTART_NOISE,
+                              then local search, repeated until the deadline, seed S
+Workers share the best variance found so far: each publishes its
+improvements and only results that still hold the best bound send their labels
+back. Values are whole multiples of some amount (a paisa at least), which puts
+a floor under the variance (variance_floor); once a division reaches it the
+strategies still running stop and those not started are skipped, as are
+strategies other than greedy not started by the deadline. An engine that has
+started runs to the end, so kk on a large inventory can overrun the deadline.
+The lowest variance wins, ties going to the strategy listed first.
+
+Every run is appended to PORTFOLIO_LOG (JSON Lines) with the winning strategy
+and each strategy's variance and time, so defaults can be tuned on real data:
+
+    python portfolio.py [workbooks ...] [--time 2] [--jobs N]
+    python portfolio.py --stats
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from partitioning import REFINE_TOLERANCE, karmarkar_karp, partition_variance, refine_partition
+from process_assets import GROUP_NAMES, SHEET_NAMES, WORKBOOK_PATH, assign_groups, load_assets, parse_group_names
+
+# Wall-clock budget of a portfolio run, in seconds
+PORTFOLIO_TIME = 2.0
+
+# Seeds given to each randomized strategy
+PORTFOLIO_SEEDS = 2
+
+# Largest relative jitter of the values a randomized restart divides
+RESTART_NOISE = 0.05
+
+# Where every portfolio run is recorded
+PORTFOLIO_LOG = 'portfolio_runs.jsonl'
+
+# Set in each worker by _start_worker(): (values, group count, shared best variance, variance floor, deadline)
+_WORKER = None
+
+
+def variance_floor(values, group_count=3):
+    """Lowest variance of group totals possible for values rounded to 2 places.
+
+    With every value a multiple of q (their greatest common divisor) and the
+    total T = (k m + r) q, the most even division has r groups at (m + 1) q
+    and the rest at m q, a variance of r (k - r) q^2 / k^2.
+    """
+    cents = np.round(np.abs(np.asarray(values, dtype=float)) * 100).astype(np.int64)
+    step = int(np.gcd.reduce(cents)) if len(cents) else 0
+    if not step:
+        return 0.0
+    remainder = int(cents.sum() // step) % group_count
+    return (step / 100) ** 2 * remainder * (group_count - remainder) / group_count ** 2
+
+
+def at_floor(variance, floor):
+    """Whether a variance is the floor, give or take rounding in the variance itself."""
+    return variance <= floor * (1 + 1e-9) + REFINE_TOLERANCE
+
+
+def portfolio_strategies(seeds=PORTFOLIO_SEEDS, seed=0):
+    """Names of the strategies raced, cheapest first."""
+    return (['greedy', 'kk', 'greedy + refine', 'kk + refine'] +
+            [f'anneal #{seed + s}' for s in range(seeds)] + [f'restarts #{seed + s}' for s in range(seeds)])
+
+
+def _start_worker(values, group_count, best, floor, deadline):
+    global _WORKER
+    _WORKER = (values, group_count, best, floor, deadline)
+
+
+def _publish(best, variance):
+    """Offer a variance as the shared best; whether it is (still) the best."""
+    with best.get_lock():
+        if variance < best.value:
+            best.value = variance
+        return variance <= best.value
+
+
+def _variance(values, labels, group_count):
+    return partition_variance(np.bincount(labels, weights=values, minlength=group_count))
+
+
+def _run_strategy(strategy):
+    """Run one strategy in a worker: {strategy, variance, seconds, labels (None unless still the best)}.
+
+    The variance is None for a skipped strategy.
+    """
+    values, group_count, best, floor, deadline = _WORKER
+    start = time.time()
+    if at_floor(best.value, floor) or (strategy != 'greedy' and start >= deadline):
+        return {'strategy': strategy, 'variance': None, 'seconds': 0.0, 'labels': None}
+    name, _, seed = strategy.partition(' #')
+    if name in ('greedy', 'greedy + refine', 'anneal'):
+        labels = assign_groups(values, group_count)[1]
+    elif name in ('kk', 'kk + refine'):
+        labels = karmarkar_karp(values, group_count)
+    if name in ('greedy + refine', 'kk + refine', 'anneal'):
+        labels = refine_partition(values, labels, group_count, max(deadline - time.time(), 0.0),
+                                  anneal=name == 'anneal', seed=int(seed or 0))[0]
+    if name == 'restarts':
+        rng = np.random.default_rng(int(seed))
+        labels, variance = None, np.inf
+        while labels is None or (time.time() < deadline and not at_floor(best.value, floor)):
+            jittered = values * rng.uniform(1 - RESTART_NOISE, 1 + RESTART_NOISE, len(values))
+            candidate = refine_partition(values, assign_groups(jittered, group_count)[1], group_count,
+                                         max(deadline - time.time(), 0.0))[0]
+            candidate_variance = _variance(values, candidate, group_count)
+            if candidate_variance < variance:
+                labels, variance = candidate, candidate_variance
+                _publish(best, variance)
+    variance = _variance(values, labels, group_count)
+    return {'strategy': strategy, 'variance': variance, 'seconds': time.time() - start,
+            'labels': labels if _publish(best, variance) else None}
+
+
+def portfolio_partition(values, group_count=3, budget=PORTFOLIO_TIME, jobs=None, seed=0):
+    """Group of each value from the best of the portfolio strategies, and each strategy's result.
+
+    Strategies run in ``jobs`` worker processes (default: one per CPU) until
+    ``budget`` seconds have passed. Returns (labels, results) with results
+    in strategy order, the winner's first by variance.
+    """
+    values = np.asarray(values, dtype=float)
+    jobs = jobs or os.cpu_count() or 1
+    strategies = portfolio_strategies(seed=seed)
+    best = multiprocessing.Value('d', np.inf)
+    initargs = (values, group_count, best, variance_floor(values, group_count), time.time() + budget)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_start_worker, initargs=initargs) as executor:
+            results = list(executor.map(_run_strategy, strategies))
+    else:
+        _start_worker(*initargs)
+        results = [_run_strategy(strategy) for strategy in strategies]
+    winner = min((result for result in results if result['labels'] is not None), key=lambda result: result['variance'])
+    return winner['labels'], sorted(results, key=lambda result: result is not winner)
+
+
+def record_run(results, asset_count, group_count, budget, jobs, path=PORTFOLIO_LOG):
+    """Append a portfolio run (the winner first) to the log."""
+    entry = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'assets': asset_count, 'groups': group_count,
+        'budget': budget, 'jobs': jobs, 'winner': results[0]['strategy'],
+        'runs': [{'strategy': result['strategy'], 'variance': result['variance'],
+                  'seconds': round(result['seconds'], 3)} for result in results],
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
+
+def run_portfolio(values, group_count=3, budget=PORTFOLIO_TIME, jobs=None, seed=0, log=PORTFOLIO_LOG):
+    """portfolio_partition() with its results printed and recorded in ``log``; returns the labels."""
+    start = time.perf_counter()
+    jobs = jobs or os.cpu_count() or 1
+    labels, results = portfolio_partition(values, group_count, budget, jobs, seed)
+    finished = [result for result in results[1:] if result['variance'] is not None]
+    skipped = len(results) - 1 - len(finished)
+    notes = ((['the lowest possible'] if at_floor(results[0]['variance'], variance_floor(values, group_count)) else []) +
+             ([f'{skipped} skipped'] if skipped else []))
+    print(f"  Portfolio of {len(results)} strategies on {jobs} worker(s) in {time.perf_counter() - start:.3f}s: "
+          f"{results[0]['strategy']} won with variance {results[0]['variance']:,.2f}"
+          + (f" ({', '.join(notes)})" if notes else ''))
+    for result in sorted(finished, key=lambda result: result['variance'])[:3]:
+        print(f"    then {result['strategy']}: variance {result['variance']:,.2f}")
+    if log:
+        record_run(results, len(values), group_count, budget, jobs, log)
+    return labels
+
+
+def winner_stats(path=PORTFOLIO_LOG):
+    """{strategy: runs won} over a portfolio log, most wins first, and the number of runs."""
+    with open(path, encoding='utf-8') as f:
+        winners = [json.loads(line)['winner'] for line in f if line.strip()]
+    # Seeds don't matter for picking defaults
+    return dict(Counter(winner.split(' #')[0] for winner in winners).most_common()), len(winners)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Race partition strategies and keep the best division.')
+    parser.add_argument('workbooks', nargs='*',
+                        help=f'Excel workbooks or table sources to read (default: {WORKBOOK_PATH!r})')
+    parser.add_argument('--groups', type=parse_group_names, default=GROUP_NAMES, metavar='N|NAMES',
+                        help='number of groups or their comma-separated names (default: A,B,C)')
+    parser.add_argument('--time', type=float, default=PORTFOLIO_TIME,
+                        help=f'seconds the strategies may run (default: {PORTFOLIO_TIME:g})')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=0, help='first seed of the randomized strategies (default: 0)')
+    parser.add_argument('--log', default=PORTFOLIO_LOG, help=f'run log (default: {PORTFOLIO_LOG})')
+    parser.add_argument('--stats', action='store_true', help='print how often each strategy won in the log and exit')
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        wins, runs = winner_stats(args.log)
+        print(f"{runs} portfolio run(s) in {args.log}:")
+        for strategy, count in wins.items():
+            print(f"  {strategy:<16} won {count} ({count / runs:.0%})")
+        return
+
+    from batch_valuation import value_assets
+    assets = value_assets(load_assets(args.workbooks or [WORKBOOK_PATH], SHEET_NAMES))
+    print(f"\n{len(assets)} assets into {len(args.groups)} groups:")
+    run_portfolio([asset['CurrentValue'] for asset in assets], len(args.groups), args.time, args.jobs, args.seed,
+                  args.log)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""The market price catalog: loading, compiling and hot-reloading price_catalog.json.
+
+The catalog file holds, per asset type, the market price of known models
+(``market_prices``) and the fallback rules for everything else
+(``price_rules``), plus a ``version`` to bump on every price update. Fallback
+rules are tried in order and the first match sets the price; the type's
+``default`` applies when none matches. Rule clauses test substrings of the
+stripped, lower-cased Name / Model / Processor:
+    all     - every [field, text] pair must match
+    any     - at least one pair must match
+    none    - no pair may match
+    brand   - the first of the type's "brands" found in the upper-cased name
+    gen_min - the Gen column is at least this value
+Prices are a single number or a [new, reconditioned] pair. "note" entries are
+documentation only. A market price or rule may give the ``"range": [low, high]``
+its new price really varies in, and ``price_uncertainty`` is the relative
+spread assumed for entries without one (see monte_carlo.py).
+
+The file is compiled into hash maps, trigram indexes and bit-mask rule tables
+(see compile_catalog). Compiled catalogs are kept in memory, and optionally
+pickled in a cache directory, under the SHA-256 of the file, so an unchanged or
+reverted file is never compiled twice. ``PriceCatalog.reload()`` picks up edits
+in a long-running process. The catalog in use is selected with
+select_price_catalog() and read with get_price_catalog().
+"""
+import hashlib
+import json
+import os
+import pickle
+
+from catalog_match import NgramIndex, processor_tier
+
+PRICE_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_catalog.json')
+
+# Catalog file format understood by this module
+CATALOG_FORMAT = 1
+
+# Bump when compile_catalog() output changes, to invalidate pickled catalogs
+COMPILER_VERSION = 2
+
+# Fuzzy-match and rule-table results remembered per asset type by a catalog
+PRICE_MEMO_LIMIT = 65536
+
+# Token positions used by compiled price rules
+_PRICE_FIELDS = {'name': 0, 'model': 1, 'processor': 2}
+
+# Compiled catalogs by cache key, so switching back to a file version is free
+_compiled = {}
+
+# The catalog in use and where it comes from. Kept here rather than in
+# process_assets, which also runs as __main__ and would then exist twice.
+_active = {'catalog': None, 'path': PRICE_CATALOG_PATH, 'cache_dir': None}
+
+
+def _price_pair(price):
+    """(new, reconditioned) price of a catalog price."""
+    if isinstance(price, (list, tuple)):
+        return tuple(price)
+    return (price, price)
+
+
+def _compile_price_rules(rules):
+    """Compile rule entries into bit masks over the substrings they test.
+
+    Returns ``(needles, compiled)``: needles are ``(bit, token index, text)`` and
+    each compiled rule is ``(brand, all mask, any mask, none mask, gen_min,
+    (new, recond) price, rule index)``, so a rule is checked with a few integer
+    operations once the asset's needle mask is known.
+    """
+    bits = {}
+
+    def mask(pairs):
+        value = 0
+        for field, text in pairs:
+            value |= bits.setdefault((_PRICE_FIELDS[field], text), 1 << len(bits))
+        return value
+
+    compiled = []
+    for i, rule in enumerate(rules):
+        compiled.append((rule.get('brand'), mask(rule.get('all', ())), mask(rule.get('any', ())),
+                         mask(rule.get('none', ())), rule.get('gen_min'), _price_pair(rule['price']), i))
+    needles = tuple((bit, field, text) for (field, text), bit in bits.items())
+    return needles, compiled
+
+
+def _without_notes(entry):
+    return {key: value for key, value in entry.items() if not key.endswith('note')}
+
+
+def compile_catalog(data):
+    """Compile parsed catalog data into lookup tables, one tuple per asset type.
+
+    Exact keys go into hash maps, the keys of each type into a trigram index for
+    fuzzy matching and the rules into per-brand bit-mask tables. Each rule keeps
+    a canonical form so catalog versions can be compared entry by entry.
+    """
+    fuzzy_threshold = data.get('fuzzy_match_threshold')
+    default_price = data['default_price']
+    tables = {}
+    for asset_type, entries in data['market_prices'].items():
+        prices = {key: entry['price'] if isinstance(entry, dict) else entry for key, entry in entries.items()}
+        spec = data['price_rules'].get(asset_type, {'rules': [], 'default': default_price})
+        brands = spec.get('brands', [])
+        needles, rules = _compile_price_rules(spec['rules'])
+        # Rule table per brand (None: the name matches no brand)
+        by_brand = {brand: tuple(rule[1:] for rule in rules if rule[0] in (None, brand))
+                    for brand in brands + [None]}
+        rule_ids = [json.dumps(_without_notes(rule), sort_keys=True) for rule in spec['rules']]
+        matcher = NgramIndex(prices) if fuzzy_threshold is not None and prices else None
+        # Processor tier of each key, from the key or else its note, for checking fuzzy matches
+        tiers = {key: processor_tier(key) or processor_tier(entry.get('note', '') if isinstance(entry, dict) else '')
+                 for key, entry in entries.items()}
+        tables[asset_type] = (prices, brands, needles, by_brand, rule_ids, _price_pair(spec['default']), matcher, tiers)
+    return tables
+
+
+class PriceCatalog:
+    """A compiled price catalog; ``price(asset)`` gives an asset's market price.
+
+    Exact keys are looked up first (model, then name, then "name model"). Next
+    the closest key by character trigrams (see catalog_match.py) is used if its
+    similarity reaches the catalog's fuzzy_match_threshold and the processor
+    tiers of the asset and the key (or its note) don't differ. Otherwise the
+    asset's name, model and processor are normalized once, every substring the
+    type's rules test is checked in a single pass, and the rule table is scanned
+    with bit masks. The result is remembered per distinct name, model,
+    processor and generation, so repeated models skip the fuzzy match and the
+    rule table.
+    """
+
+    def __init__(self, data, digest=None, path=None, tables=None, stat=None):
+        if data.get('format', CATALOG_FORMAT) != CATALOG_FORMAT:
+            raise ValueError(f"Unsupported price catalog format {data.get('format')!r} in {path}")
+        self.data = data
+        self.digest = digest
+        self.path = path
+        self.stat = stat
+        self.version = data.get('version')
+        self.default_price = data['default_price']
+        self.fuzzy_threshold = data.get('fuzzy_match_threshold')
+        self.tables = tables if tables is not None else compile_catalog(data)
+        self._resolved = {asset_type: {} for asset_type in self.tables}
+
+    @property
+    def market_prices(self):
+        """{asset type: {catalog key: price}}"""
+        return {asset_type: table[0] for asset_type, table in self.tables.items()}
+
+    @property
+    def price_rules(self):
+        return self.data['price_rules']
+
+    def __len__(self):
+        return sum(len(table[0]) for table in self.tables.values())
+
+    def _resolve(self, asset_type, name, model, processor, gen):
+        """((new, recond) price, entry) for an asset without an exact key."""
+        prices, brands, needles, by_brand, rule_ids, default, matcher, tiers = self.tables[asset_type]
+        if matcher is not None:
+            best_key, best_score = None, 0.0
+            for query in (model, name, f"{name} {model}".strip()):
+                key, score = matcher.match(query, self.fuzzy_threshold)
+                if key is not None and score > best_score:
+                    best_key, best_score = key, score
+            # The same model with another processor tier is priced by the rules instead
+            tier = processor_tier(processor)
+            if best_key is not None and not (tier and tiers[best_key] and tier != tiers[best_key]):
+                return _price_pair(prices[best_key]), ('key', best_key)
+
+        tokens = (name.lower(), model.lower(), processor.strip().lower())
+        found = 0
+        for bit, field, text in needles:
+            if text in tokens[field]:
+                found |= bit
+        name_upper = name.upper()
+        brand = next((candidate for candidate in brands if candidate in name_upper), None)
+        for all_mask, any_mask, none_mask, gen_min, rule_price, i in by_brand[brand]:
+            if (found & all_mask == all_mask and (not any_mask or found & any_mask)
+                    and not found & none_mask and (gen_min is None or gen >= gen_min)):
+                return rule_price, ('rule', rule_ids[i])
+        return default, ('default',)
+
+    def lookup(self, asset):
+        """Return ((new, recond) price, matched entry) for an asset.
+
+        The entry is ('key', catalog key), ('rule', canonical rule) or
+        ('default',), so equal lookups under two catalog versions mean the
+        asset's price can't have changed.
+        """
+        asset_type = asset['AssetType']
+        if asset_type not in self.tables:
+            return (self.default_price, self.default_price), ('default',)
+        prices = self.tables[asset_type][0]
+        name = asset.get('Name', '').strip()
+        model = asset.get('Model', '').strip()
+
+        # Exact catalog keys first
+        for key in (model, name, f"{name} {model}".strip()):
+            if key in prices:
+                return _price_pair(prices[key]), ('key', key)
+
+        # Fuzzy match and rule table, evaluated once per distinct name/model/processor/generation
+        resolved = self._resolved[asset_type]
+        processor = asset.get('Processor', '')
+        gen = asset.get('Gen', 0)
+        memo_key = (name, model, processor, gen)
+        result = resolved.get(memo_key)
+        if result is None:
+            if len(resolved) >= PRICE_MEMO_LIMIT:
+                resolved.clear()
+            result = resolved[memo_key] = self._resolve(asset_type, name, model, processor, gen)
+        return result
+
+    def price(self, asset):
+        """Market price of an asset."""
+        table = self.tables.get(asset['AssetType'])
+        if table is None:
+            return self.default_price
+        prices = table[0]
+        name = asset.get('Name', '').strip()
+        model = asset.get('Model', '').strip()
+        if model in prices:
+            return prices[model]
+        if name in prices:
+            return prices[name]
+        combined = f"{name} {model}".strip()
+        if combined in prices:
+            return prices[combined]
+        return self.lookup(asset)[0][asset.get('PurchaseType') == 'reconditioned']
+
+    def changed_types(self, other):
+        """Asset types priced differently by another catalog, or None if possibly all."""
+        if (other.default_price != self.default_price or other.fuzzy_threshold != self.fuzzy_threshold
+                or set(other.tables) != set(self.tables)):
+            return None
+
+        def spec(catalog, asset_type):
+            rules = catalog.data['price_rules'].get(asset_type)
+            # Notes count through the processor tiers they give keys
+            return (catalog.tables[asset_type][0], catalog.tables[asset_type][7],
+                    rules and dict(_without_notes(rules), rules=[_without_notes(rule) for rule in rules['rules']]))
+
+        return {asset_type for asset_type in self.tables if spec(self, asset_type) != spec(other, asset_type)}
+
+    def reload(self, cache_dir=None):
+        """Return the catalog as now on disk: self if the file is unchanged."""
+        if self.path is None:
+            return self
+        stat = os.stat(self.path)
+        if self.stat is not None and (stat.st_mtime_ns, stat.st_size) == self.stat:
+            return self
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        if _cache_key(raw) == self.digest:
+            self.stat = (stat.st_mtime_ns, stat.st_size)
+            return self
+        return load_price_catalog(self.path, cache_dir, raw=raw)
+
+
+def _cache_key(raw):
+    return hashlib.sha256(f'v{COMPILER_VERSION}\0'.encode() + raw).hexdigest()
+
+
+def load_price_catalog(path=PRICE_CATALOG_PATH, cache_dir=None, raw=None):
+    """Load and compile a catalog file, reusing a compiled copy of the same contents.
+
+    With ``cache_dir`` compiled catalogs are also pickled there, for other processes.
+    """
+    stat = os.stat(path)
+    if raw is None:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    digest = _cache_key(raw)
+    data = json.loads(raw)
+
+    tables = _compiled.get(digest)
+    pickle_path = os.path.join(cache_dir, f'price-catalog-{digest}.pickle') if cache_dir else None
+    if tables is None and pickle_path:
+        try:
+            with open(pickle_path, 'rb') as f:
+                tables = pickle.load(f)
+            os.utime(pickle_path)  # Mark as recently used
+        except (OSError, EOFError, pickle.UnpicklingError):
+            tables = None
+    catalog = PriceCatalog(data, digest, path, tables, (stat.st_mtime_ns, stat.st_size))
+    if tables is None and pickle_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{pickle_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(catalog.tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pickle_path)
+    _compiled[digest] = catalog.tables
+    return catalog
+
+
+def select_price_catalog(path=None, cache_dir=None):
+    """Select the catalog file (and the directory for compiled copies) used from now on."""
+    _active.update(catalog=None, path=path or PRICE_CATALOG_PATH, cache_dir=cache_dir)
+
+
+def get_price_catalog():
+    """The catalog in use, loading it if necessary."""
+    if _active['catalog'] is None:
+        _active['catalog'] = load_price_catalog(_active['path'], _active['cache_dir'])
+    return _active['catalog']
+
+
+def reload_active_catalog():
+    """Pick up edits to the catalog in use: (old, new), new being old if the file is unchanged."""
+    old = get_price_catalog()
+    _active['catalog'] = old.reload(_active['cache_dir'])
+    return old, _active['catalog']
+
+
+def compile_price_index(market_prices, price_rules, default_price=50000, fuzzy_threshold=None):
+    """Build a PriceCatalog straight from dicts, e.g. for a what-if price list."""
+    return PriceCatalog({'market_prices': market_prices, 'price_rules': price_rules,
+                         'default_price': default_price, 'fuzzy_match_threshold': fuzzy_threshold})
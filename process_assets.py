@@ -1,704 +1,957 @@
+import numpy as np
 import pandas as pd
+import openpyxl
+import argparse
+import heapq
 import json
+import os
+import re
+import time
 from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-# Market Prices (Current New Market Price in BDT as of Jan 2026)
-# Based on web research for Bangladesh market
-MARKET_PRICES = {
-    # === LAPTOPS ===
+import valuation_cache
+from keyword_match import KeywordMatcher
+from price_catalog import get_price_catalog, reload_active_catalog, select_price_catalog
+
+# Market prices and fallback pricing rules live in price_catalog.json (see
+# price_catalog.py). The catalog is loaded and compiled on first use, and the
+# one in use is held by price_catalog.py, so every module values with it.
+
+def use_price_catalog(path=None, cache_dir=None):
+    """Select the catalog file (and the directory for compiled copies) used from now on."""
+    select_price_catalog(path, cache_dir)
+    if valuation_cache.VALUATION_CACHE is not None:
+        valuation_cache.VALUATION_CACHE.clear()
+
+def reload_price_catalog(assets=()):
+    """Pick up edits to the catalog file and revalue the assets they affect.
+    
+    Returns None if the file is unchanged. Otherwise returns the assets that were
+    revalued: those whose matched catalog entry (exact or fuzzy key, rule or
+    default) or price differs under the new catalog.
+    """
+    old, new = reload_active_catalog()
+    if new is old:
+        return None
+    changed_types = old.changed_types(new)
+    if valuation_cache.VALUATION_CACHE is not None:
+        valuation_cache.VALUATION_CACHE.clear()
+    
+    revalued = []
+    for asset in assets:
+        if changed_types is not None and asset['AssetType'] not in changed_types:
+            continue
+        if old.lookup(asset) != new.lookup(asset):
+            value_asset(asset)
+            revalued.append(asset)
+    return revalued
+
+def __getattr__(name):
+    # MARKET_PRICES / PRICE_RULES of the current catalog, for code that reads them directly
+    if name == 'MARKET_PRICES':
+        return get_price_catalog().market_prices
+    if name == 'PRICE_RULES':
+        return get_price_catalog().price_rules
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_market_price(asset):
+    """Get market price for an asset based on name, model, and type."""
+    return get_price_catalog().price(asset)
+
+# PC serials valued at 10% of market price regardless of remarks
+PC_SPECIAL_SERIALS = [11, 13, 14, 15]
+
+# Condition keywords looked for in the remarks, in this order; remarks with none
+# of them get the last condition
+REMARK_KEYWORDS = [('excellent',), ('good',), ('moderate', 'fair')]
+# Laptops mentioning one of these in any text field count as reconditioned
+RECONDITION_KEYWORDS = ('recondition',)
+
+# Every keyword above, compiled into one matcher that runs once per record at
+# ingestion (see keyword_flags); add keywords to the lists to recognize them
+KEYWORDS = KeywordMatcher([keyword for keywords in REMARK_KEYWORDS for keyword in keywords]
+                          + list(RECONDITION_KEYWORDS))
+CONDITION_MASKS = [KEYWORDS.mask(keywords) for keywords in REMARK_KEYWORDS]
+RECONDITION_MASK = KEYWORDS.mask(RECONDITION_KEYWORDS)
+
+# (value multiplier, DepreciationRate, RemarkCategory) per remark condition
+NORMAL_DEPRECIATION = [
+    (0.70, '30%', 'Excellent'),
+    (0.60, '40%', 'Good'),
+    (0.50, '50%', 'Moderate'),
+    (0.70, '30%', 'Excellent'),  # No condition keyword
+]
+RECONDITIONED_DEPRECIATION = [
+    (0.40, '60%', 'Excellent'),
+    (0.30, '70%', 'Good'),
+    (0.20, '80%', 'Moderate'),
+    (0.30, '70%', 'Good'),  # No condition keyword
+]
+# HP Server ProLiant DL380 (PC sheet): 40% reduction whatever the remarks
+PROLIANT_DEPRECIATION = (0.60, '40%', 'Special (40% reduction)')
+# PC_SPECIAL_SERIALS: 90% reduction; the category still follows the remarks
+SPECIAL_SERIAL_DEPRECIATION = (0.10, '90%')
+
+def keyword_flags(asset):
+    """(KEYWORDS mask of the Remarks, KEYWORDS mask of all text fields) of an asset.
+    
+    Ingestion stores these as the private ``_keywords`` field, so valuation
+    doesn't scan text again; records from elsewhere are scanned here.
+    """
+    flags = asset.get('_keywords')
+    if flags is None:
+        found = 0
+        for value in asset.values():
+            if isinstance(value, str):
+                found |= KEYWORDS.scan(value)
+        flags = (KEYWORDS.scan(asset.get('Remarks', '')), found)
+    return flags
+
+def public_fields(asset):
+    """An asset record without its private (underscore) fields, for output files."""
+    return {key: value for key, value in asset.items() if not key.startswith('_')}
+
+def condition_of(remark_mask):
+    """Index of the first REMARK_KEYWORDS condition in a remarks keyword mask."""
+    for i, mask in enumerate(CONDITION_MASKS):
+        if remark_mask & mask:
+            return i
+    return len(CONDITION_MASKS)
+
+def remark_condition(remarks):
+    """Index of the first REMARK_KEYWORDS condition found in the remarks."""
+    return condition_of(KEYWORDS.scan(remarks))
+
+def is_reconditioned_laptop(asset, flags=None):
+    """Laptops bought reconditioned or with a RECONDITION_KEYWORDS word in any text field."""
+    if asset.get('AssetType') != 'Laptop':
+        return False
+    if asset.get('PurchaseType') == 'reconditioned':
+        return True
+    return bool((flags or keyword_flags(asset))[1] & RECONDITION_MASK)
+
+def classify_depreciation(asset):
+    """Return (value multiplier, DepreciationRate, RemarkCategory) for an asset.
+    
+    The one place depreciation is decided, so the labels always describe the
+    multiplier. batch_valuation.classify_frame() is the columnar version.
+    """
+    flags = keyword_flags(asset)
+    condition = condition_of(flags[0])
+    if asset.get('AssetType') == 'PC':
+        model = asset.get('Model', '').lower()
+        if 'proliant' in model and 'dl380' in model:
+            return PROLIANT_DEPRECIATION
+        if asset.get('Serial') in PC_SPECIAL_SERIALS:
+            return SPECIAL_SERIAL_DEPRECIATION + (NORMAL_DEPRECIATION[condition][2],)
+    if is_reconditioned_laptop(asset, flags):
+        return RECONDITIONED_DEPRECIATION[condition]
+    return NORMAL_DEPRECIATION[condition]
+
+def calculate_asset_value(asset, market_price=None):
+    """Calculate current value based on market price and remarks-based depreciation."""
+    # Get market price, unless the caller already looked it up
+    if market_price is None:
+        market_price = get_market_price(asset)
+    return round(market_price * classify_depreciation(asset)[0], 2)
+
+# Default input workbook and the sheets read from it
+WORKBOOK_PATH = 'GTL IT Equipment Information 22 Jan 2026.xlsx'
+SHEET_NAMES = ['Laptop', 'PC', 'Monitor', 'Printer Scaneer', 'Server Room']
+
+# Version of the sheet parser's output format. Bump it whenever read_excel_data
+# starts producing different records for the same sheet from code changes, so
+# cached parses (see ingest_cache.py) are not reused; data it reads is covered
+# by parser_signature().
+PARSER_VERSION = 2
+
+# Column schema per sheet. Each field is (output key, accepted header names, type,
+# optional). The type is 'str', 'int' or 'date' (kept as YYYY-MM-DD text). A
+# missing optional column is noted, unless optional is 'quiet' (columns the
+# sheets don't have yet). Headers are matched case-insensitively after stripping
+# whitespace and the leftmost matching column wins, so reordered or extra columns
+# need no code change. Fields are emitted in the order listed here.
+SHEET_SCHEMAS = {
     'Laptop': {
-        # New Laptops (i7)
-        'DELL Inspiron 13 5310': 115000,  # i7 11th gen
-        'Dell P106F': 110000,  # i7 11th gen
-        'HP Probook 440 G4': 95000,  # i7 7th gen (older)
-        
-        # New Laptops (i5)
-        'HP 15s-fq5317TU': 72500,  # i5 12th gen (updated price)
-        'HP Probook 440 G8': 85000,  # i5 11th gen
-        'Dell Inspiron 3511': 75000,  # i5 11th gen
-        'Dell Inspiron 5410': 78000,  # i5 11th gen
-        'Dell Inspiron 3493': 65000,  # i5 10th gen
-        'HP 15s-fq2643TU': 70000,  # i5 11th gen
-        'HP RTL8822CE': 72500,  # i5 12th gen (same model family)
-        
-        # New Laptops (i3)
-        'LENOVO V14-G2-ITL': 48000,  # i3 11th gen
-        
-        # Reconditioned Laptops (i7)
-        'HP 440-G4 recond': 60000,  # i7 7th gen used
-        
-        # Reconditioned Laptops (i5)
-        'HP Elitbook 840 G3': 48000,  # i5 6th gen used (premium model)
-        'HP 830 G5': 55000,  # i5 8th gen used
-        'HP Elitbook': 45000,  # i5 generic elitebook used
-        'HP HSN-112C': 50000,  # i5 8th gen used
-        'Lenovo X230': 28000,  # i5 3rd gen very old but durable
-        'HP Laptop generic': 45000,  # generic HP i5 used
-        
-        # Reconditioned Laptops (i3)
-        'DELL Latitute 3350': 35000,  # i3 5th gen used
-        'DELL inspiron 3542': 32000,  # i3 4th gen used
-        'HP 440-G2': 30000,  # i3 5th gen used
-        'ASUS generic': 28000,  # i3 generic ASUS used
+        'section_column': 'Category',  # Holds the "New Purchase" / "Recondition" section headers
+        'purchase_type': 'new',  # Purchase type until a section header says otherwise
+        'purchase_type_column': ['PurchaseType', 'Purchase Type'],  # Per-row override (exported tables)
+        'fields': [
+            ('Serial', ['Serial', 'S/L'], 'int', False),
+            ('Name', ['Name'], 'str', False),
+            ('Model', ['Model'], 'str', True),
+            ('RAM', ['RAM'], 'int', True),
+            ('Processor', ['Processor'], 'str', True),
+            ('Storage', ['SSD/HDD', 'Storage'], 'str', True),
+            ('Gen', ['Gen'], 'int', True),
+            ('GPU', ['GPU'], 'str', True),
+            ('User', ['User'], 'str', True),
+            ('Location', ['Location'], 'str', True),
+            ('Level', ['Level', 'Value Ratio'], 'str', True),
+            ('Status', ['Status'], 'str', True),
+            ('PurchaseDate', ['Purchase Date', 'PurchaseDate'], 'date', 'quiet'),
+            ('Remarks', ['Remarks'], 'str', True),
+        ],
     },
-    
-    # === DESKTOP PCs ===
     'PC': {
-        'HP ProLiant DL380 Gen10 Plus': 650000,  # Server (midrange spec)
-        'Desktop i9 Gen 13': 280000,  # High-end gaming/workstation
-        'Desktop i9 Gen 11': 220000,  # Slightly older i9
-        'Desktop i5 Gen 10': 85000,  # Mid-range desktop
-        'Desktop i3 Gen 10': 55000,  # Entry desktop
-        'Desktop i3 Gen 4': 35000,  # Very old desktop
-        'HP ProDesk': 75000,  # i5 business desktop
-        'Dell Optiplex 3020': 45000,  # i3 older business desktop
+        'fields': [
+            ('Serial', ['Serial', 'S/L'], 'int', False),
+            ('Name', ['Name'], 'str', False),
+            ('Model', ['Model'], 'str', True),
+            ('RAM', ['RAM'], 'int', True),
+            ('Processor', ['Processor'], 'str', True),
+            ('Storage', ['SSD/HDD', 'Storage'], 'str', True),
+            ('Gen', ['Gen'], 'int', True),
+            ('GPU', ['GPU'], 'str', True),
+            ('User', ['User'], 'str', True),
+            ('Location', ['Location'], 'str', True),
+            ('Level', ['Level', 'Value Ratio'], 'str', True),
+            ('Status', ['Status'], 'str', True),
+            ('PurchaseDate', ['Purchase Date', 'PurchaseDate'], 'date', 'quiet'),
+            ('Remarks', ['Remarks'], 'str', True),
+        ],
     },
-    
-    # === MONITORS ===
     'Monitor': {
-        'HP M22f': 15500,  # 22" FHD IPS
-        'ASUS VP229HE': 15500,  # 21.5" FHD
-        'Dell 52240Lc': 12000,  # Older Dell model
-        'Dell D1918Ho': 10000,  # 19" basic
-        'Dell E170SC': 6000,  # Very old 17" model
-        'Dell E1916HVF': 10000,  # 19" basic
-        'Dell G2QR5D2': 11000,  # Standard Dell
-        'HP LV1911': 9000,  # 18.5" basic
-        'SAMSUNG S19C300B': 9500,  # 19" Samsung
+        'fields': [
+            ('Serial', ['Serial', 'S/L'], 'int', False),
+            ('Name', ['Name'], 'str', False),
+            ('Model', ['Model'], 'str', True),
+            ('User', ['User'], 'str', True),
+            ('Location', ['Location'], 'str', True),
+            ('Level', ['Level', 'Value Ratio'], 'str', True),
+            ('Status', ['Status'], 'str', True),
+            ('PurchaseDate', ['Purchase Date', 'PurchaseDate'], 'date', 'quiet'),
+            ('Remarks', ['Remarks'], 'str', True),
+        ],
     },
-    
-    # === PRINTERS & SCANNERS ===
     'Printer Scaneer': {
-        'EPSON A3 C722B1': 80000,  # A3 color (L8180 equivalent)
-        'EPSON L3250': 21000,  # A4 color inkjet multifunction
-        'HP M26nw': 32000,  # Laser MFP
-        'HP M404dw': 42000,  # Laser printer with duplex/wifi
-        'HP M402dn': 22000,  # Laser printer with duplex/network
-        'PANTUM P3010DW': 14000,  # Budget laser duplex wifi
-        'Canon F166500': 16000,  # Canon multifunction
-        'Canon F166400': 15000,  # Canon multifunction
-        'HP Laser 107w': 11000,  # Basic laser wifi
-        'SAMSUNG M2820ND': 18000,  # Laser network duplex
-        'EPSON J371A scanner': 12000,  # Dedicated scanner
-        'Canon EUROPA scanner': 10000,  # Scanner
+        'fields': [
+            ('Serial', ['Serial', 'S/L'], 'int', False),
+            ('Name', ['Device Name', 'Name'], 'str', False),
+            ('Model', ['Model'], 'str', True),
+            ('Function', ['Function'], 'str', True),
+            ('Location', ['Location'], 'str', True),
+            ('Level', ['Level', 'Value Ratio'], 'str', True),
+            ('Status', ['Status'], 'str', True),
+            ('PurchaseDate', ['Purchase Date', 'PurchaseDate'], 'date', 'quiet'),
+            ('Remarks', ['Remarks'], 'str', True),
+        ],
     },
-    
-    # === SERVER ROOM / NETWORKING ===
     'Server Room': {
-        'MikroTik RB2011UiAS-RM': 13000,  # Router
-        'MikroTik CCR2004-16G-2S+': 85000,  # High-end switch
-        'TP-Link TL-SG1024D': 7500,  # 24-port gigabit switch
-        'Cisco CBS350-24T-4G': 33000,  # Managed 24-port switch
-        'TP-Link T1500G-10PS': 18000,  # 8-port PoE switch
-        'KVM Switch 8-port': 8000,  # KVM switch
-        'Hikvision DS-720BHGH1-F2': 12000,  # 8-ch DVR
-        'Hikvision DS-7216HQH1-K2': 23000,  # 16-ch DVR
-        'Patch Panel 24-port': 3500,  # Patch panel
-        'Cable Manager': 2000,  # Cable management
-        'PBAX KX-Tes824BX': 25000,  # PABX controller
-        'ACS Soyal AR-727CM-V3': 15000,  # Access control converter
-        'UPS APC/SRCE6KUX1': 115000,  # UPS APC model specific
-        'UPS Battery 16 PCS': 160000,  # UPS Battery 16 PCS
-        'UPS generic': 160000,  # UPS system generic
-        'Switch generic': 10000,  # Generic switch
-    }
+        'fields': [
+            ('Serial', ['Serial', 'S/L'], 'int', False),  # The leftmost "S/L" column, not the device serial
+            ('Name', ['Device Name', 'Name'], 'str', False),
+            ('Model', ['Model'], 'str', True),
+            ('Status', ['Status'], 'str', True),
+            ('PurchaseDate', ['Purchase Date', 'PurchaseDate'], 'date', 'quiet'),
+            ('Remarks', ['Remarks'], 'str', True),
+        ],
+    },
 }
 
-def get_market_price(asset):
-    """Get market price for an asset based on name, model, and type."""
-    asset_type = asset['AssetType']
-    name = asset.get('Name', '').strip()
-    model = asset.get('Model', '').strip()
-    processor = asset.get('Processor', '').strip().lower()
+# Used for sheets that have no entry in SHEET_SCHEMAS
+DEFAULT_SHEET_SCHEMA = {
+    'fields': [
+        ('Serial', ['Serial', 'S/L'], 'int', False),
+        ('Name', ['Name', 'Device Name'], 'str', False),
+        ('Model', ['Model'], 'str', True),
+        ('PurchaseDate', ['Purchase Date', 'PurchaseDate'], 'date', 'quiet'),
+    ],
+}
+
+def parser_signature(sheet_name):
+    """Everything besides its cells that the parsed records of a sheet depend on.
     
-    if asset_type not in MARKET_PRICES:
-        return 50000  # Default fallback
+    Cached parses (see ingest_cache.py) are keyed on it, so a change to the
+    schema, the keyword list or the missing-cell strings re-parses the sheet.
+    """
+    return repr((PARSER_VERSION, sheet_name, SHEET_SCHEMAS.get(sheet_name, DEFAULT_SHEET_SCHEMA),
+                 KEYWORDS.keywords, sorted(NA_STRINGS)))
+
+# Rows scanned per vectorized block while looking for the header row
+HEADER_SCAN_BLOCK = 64
+
+# Data rows parsed per block in streaming mode
+STREAM_CHUNK_ROWS = 5000
+
+# Assets handled per block by the greedy group assignment
+ASSIGN_BLOCK = 65536
+
+# Groups the assets are divided into, and how many there may be
+GROUP_NAMES = ['A', 'B', 'C']
+MIN_GROUPS = 2
+MAX_GROUPS = 50
+
+# Weights of the balanced partition engine: total value, count of each asset
+# type and value of each asset type, each as a share of its per-group target
+BALANCE_WEIGHTS = {'value': 1.0, 'count': 0.1, 'type_value': 0.0}
+
+# Header colors of groups in the HTML report; the report's own CSS covers A, B and C
+GROUP_COLORS = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', '#e67e22', '#34495e']
+
+# Strings pd.read_excel treats as missing by default; the workbook loader applies
+# the same rule so both ingestion paths see identical cells
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null',
+}
+
+def _convert_cell(value):
+    """Normalize a raw openpyxl cell value the way pd.read_excel does."""
+    if isinstance(value, str) and value in NA_STRINGS:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _sheet_rows(worksheet):
+    """Yield the converted cell values of a read-only worksheet, row by row."""
+    worksheet.reset_dimensions()  # Don't trust the stored sheet dimensions
+    for row in worksheet.iter_rows(values_only=True):
+        yield [_convert_cell(value) for value in row]
+
+def iter_workbook_sheets(file_path, sheet_names):
+    """Open the workbook once (read-only) and yield (sheet_name, rows) for each sheet."""
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet_name in sheet_names:
+            if sheet_name not in workbook.sheetnames:
+                print(f"  Warning: Sheet {sheet_name} not found in {file_path}")
+                yield sheet_name, []
+                continue
+            
+            rows = list(_sheet_rows(workbook[sheet_name]))
+            
+            # Drop trailing empty rows and pad the rest to a common width
+            while rows and all(value is None for value in rows[-1]):
+                rows.pop()
+            width = max((len(row) for row in rows), default=0)
+            for row in rows:
+                row.extend([None] * (width - len(row)))
+            
+            yield sheet_name, rows
+    finally:
+        workbook.close()
+
+def _to_int(value):
+    """int() that returns None instead of raising, for whole-column coercion."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+_to_int_array = np.frompyfunc(_to_int, 1, 1)
+
+def _int_column(column):
+    """Coerce a column to Python ints; missing or non-integer cells become None."""
+    values = np.full(len(column), None, dtype=object)
+    present = column.notna().to_numpy()
+    values[present] = _to_int_array(column.to_numpy(dtype=object)[present])
+    return values
+
+def _str_column(column):
+    """Convert a column to stripped strings; missing cells become None."""
+    values = np.full(len(column), None, dtype=object)
+    present = column.notna().to_numpy()
+    values[present] = column[present].astype(str).str.strip().to_numpy(dtype=object)
+    return values
+
+def keyword_masks(values):
+    """KEYWORDS.scan() of each value (0 for non-text), scanning each distinct text once."""
+    codes, uniques = pd.factorize(values)
+    masks = np.array([KEYWORDS.scan(value) if isinstance(value, str) else 0 for value in uniques.tolist()] + [0],
+                     dtype=object)
+    return masks[codes]
+
+def _date_column(column):
+    """Convert a column to ISO dates (YYYY-MM-DD); missing or unreadable cells become None."""
+    values = np.full(len(column), None, dtype=object)
+    present = column.notna().to_numpy()
+    text = column[present].astype(str).str.strip()
+    dates = pd.to_datetime(text, format='ISO8601', errors='coerce')
+    other = dates.isna()
+    if other.any():
+        # Written-out dates as used in the sheets, e.g. "22 Jan 2026" or "22/01/2026"
+        dates[other] = pd.to_datetime(text[other], format='mixed', dayfirst=True, errors='coerce')
+    iso = dates.dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    iso[dates.isna().to_numpy()] = None
+    values[present] = iso
+    return values
+
+# Cell conversion per schema field type
+_COLUMN_CONVERTERS = {'str': _str_column, 'int': _int_column, 'date': _date_column}
+
+def _extract_assets(data, sheet_name, serial_col, field_cols, section_col=None, purchase_type=None,
+                    purchase_type_col=None):
+    """Build asset records from the data rows of a sheet, one column at a time.
     
-    prices = MARKET_PRICES[asset_type]
+    ``field_cols`` lists ``(field, column index, 'str' | 'int' | 'date')`` in output order;
+    columns beyond the sheet width are skipped just like missing cells. When
+    ``purchase_type`` is set every record gets a PurchaseType, switched by the
+    section headers found in ``section_col``. A non-empty cell in
+    ``purchase_type_col`` sets the PurchaseType of its own row.
     
-    # Try exact model match first
-    if model in prices:
-        return prices[model]
+    Returns the records and the purchase type in effect after the last row.
+    """
+    data = data.reset_index(drop=True)
+    keep = np.ones(len(data), dtype=bool)
+    purchase_types = None
     
-    # Try name match
-    if name in prices:
-        return prices[name]
+    # Section headers ("New Purchase ..." / "Recondition ...") switch the purchase
+    # type for every row below them and are not assets themselves
+    sections = section_col is not None and section_col < data.shape[1]
+    if sections:
+        first_col = data.iloc[:, section_col]
+        first_col = first_col.where(first_col.notna(), '').astype(str).str.lower()
+        recond_marker = (first_col.str.contains('recondition', regex=False)
+                         | first_col.str.contains('used', regex=False)).to_numpy()
+        new_marker = first_col.str.contains('new purchase', regex=False).to_numpy() & ~recond_marker
+        section = pd.Series(None, index=data.index, dtype=object)
+        section[recond_marker] = 'reconditioned'
+        section[new_marker] = 'new'
+        purchase_types = section.ffill().fillna(purchase_type).to_numpy(dtype=object, copy=True)
+        keep &= ~(recond_marker | new_marker)
+        if len(purchase_types):
+            purchase_type = purchase_types[-1]
     
-    # Try combined name + model
-    combined = f"{name} {model}".strip()
-    if combined in prices:
-        return prices[combined]
+    if purchase_type_col is not None and purchase_type_col < data.shape[1]:
+        explicit = _str_column(data.iloc[:, purchase_type_col])
+        if purchase_types is None:
+            purchase_types = np.full(len(data), purchase_type, dtype=object)
+        present = pd.notna(explicit) & (explicit != '')
+        purchase_types[present] = explicit[present]
     
-    # Asset-specific matching logic
-    if asset_type == 'Laptop':
-        # Check if reconditioned
-        is_recond = asset.get('PurchaseType') == 'reconditioned'
-        
-        # Match by brand and processor
-        if 'DELL' in name.upper() or 'Dell' in name:
-            if 'i7' in processor:
-                return 110000 if not is_recond else 60000
-            elif 'i5' in processor:
-                return 75000 if not is_recond else 50000
-            elif 'i3' in processor:
-                return 50000 if not is_recond else 32000
-        elif 'HP' in name.upper():
-            if 'elite' in name.lower() or 'elite' in model.lower():
-                return 90000 if not is_recond else 48000
-            elif 'probook' in name.lower() or 'probook' in model.lower():
-                if 'i7' in processor:
-                    return 95000 if not is_recond else 60000
-                elif 'i5' in processor:
-                    return 85000 if not is_recond else 50000
-            else:  # Regular HP
-                if 'i7' in processor:
-                    return 100000 if not is_recond else 60000
-                elif 'i5' in processor:
-                    return 72500 if not is_recond else 45000
-                elif 'i3' in processor:
-                    return 48000 if not is_recond else 30000
-        elif 'LENOVO' in name.upper() or 'Lenovo' in name:
-            if 'thinkpad' in name.lower() or 'x230' in model.lower():
-                return 55000 if not is_recond else 28000
-            elif 'i3' in processor:
-                return 48000 if not is_recond else 35000
-            elif 'i5' in processor:
-                return 70000 if not is_recond else 45000
-        elif 'ASUS' in name.upper():
-            if 'i3' in processor:
-                return 45000 if not is_recond else 28000
-            elif 'i5' in processor:
-                return 65000 if not is_recond else 40000
-        
-        # Generic fallback by processor
-        if 'i7' in processor:
-            return 105000 if not is_recond else 55000
-        elif 'i5' in processor:
-            return 70000 if not is_recond else 45000
-        elif 'i3' in processor:
-            return 48000 if not is_recond else 30000
-        
-        return 60000  # Generic laptop fallback
+    # Rows without a numeric serial are blank lines or sub-headers
+    serial = data.iloc[:, serial_col]
+    serials = _int_column(serial.where(serial != '', None))
+    keep &= pd.notna(serials)
     
-    elif asset_type == 'PC':
-        if 'server' in name.lower() or 'proliant' in name.lower():
-            return 650000
-        elif 'xeon' in processor:
-            return 650000
-        elif 'i9' in processor:
-            gen = asset.get('Gen', 0)
-            if gen >= 13:
-                return 280000
-            elif gen >= 11:
-                return 220000
-            else:
-                return 180000
-        elif 'i5' in processor:
-            return 85000
-        elif 'i3' in processor:
-            gen = asset.get('Gen', 0)
-            if gen >= 10:
-                return 55000
-            else:
-                return 35000
-        elif 'dual' in processor or ('core' in processor and 'dual' in processor):
-            return 30000  # Dual Core processors
-        return 70000  # Generic desktop
+    columns = []
+    for field, col, kind in field_cols:
+        if col >= data.shape[1]:
+            continue
+        columns.append((field, _COLUMN_CONVERTERS[kind](data.iloc[:, col])))
     
-    elif asset_type == 'Monitor':
-        if 'm22f' in model.lower():
-            return 15500
-        elif 'asus' in name.lower():
-            return 15500
-        elif '24' in model or '22' in model or '21' in model:
-            return 12000
-        elif '19' in model or '18' in model:
-            return 10000
-        elif '17' in model:
-            return 6000
-        return 11000  # Generic monitor
+    # Only keep rows that have at least a name
+    names = dict(columns).get('Name')
+    if names is None:
+        return [], purchase_type
+    keep &= pd.notna(names) & (names != '')
     
-    elif asset_type == 'Printer Scaneer':
-        model_lower = model.lower()
-        name_lower = name.lower()
-        
-        if 'a3' in name_lower or 'l8180' in model_lower or 'c722b1' in model_lower:
-            return 80000
-        elif 'l3250' in model_lower:
-            return 21000
-        elif 'm404' in model_lower:
-            return 42000
-        elif 'm402' in model_lower:
-            return 22000
-        elif 'm26' in model_lower:
-            return 32000
-        elif '107w' in model_lower:
-            return 11000
-        elif 'pantum' in name_lower or 'p3010' in model_lower:
-            return 14000
-        elif 'samsung' in name_lower:
-            return 18000
-        elif 'canon' in name_lower:
-            if 'scanner' in name_lower or 'scaneer' in name_lower:
-                return 10000
-            return 16000
-        elif 'epson' in name_lower:
-            if 'scanner' in name_lower or 'scaneer' in name_lower:
-                return 12000
-            return 21000
-        return 15000  # Generic printer
+    rows = np.flatnonzero(keep)
+    fields = [field for field, _ in columns]
+    kept_columns = [values[rows].tolist() for _, values in columns]
+    kept_serials = serials[rows].tolist()
+    kept_types = purchase_types[rows].tolist() if purchase_types is not None else None
     
-    elif asset_type == 'Server Room':
-        model_lower = model.lower()
-        name_lower = name.lower()
-        
-        # Check for specific UPS models first
-        if 'apc' in model_lower or 'srce6kux1' in model_lower:
-            return 115000
-        elif 'battery' in name_lower and '16' in name_lower:
-            return 160000
-        elif 'mikrotik' in name_lower:
-            if 'ccr2004' in model_lower or '16g' in model_lower:
-                return 85000
-            return 13000
-        elif 'cisco' in name_lower:
-            return 33000
-        elif 'tp-link' in name_lower or 'tplink' in name_lower:
-            if '24' in name_lower:
-                return 7500
-            elif '8' in name_lower:
-                return 18000
-            return 12000
-        elif 'hikvision' in name_lower or 'dvr' in name_lower:
-            if '16' in name_lower:
-                return 23000
-            elif '8' in name_lower:
-                return 12000
-            return 18000
-        elif 'kvm' in name_lower:
-            return 8000
-        elif 'patch' in name_lower:
-            return 3500
-        elif 'cable' in name_lower:
-            return 2000
-        elif 'pbax' in name_lower or 'pabx' in name_lower:
-            return 25000
-        elif 'acs' in name_lower or 'soyal' in name_lower:
-            return 15000
-        elif 'ups' in name_lower:
-            return 160000  # UPS with 16 PCS batteries
-        return 10000  # Generic network device
+    # Keyword flags (see keyword_flags), scanning each distinct text once
+    kinds = {field: kind for field, _, kind in field_cols}
+    text_masks = np.full(len(rows), KEYWORDS.scan(sheet_name), dtype=object)
+    remark_masks = np.zeros(len(rows), dtype=object)
+    if kept_types is not None:
+        text_masks |= keyword_masks(purchase_types[rows])
+    elif purchase_type is not None:
+        text_masks |= KEYWORDS.scan(purchase_type)
+    for field, values in columns:
+        if kinds[field] == 'str':
+            masks = keyword_masks(values[rows])
+            text_masks |= masks
+            if field == 'Remarks':
+                remark_masks = masks
+    kept_flags = list(zip(remark_masks.tolist(), text_masks.tolist()))
     
-    return 50000  # Final fallback
+    assets = []
+    for i, values in enumerate(zip(*kept_columns)):
+        asset = {'AssetType': sheet_name, 'Serial': kept_serials[i]}
+        if kept_types is not None:
+            asset['PurchaseType'] = kept_types[i]
+        elif purchase_type is not None:
+            asset['PurchaseType'] = purchase_type
+        for field, value in zip(fields, values):
+            if value is not None:
+                asset[field] = value
+        asset['_keywords'] = kept_flags[i]
+        assets.append(asset)
+    return assets, purchase_type
 
-def calculate_asset_value(asset):
-    """Calculate current value based on market price and remarks-based depreciation."""
-    # Get market price
-    market_price = get_market_price(asset)
-    
-    # Special case: HP Server ProLiant DL380 Gen10 Plus gets 40% reduction (60% of market price)
-    if asset.get('AssetType') == 'PC':
-        model = asset.get('Model', '').lower()
-        if 'proliant' in model and 'dl380' in model:
-            final_value = market_price * 0.60  # 40% reduction = 60% value
-            return round(final_value, 2)
-    
-    # Special case: PC serials 11, 13, 14, 15 get 90% reduction (10% of market price)
-    if asset.get('AssetType') == 'PC':
-        serial = asset.get('Serial')
-        if serial in [11, 13, 14, 15]:
-            final_value = market_price * 0.10  # 90% reduction
-            return round(final_value, 2)
+def _normalize_header(value):
+    """Header text as matched against the schema: stripped and lower-cased."""
+    return str(value).strip().lower()
+
+def _find_header_row(df, schema):
+    """Return the index of the first row holding one of the schema's Serial headers."""
+    serial_headers = [_normalize_header(name) for name in schema['fields'][0][1]]
+    cells = df.to_numpy(dtype=object)
+    for start in range(0, len(cells), HEADER_SCAN_BLOCK):
+        block = cells[start:start + HEADER_SCAN_BLOCK].astype(str)
+        hits = np.isin(np.char.lower(np.char.strip(block)), serial_headers).any(axis=1)
+        if hits.any():
+            return start + int(np.argmax(hits))
+    return None
+
+def compile_sheet_schema(sheet_name, header_cells, schema=None):
+    """Resolve a sheet schema against its header row and compile it into an extractor.
     
-    # Check if reconditioned (laptops only)
-    is_reconditioned_laptop = False
-    if asset.get('AssetType') == 'Laptop':
-        if asset.get('PurchaseType') == 'reconditioned':
-            is_reconditioned_laptop = True
-        # Check all string fields for "recondition" keyword
-        for key, value in asset.items():
-            if isinstance(value, str) and 'recondition' in value.lower():
-                is_reconditioned_laptop = True
-                break
+    Returns ``extract(data_rows) -> assets`` for the rows below the header, or
+    None (after printing which headers are missing) if a required column is absent.
+    The extractor may be called on consecutive blocks of rows; the current
+    purchase-type section carries over from one block to the next.
+    """
+    if schema is None:
+        schema = SHEET_SCHEMAS.get(sheet_name, DEFAULT_SHEET_SCHEMA)
+    headers = [_normalize_header(value) if value is not None else None for value in header_cells]
     
-    # Get remarks field
-    remarks = asset.get('Remarks', '').lower()
+    columns = {}
+    claimed = set()
+    missing_required = []
+    missing_optional = []
+    for field, names, kind, optional in schema['fields']:
+        wanted = {_normalize_header(name) for name in names}
+        col = next((i for i, header in enumerate(headers) if header in wanted and i not in claimed), None)
+        if col is None:
+            if optional != 'quiet':
+                (missing_optional if optional else missing_required).append(f"{field} ({' / '.join(names)})")
+            continue
+        columns[field] = (col, kind)
+        claimed.add(col)
     
-    # Determine depreciation rate based on remarks and asset type
-    if is_reconditioned_laptop:
-        # Reconditioned laptops: Higher depreciation
-        if 'excellent' in remarks:
-            depreciation_rate = 0.40  # 60% reduction
-            depreciation_label = '60%'
-        elif 'good' in remarks:
-            depreciation_rate = 0.30  # 70% reduction
-            depreciation_label = '70%'
-        elif 'moderate' in remarks or 'fair' in remarks:
-            depreciation_rate = 0.20  # 80% reduction
-            depreciation_label = '80%'
-        else:
-            depreciation_rate = 0.30  # Default to 70% reduction for reconditioned
-            depreciation_label = '70%'
-    else:
-        # All other assets (new laptops, all PCs, monitors, printers, servers)
-        if 'excellent' in remarks:
-            depreciation_rate = 0.70  # 30% reduction
-            depreciation_label = '30%'
-        elif 'good' in remarks:
-            depreciation_rate = 0.60  # 40% reduction
-            depreciation_label = '40%'
-        elif 'moderate' in remarks or 'fair' in remarks:
-            depreciation_rate = 0.50  # 50% reduction
-            depreciation_label = '50%'
-        else:
-            depreciation_rate = 0.70  # Default to 30% reduction
-            depreciation_label = '30%'
+    if missing_required:
+        print(f"  Warning: {sheet_name} is missing required column(s): {', '.join(missing_required)}")
+        print(f"  Headers found: {[cell for cell in header_cells if cell is not None]}")
+        return None
+    if missing_optional:
+        print(f"  Note: {sheet_name} has no column for: {', '.join(missing_optional)}")
     
-    final_value = market_price * depreciation_rate
+    serial_col = columns.pop('Serial')[0]
+    field_cols = [(field, col, kind) for field, (col, kind) in columns.items()]
+    section_col = None
+    if schema.get('section_column'):
+        section_header = _normalize_header(schema['section_column'])
+        section_col = next((i for i, header in enumerate(headers) if header == section_header), None)
+    purchase_type_col = None
+    if schema.get('purchase_type_column'):
+        wanted = {_normalize_header(name) for name in schema['purchase_type_column']}
+        purchase_type_col = next((i for i, header in enumerate(headers) if header in wanted), None)
+    state = {'purchase_type': schema.get('purchase_type')}
     
-    return round(final_value, 2)
+    def extract(data):
+        assets, state['purchase_type'] = _extract_assets(
+            data, sheet_name, serial_col, field_cols,
+            section_col=section_col, purchase_type=state['purchase_type'],
+            purchase_type_col=purchase_type_col)
+        return assets
+    return extract
 
-def read_excel_data(file_path, sheet_name):
-    """Read Excel sheet and extract asset data."""
+def read_excel_data(file_path, sheet_name, rows=None):
+    """Read Excel sheet and extract asset data.
+    
+    When ``rows`` is given (as produced by ``iter_workbook_sheets``) the sheet is
+    parsed from those rows instead of re-opening the workbook.
+    """
     try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
-        assets = []
-        
-        # Find header row (contains "Serial" or "S/L")
-        header_row = None
-        for idx, row in df.iterrows():
-            if 'Serial' in str(row.values) or 'S/L' in str(row.values):
-                header_row = idx
-                break
+        if rows is None:
+            df = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
+        else:
+            df = pd.DataFrame(rows, dtype=object)
         
+        # Find header row (contains a "Serial" / "S/L" column)
+        schema = SHEET_SCHEMAS.get(sheet_name, DEFAULT_SHEET_SCHEMA)
+        header_row = _find_header_row(df, schema)
         if header_row is None:
             print(f"  Warning: Could not find header in {sheet_name}")
-            return assets
-        
-        # Track current section for laptops (new vs reconditioned)
-        current_section = 'new'  # default
-        
-        # Check rows before header for section markers (laptops only)
-        if sheet_name == 'Laptop':
-            for idx in range(0, header_row):
-                row = df.iloc[idx]
-                if len(row) > 0:
-                    first_col = str(row.iloc[0]).lower() if not pd.isna(row.iloc[0]) else ''
-                    if 'new purchase' in first_col:
-                        current_section = 'new'
+            return []
         
-        # Determine column structure
-        serial_col = None
-        for col_idx, val in enumerate(df.iloc[header_row].values):
-            if 'Serial' in str(val) or 'S/L' in str(val):
-                serial_col = col_idx
-                break
-        
-        if serial_col is None:
-            return assets
-        
-        has_category = (serial_col == 1)  # If Serial is in column 1, there's a Category column
-        
-        # Process data rows
-        for idx in range(header_row + 1, len(df)):
-            row = df.iloc[idx]
-            
-            # Check for section headers in laptops
-            if sheet_name == 'Laptop' and has_category and len(row) > 0:
-                first_col = str(row.iloc[0]).lower() if not pd.isna(row.iloc[0]) else ''
-                if 'recondition' in first_col or 'used' in first_col:
-                    current_section = 'reconditioned'
-                    continue
-                elif 'new purchase' in first_col:
-                    current_section = 'new'
-                    continue
-            
-            # Get serial number
-            serial = row.iloc[serial_col] if len(row) > serial_col else None
-            
-            if pd.isna(serial) or serial == '':
-                continue
-            
-            # Skip non-numeric serials (headers)
-            try:
-                serial_num = int(serial)
-            except (ValueError, TypeError):
-                continue
-            
-            # Build asset dictionary
-            asset = {
-                'AssetType': sheet_name,
-                'Serial': serial_num,
-            }
-            
-            # Mark purchase type for laptops
-            if sheet_name == 'Laptop':
-                asset['PurchaseType'] = current_section
-            
-            # Column mapping
-            col_offset = 1 if has_category else 0
-            
-            # Name
-            name_col = col_offset + 1
-            if len(row) > name_col and not pd.isna(row.iloc[name_col]):
-                asset['Name'] = str(row.iloc[name_col]).strip()
-            
-            # Model
-            model_col = col_offset + 2
-            if len(row) > model_col and not pd.isna(row.iloc[model_col]):
-                asset['Model'] = str(row.iloc[model_col]).strip()
-            
-            # Additional fields based on sheet type
-            if sheet_name in ['Laptop', 'PC']:
-                # RAM
-                ram_col = col_offset + 3
-                if len(row) > ram_col and not pd.isna(row.iloc[ram_col]):
-                    try:
-                        asset['RAM'] = int(row.iloc[ram_col])
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Processor
-                proc_col = col_offset + 4
-                if len(row) > proc_col and not pd.isna(row.iloc[proc_col]):
-                    asset['Processor'] = str(row.iloc[proc_col]).strip()
-                
-                # Storage
-                storage_col = col_offset + 5
-                if len(row) > storage_col and not pd.isna(row.iloc[storage_col]):
-                    asset['Storage'] = str(row.iloc[storage_col]).strip()
-                
-                # Gen
-                gen_col = col_offset + 6
-                if len(row) > gen_col and not pd.isna(row.iloc[gen_col]):
-                    try:
-                        asset['Gen'] = int(row.iloc[gen_col])
-                    except (ValueError, TypeError):
-                        pass
-                
-                # GPU
-                gpu_col = col_offset + 7
-                if len(row) > gpu_col and not pd.isna(row.iloc[gpu_col]):
-                    asset['GPU'] = str(row.iloc[gpu_col]).strip()
-                
-                # User
-                user_col = col_offset + 8
-                if len(row) > user_col and not pd.isna(row.iloc[user_col]):
-                    asset['User'] = str(row.iloc[user_col]).strip()
-                
-                # Location
-                loc_col = col_offset + 9
-                if len(row) > loc_col and not pd.isna(row.iloc[loc_col]):
-                    asset['Location'] = str(row.iloc[loc_col]).strip()
-                
-                # Level
-                level_col = col_offset + 10
-                if len(row) > level_col and not pd.isna(row.iloc[level_col]):
-                    asset['Level'] = str(row.iloc[level_col]).strip()
-                
-                # Status
-                status_col = col_offset + 11
-                if len(row) > status_col and not pd.isna(row.iloc[status_col]):
-                    asset['Status'] = str(row.iloc[status_col]).strip()
-                
-                # Remarks
-                remarks_col = col_offset + 12
-                if len(row) > remarks_col and not pd.isna(row.iloc[remarks_col]):
-                    asset['Remarks'] = str(row.iloc[remarks_col]).strip()
-            
-            elif sheet_name == 'Monitor':
-                # User
-                user_col = col_offset + 3
-                if len(row) > user_col and not pd.isna(row.iloc[user_col]):
-                    asset['User'] = str(row.iloc[user_col]).strip()
-                
-                # Location
-                loc_col = col_offset + 4
-                if len(row) > loc_col and not pd.isna(row.iloc[loc_col]):
-                    asset['Location'] = str(row.iloc[loc_col]).strip()
-                
-                # Level
-                level_col = col_offset + 5
-                if len(row) > level_col and not pd.isna(row.iloc[level_col]):
-                    asset['Level'] = str(row.iloc[level_col]).strip()
-                
-                # Status
-                status_col = col_offset + 6
-                if len(row) > status_col and not pd.isna(row.iloc[status_col]):
-                    asset['Status'] = str(row.iloc[status_col]).strip()
-                
-                # Remarks
-                remarks_col = col_offset + 7
-                if len(row) > remarks_col and not pd.isna(row.iloc[remarks_col]):
-                    asset['Remarks'] = str(row.iloc[remarks_col]).strip()
-            
-            elif sheet_name == 'Printer Scaneer':
-                # Function
-                func_col = col_offset + 4
-                if len(row) > func_col and not pd.isna(row.iloc[func_col]):
-                    asset['Function'] = str(row.iloc[func_col]).strip()
-                
-                # Location
-                loc_col = col_offset + 5
-                if len(row) > loc_col and not pd.isna(row.iloc[loc_col]):
-                    asset['Location'] = str(row.iloc[loc_col]).strip()
-                
-                # Level
-                level_col = col_offset + 6
-                if len(row) > level_col and not pd.isna(row.iloc[level_col]):
-                    asset['Level'] = str(row.iloc[level_col]).strip()
-                
-                # Status
-                status_col = col_offset + 7
-                if len(row) > status_col and not pd.isna(row.iloc[status_col]):
-                    asset['Status'] = str(row.iloc[status_col]).strip()
-                
-                # Remarks
-                remarks_col = col_offset + 8
-                if len(row) > remarks_col and not pd.isna(row.iloc[remarks_col]):
-                    asset['Remarks'] = str(row.iloc[remarks_col]).strip()
-            
-            elif sheet_name == 'Server Room':
-                # Status
-                status_col = 4
-                if len(row) > status_col and not pd.isna(row.iloc[status_col]):
-                    asset['Status'] = str(row.iloc[status_col]).strip()
-                
-                # Remarks
-                remarks_col = 5
-                if len(row) > remarks_col and not pd.isna(row.iloc[remarks_col]):
-                    asset['Remarks'] = str(row.iloc[remarks_col]).strip()
-            
-            # Only add if we have at least a name
-            if 'Name' in asset and asset['Name']:
-                assets.append(asset)
-        
-        return assets
+        extract = compile_sheet_schema(sheet_name, df.iloc[header_row].tolist(), schema)
+        if extract is None:
+            return []
+        return extract(df.iloc[header_row + 1:])
     except Exception as e:
         print(f"Error reading {sheet_name}: {e}")
         import traceback
         traceback.print_exc()
         return []
 
-def divide_into_groups(assets):
-    """Divide assets into 3 equal groups by value using greedy algorithm."""
-    # Calculate values for all assets
-    for asset in assets:
-        asset['MarketPrice'] = get_market_price(asset)
-        asset['CurrentValue'] = calculate_asset_value(asset)
-        
-        # Determine depreciation label and remark category based on remarks and type
-        is_reconditioned_laptop = False
-        if asset.get('AssetType') == 'Laptop' and asset.get('PurchaseType') == 'reconditioned':
-            is_reconditioned_laptop = True
-        
-        remarks = asset.get('Remarks', '').lower()
-        
-        # Determine remark category for display
-        if 'excellent' in remarks:
-            remark_category = 'Excellent'
-        elif 'good' in remarks:
-            remark_category = 'Good'
-        elif 'moderate' in remarks or 'fair' in remarks:
-            remark_category = 'Moderate'
-        else:
-            remark_category = 'Excellent'  # Default
-        
-        # Special case: HP Server ProLiant DL380 Gen10 Plus gets 40% reduction
-        hp_server_special = False
-        if asset.get('AssetType') == 'PC':
-            model = asset.get('Model', '').lower()
-            if 'proliant' in model and 'dl380' in model:
-                asset['DepreciationRate'] = '40%'
-                asset['RemarkCategory'] = 'Special (40% reduction)'
-                hp_server_special = True
-            # Special case: PC serials 11, 13, 14, 15 get 90% reduction
-            elif asset.get('Serial') in [11, 13, 14, 15]:
-                asset['DepreciationRate'] = '90%'
-                asset['RemarkCategory'] = 'Special'
-            else:
-                # Normal PC depreciation based on remarks
-                if 'excellent' in remarks:
-                    asset['DepreciationRate'] = '30%'
-                elif 'good' in remarks:
-                    asset['DepreciationRate'] = '40%'
-                elif 'moderate' in remarks or 'fair' in remarks:
-                    asset['DepreciationRate'] = '50%'
-                else:
-                    asset['DepreciationRate'] = '30%'
-        elif is_reconditioned_laptop:
-            if 'excellent' in remarks:
-                asset['DepreciationRate'] = '60%'
-            elif 'good' in remarks:
-                asset['DepreciationRate'] = '70%'
-            elif 'moderate' in remarks or 'fair' in remarks:
-                asset['DepreciationRate'] = '80%'
+def iter_source_assets(source, sheet_names):
+    """Yield (sheet_name, assets) for each sheet of a workbook or a table source.
+    
+    Table sources (CSV / Parquet / JSON Lines, see asset_formats.py) hold one
+    table per sheet; workbooks are opened once and read in a single pass.
+    """
+    from asset_formats import is_table_source, read_table_data
+    if is_table_source(source):
+        for sheet_name in sheet_names:
+            yield sheet_name, read_table_data(source, sheet_name)
+        return
+    for sheet_name, rows in iter_workbook_sheets(source, sheet_names):
+        yield sheet_name, read_excel_data(source, sheet_name, rows=rows)
+
+def _parse_sheet_task(file_path, sheet_name):
+    """Parse one sheet in a worker process; returns (assets, wall seconds, CPU seconds)."""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    ((_, assets),) = iter_source_assets(file_path, [sheet_name])
+    return assets, time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+def load_assets(workbooks, sheet_names, jobs=1, cache=None):
+    """Read every sheet of every workbook and return all assets in a fixed order.
+    
+    ``workbooks`` may also name table sources (see asset_formats.py). Assets are
+    ordered by workbook, then sheet, whatever the number of jobs. Workbook sheets
+    found in ``cache`` (an ``ingest_cache.IngestCache``) are not parsed again. With
+    ``jobs > 1`` the remaining sheets are parsed in a process pool; otherwise each
+    workbook is opened once and its sheets are parsed in a single pass.
+    """
+    label = (lambda path, sheet: f"{path}: {sheet}") if len(workbooks) > 1 else (lambda path, sheet: sheet)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    worker_cpu = 0.0
+    
+    # results[(workbook, sheet)] = (assets, parse seconds or None when cached)
+    results = {}
+    cache_keys = {}
+    if cache is not None:
+        from ingest_cache import sheet_fingerprints
+        for path in workbooks:
+            for sheet_name, key in sheet_fingerprints(path, sheet_names).items():
+                cache_keys[(path, sheet_name)] = key
+                assets = cache.get(key)
+                if assets is not None:
+                    results[(path, sheet_name)] = (assets, None)
+    pending = [(path, sheet_name) for path in workbooks for sheet_name in sheet_names
+               if (path, sheet_name) not in results]
+    
+    if jobs > 1 and pending:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for task, (assets, elapsed, cpu) in zip(pending, executor.map(_parse_sheet_task, *zip(*pending))):
+                results[task] = (assets, elapsed)
+                worker_cpu += cpu
+    else:
+        for path in workbooks:
+            path_sheets = [sheet_name for sheet_path, sheet_name in pending if sheet_path == path]
+            if not path_sheets:
+                continue
+            sheet_start = time.perf_counter()
+            for sheet_name, assets in iter_source_assets(path, path_sheets):
+                sheet_end = time.perf_counter()
+                results[(path, sheet_name)] = (assets, sheet_end - sheet_start)
+                sheet_start = sheet_end
+    
+    all_assets = []
+    for path in workbooks:
+        for sheet_name in sheet_names:
+            assets, elapsed = results[(path, sheet_name)]
+            print(f"Reading {label(path, sheet_name)}...")
+            if elapsed is None:
+                print(f"  Found {len(assets)} {sheet_name}(s) (cached)")
             else:
-                asset['DepreciationRate'] = '70%'
-                remark_category = 'Good'  # Default for reconditioned
+                print(f"  Found {len(assets)} {sheet_name}(s) in {elapsed:.3f}s")
+                if (path, sheet_name) in cache_keys:
+                    cache.put(cache_keys[(path, sheet_name)], assets)
+            all_assets.extend(assets)
+    
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start + worker_cpu
+    print(f"\nTotal assets loaded: {len(all_assets)} in {wall:.3f}s")
+    print(f"  Parse time: {wall:.3f}s wall, {cpu:.3f}s CPU across {max(jobs, 1)} job(s) ({cpu / wall if wall else 0:.2f}x)")
+    if cache is not None:
+        print(f"  {cache.summary()}")
+    return all_assets
+
+def stream_excel_data(file_path, sheet_name, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield the asset records of a sheet without loading the whole sheet.
+    
+    Rows come straight from a read-only worksheet iterator and are parsed in
+    blocks of ``chunk_rows``, so memory use is bounded by the block size rather
+    than the sheet size. Records are identical to ``read_excel_data``.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            print(f"  Warning: Sheet {sheet_name} not found in {file_path}")
+            return
+        rows = _sheet_rows(workbook[sheet_name])
+        schema = SHEET_SCHEMAS.get(sheet_name, DEFAULT_SHEET_SCHEMA)
+        
+        # Find the header in the leading rows
+        header = None
+        block = []
+        for row in rows:
+            block.append(row)
+            if len(block) < HEADER_SCAN_BLOCK:
+                continue
+            header_row = _find_header_row(pd.DataFrame(block, dtype=object), schema)
+            if header_row is not None:
+                header, block = block[header_row], block[header_row + 1:]
+                break
+            block = []
         else:
-            # All other assets (new laptops, monitors, printers, servers)
-            if 'excellent' in remarks:
-                asset['DepreciationRate'] = '30%'
-            elif 'good' in remarks:
-                asset['DepreciationRate'] = '40%'
-            elif 'moderate' in remarks or 'fair' in remarks:
-                asset['DepreciationRate'] = '50%'
-            else:
-                asset['DepreciationRate'] = '30%'
+            header_row = _find_header_row(pd.DataFrame(block, dtype=object), schema) if block else None
+            if header_row is not None:
+                header, block = block[header_row], block[header_row + 1:]
         
-        # Store remark category for display (unless already set by special cases)
-        if 'RemarkCategory' not in asset or not hp_server_special:
-            asset['RemarkCategory'] = remark_category
+        if header is None:
+            print(f"  Warning: Could not find header in {sheet_name}")
+            return
+        extract = compile_sheet_schema(sheet_name, header, schema)
+        if extract is None:
+            return
+        
+        # Every schema column lies within the header, so rows are cut to its width
+        width = len(header)
+        chunk = [(row + [None] * (width - len(row)))[:width] for row in block]
+        for row in rows:
+            chunk.append((row + [None] * (width - len(row)))[:width])
+            if len(chunk) >= chunk_rows:
+                yield from extract(pd.DataFrame(chunk, dtype=object))
+                chunk = []
+        if chunk:
+            yield from extract(pd.DataFrame(chunk, dtype=object))
+    except Exception as e:
+        print(f"Error reading {sheet_name}: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        workbook.close()
+
+def valuation_signature(asset):
+    """Key of everything value_asset() depends on, or None for per-serial overrides.
+    
+    Remarks are reduced to their condition and laptops are also keyed on
+    is_reconditioned_laptop(), which a "recondition" note in any field can set.
+    """
+    asset_type = asset['AssetType']
+    if asset_type == 'PC' and asset.get('Serial') in PC_SPECIAL_SERIALS:
+        return None
+    flags = keyword_flags(asset)
+    return (asset_type, asset.get('Name', '').strip(), asset.get('Model', '').strip(),
+            asset.get('Processor', '').strip().lower(), asset.get('Gen', 0), asset.get('PurchaseType'),
+            condition_of(flags[0]), is_reconditioned_laptop(asset, flags))
+
+def value_asset(asset):
+    """Set MarketPrice, CurrentValue, DepreciationRate and RemarkCategory on an asset.
     
-    # Sort all assets by value (descending) for standard greedy algorithm
-    sorted_assets = sorted(assets, key=lambda x: x['CurrentValue'], reverse=True)
+    Results are shared through valuation_cache.VALUATION_CACHE between assets
+    with the same valuation_signature().
+    """
+    cache = valuation_cache.VALUATION_CACHE
+    key = valuation_signature(asset) if cache is not None else None
+    if key is None:
+        if cache is not None:
+            cache.uncached += 1
+        return _value_asset(asset)
+    
+    result = cache.get(key)
+    if result is None:
+        _value_asset(asset)
+        cache.put(key, (asset['MarketPrice'], asset['CurrentValue'], asset['DepreciationRate'], asset['RemarkCategory']))
+    else:
+        asset['MarketPrice'], asset['CurrentValue'], asset['DepreciationRate'], asset['RemarkCategory'] = result
+    return asset
+
+def _value_asset(asset):
+    """value_asset() without the cache."""
+    multiplier, label, category = classify_depreciation(asset)
+    asset['MarketPrice'] = get_market_price(asset)
+    asset['CurrentValue'] = round(asset['MarketPrice'] * multiplier, 2)
+    asset['DepreciationRate'] = label
+    asset['RemarkCategory'] = category
+    return asset
+
+def assign_groups(values, group_count=3):
+    """Standard greedy algorithm over asset values.
+    
+    Values are taken largest first and each goes to the group with the lowest
+    running total (ties go to the earlier group). The groups sit in a heap of
+    (total, group), so each step is O(log group_count). Returns the processing
+    order, the group index of every value, the group total right after each
+    value was added, and the final group totals.
+    """
+    values = np.asarray(values, dtype=float)
+    order = np.argsort(-values, kind='stable')
+    labels = np.empty(len(values), dtype=np.int32)
+    running = np.empty(len(values))
+    heap = [(0, group) for group in range(group_count)]
+    
+    # Walk the order in blocks so huge inventories never become Python lists
+    for start in range(0, len(order), ASSIGN_BLOCK):
+        block = order[start:start + ASSIGN_BLOCK]
+        block_labels = []
+        block_running = []
+        for value in values[block].tolist():
+            total, group = heap[0]
+            total += value
+            heapq.heapreplace(heap, (total, group))
+            block_labels.append(group)
+            block_running.append(total)
+        labels[block] = block_labels
+        running[block] = block_running
+    totals = [total for total, _ in sorted(heap, key=lambda item: item[1])]
+    return order, labels, running, totals
+
+# Written to all_assets_data.json alongside the groups
+PRICING_METHODOLOGY = {
+    'description': 'Market-based pricing with depreciation',
+    'new_asset_depreciation': '30%',
+    'reconditioned_asset_depreciation': '60%',
+    'market_price_date': 'January 2026'
+}
+
+def default_group_names(count):
+    """A, B, ..., Z, then AA, AB, ... like spreadsheet columns."""
+    names = []
+    for i in range(count):
+        name = ''
+        i += 1
+        while i:
+            i, letter = divmod(i - 1, 26)
+            name = chr(ord('A') + letter) + name
+        names.append(name)
+    return names
+
+def parse_group_names(spec):
+    """Group names from --groups: a count (named A, B, C, ...) or comma-separated names."""
+    spec = spec.strip()
+    names = default_group_names(int(spec)) if spec.isdigit() else [name.strip() for name in spec.split(',')]
+    if not MIN_GROUPS <= len(names) <= MAX_GROUPS:
+        raise argparse.ArgumentTypeError(f"need {MIN_GROUPS} to {MAX_GROUPS} groups, got {len(names)}")
+    if '' in names or len(set(names)) < len(names):
+        raise argparse.ArgumentTypeError(f"group names must be non-empty and distinct: {spec!r}")
+    return names
+
+def parse_balance_weights(spec):
+    """Balanced-engine weights from --balance, e.g. "value=1,count=0.5"."""
+    weights = {}
+    for item in spec.split(','):
+        key, _, weight = item.partition('=')
+        key = key.strip()
+        if key not in BALANCE_WEIGHTS:
+            raise argparse.ArgumentTypeError(f"unknown weight {key!r} (use {', '.join(BALANCE_WEIGHTS)})")
+        try:
+            weights[key] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"weight {key!r} needs a number, got {weight.strip()!r}")
+        if weights[key] < 0:
+            raise argparse.ArgumentTypeError(f"weight {key!r} can't be negative")
+    return weights
+
+def partition_names(group_names):
+    """Name of each assign_groups() group index: the first group filled is reported last."""
+    return list(reversed(group_names))
+
+# Command-line flag of each partition option, for notes about ignored ones
+PARTITION_FLAGS = {'weights': '--balance', 'location_tolerance': '--location-tolerance',
+                   'portfolio_time': '--portfolio-time', 'portfolio_jobs': '--portfolio-jobs', 'refine': '--refine',
+                   'anneal': '--anneal'}
+
+def note_ignored_partition(engine, options, reason):
+    """Print a note naming the partition engine and options that ``reason`` overrides, if any were chosen."""
+    flags = ([f'--partition {engine}'] if engine != 'greedy' else []) + \
+            [flag for option, flag in PARTITION_FLAGS.items() if options.get(option)]
+    if flags:
+        print(f"  Note: {', '.join(flags)} {'is' if len(flags) == 1 else 'are'} ignored with {reason}")
+
+def divide_into_groups(assets, revalue=True, engine='greedy', group_names=GROUP_NAMES, **options):
+    """Divide assets into groups of equal total value.
+    
+    By default each asset, largest first, goes to the group with the lowest
+    total (assign_groups). With ``revalue=False`` the assets' existing CurrentValue is used as is.
+    ``engine`` picks another partition engine and ``options`` (balanced-engine
+    ``weights``, a ``refine`` time budget, ...) are passed on to
+    partitioning.partition(). With ``incremental`` naming an earlier
+    all_assets_data.json, its groups are kept and only changes are placed
+    (see partitioning.incremental_partition). With ``constraints`` naming a
+    constraints file, pinned, must-link and cannot-link assets are honored
+    (see group_constraints).
+    """
+    # Calculate values for all assets, as one columnar batch
+    if revalue:
+        from batch_valuation import value_assets
+        value_assets(assets)
     
     # Initialize groups
-    groups = {'A': [], 'B': [], 'C': []}
-    group_values = {'A': 0, 'B': 0, 'C': 0}
-    group_counts = {'A': defaultdict(int), 'B': defaultdict(int), 'C': defaultdict(int)}
+    groups = {group_name: [] for group_name in group_names}
+    group_values = {group_name: 0 for group_name in group_names}
+    group_counts = {group_name: defaultdict(int) for group_name in group_names}
     
-    # Standard greedy algorithm - assign each asset to group with lowest total value
-    for asset in sorted_assets:
-        # Find group with minimum value
-        min_group = min(group_values, key=group_values.get)
-        
-        # Add asset to that group
+    # Group names in reverse: the group filled first (with the largest asset) is named last
+    names = partition_names(group_names)
+    
+    incremental = options.pop('incremental', None)
+    if incremental and not os.path.exists(incremental):
+        print(f"  Note: no earlier groups in {incremental}, dividing from scratch")
+        incremental = None
+    constraints = options.pop('constraints', None)
+    if constraints and incremental:
+        print("  Note: --incremental is ignored with --constraints")
+        incremental = None
+    
+    # Constraints, then the earlier groups, then the chosen partition engine (greedy unless told otherwise)
+    if constraints:
+        from group_constraints import constrained_partition, load_constraints, print_constraint_report
+        from partitioning import group_running
+        note_ignored_partition(engine, options, '--constraints')
+        values = [asset['CurrentValue'] for asset in assets]
+        labels, report = constrained_partition(assets, values, names, load_constraints(constraints, group_names))
+        order, labels, running, totals = group_running(values, labels, len(names))
+        print_constraint_report(report, constraints)
+    elif incremental:
+        from partitioning import asset_keys, group_running, incremental_partition, load_previous_assignment
+        note_ignored_partition(engine, options, '--incremental')
+        values = [asset['CurrentValue'] for asset in assets]
+        labels, changes = incremental_partition(values, asset_keys(assets), load_previous_assignment(incremental), names)
+        order, labels, running, totals = group_running(values, labels, len(names))
+        print_incremental_changes(assets, changes, names, incremental)
+    elif engine == 'greedy' and not any(options.values()):
+        order, labels, running, totals = assign_groups([asset['CurrentValue'] for asset in assets], len(names))
+    else:
+        from partitioning import partition
+        locations = [asset.get('Location') for asset in assets] if engine == 'location' else None
+        order, labels, running, totals = partition([asset['CurrentValue'] for asset in assets], len(names), engine,
+                                                   [asset['AssetType'] for asset in assets], locations=locations,
+                                                   **options)
+    labels = labels.tolist()
+    running = running.tolist()
+    for i in order.tolist():
+        asset = assets[i]
+        min_group = names[labels[i]]
         groups[min_group].append(asset)
-        group_values[min_group] += asset['CurrentValue']
         group_counts[min_group][asset['AssetType']] += 1
         
         # Add allocation remark
-        asset['AllocationRemark'] = f"Assigned to balance total value (Group {min_group}: BDT {group_values[min_group]:,.0f})"
-    
-    # Swap Group A and Group C (Group C assets → Group A, Group A assets → Group C)
-    groups['A'], groups['C'] = groups['C'], groups['A']
-    group_values['A'], group_values['C'] = group_values['C'], group_values['A']
-    group_counts['A'], group_counts['C'] = group_counts['C'], group_counts['A']
-    
-    # Update allocation remarks for swapped assets
-    for asset in groups['A']:
-        if 'AllocationRemark' in asset:
-            asset['AllocationRemark'] = asset['AllocationRemark'].replace('Group C:', 'Group A:').replace('Group A:', 'Group A:')
-    for asset in groups['C']:
-        if 'AllocationRemark' in asset:
-            asset['AllocationRemark'] = asset['AllocationRemark'].replace('Group A:', 'Group C:').replace('Group C:', 'Group C:')
+        asset['AllocationRemark'] = f"Assigned to balance total value (Group {min_group}: BDT {running[i]:,.0f})"
+    for group_name, total in zip(names, totals):
+        group_values[group_name] = total
     
     return groups, group_values, group_counts
 
-def generate_html(groups, group_values, group_counts, all_assets):
-    """Generate HTML report."""
-    
-    total_value = sum(group_values.values())
-    target_value = total_value / 3
-    
-    # Count asset types
-    type_counts = defaultdict(int)
-    for asset in all_assets:
-        type_counts[asset['AssetType']] += 1
-    
+def group_css_class(group_name):
+    """CSS class of a group's section in the HTML report."""
+    return 'group-' + (re.sub(r'[^a-z0-9]+', '-', group_name.lower()).strip('-') or 'x')
+
+def group_styles(group_names):
+    """CSS rules for groups other than A, B and C, colored from GROUP_COLORS in turn."""
+    css = ''
+    for i, group_name in enumerate(group_names):
+        css_class = group_css_class(group_name)
+        if css_class in ('group-a', 'group-b', 'group-c'):
+            continue
+        color = GROUP_COLORS[i % len(GROUP_COLORS)]
+        css += f"""
+        
+        .{css_class} {{
+            border: 3px solid {color};
+        }}
+        
+        .{css_class} .group-header {{
+            background: {color};
+        }}"""
+    return css
+
+def html_document_start(total_assets, type_counts, total_value, target_value, group_names=GROUP_NAMES):
+    """Page head, summary cards and the opening of the groups container."""
     html = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -870,7 +1123,7 @@ def generate_html(groups, group_values, group_counts, all_assets):
         
         .group-c .group-header {{
             background: linear-gradient(135deg, #2ecc71 0%, #27ae60 100%);
-        }}
+        }}{group_styles(group_names)}
         
         .group-stats {{
             display: grid;
@@ -989,7 +1242,7 @@ def generate_html(groups, group_values, group_counts, all_assets):
         <div class="summary">
             <div class="summary-card">
                 <h3>Total Assets</h3>
-                <div class="value">{len(all_assets)}</div>
+                <div class="value">{total_assets}</div>
                 <div class="label">All Asset Types</div>
             </div>
             <div class="summary-card">
@@ -1031,20 +1284,14 @@ def generate_html(groups, group_values, group_counts, all_assets):
 
         <div class="groups-container">
 """
+    return html
+
+def html_group_start(group_name, group_size, group_val, target_value, type_counts_group):
+    """Header and statistics of one group, up to the start of its asset tables."""
+    variance = ((group_val - target_value) / target_value) * 100
     
-    # Generate sections for each group
-    for group_name in ['A', 'B', 'C']:
-        group_assets = groups[group_name]
-        group_val = group_values[group_name]
-        variance = ((group_val - target_value) / target_value) * 100
-        
-        # Count assets by type in this group
-        type_counts_group = defaultdict(int)
-        for asset in group_assets:
-            type_counts_group[asset['AssetType']] += 1
-        
-        html += f"""
-            <div class="group group-{group_name.lower()}">
+    html = f"""
+            <div class="group {group_css_class(group_name)}">
                 <div class="group-header">
                     Group {group_name} - Complete Asset Allocation
                 </div>
@@ -1052,7 +1299,7 @@ def generate_html(groups, group_values, group_counts, all_assets):
                 <div class="group-stats">
                     <div class="stat">
                         <div class="stat-label">Total Assets</div>
-                        <div class="stat-value">{len(group_assets)}</div>
+                        <div class="stat-value">{group_size}</div>
                     </div>
                     <div class="stat">
                         <div class="stat-label">Total Value</div>
@@ -1064,41 +1311,32 @@ def generate_html(groups, group_values, group_counts, all_assets):
                     </div>
                     <div class="stat">
                         <div class="stat-label">Avg per Asset</div>
-                        <div class="stat-value">BDT {group_val/len(group_assets):,.0f}</div>
+                        <div class="stat-value">BDT {group_val/group_size:,.0f}</div>
                     </div>
 """
-        
-        # Add type counts
-        for asset_type in ['Laptop', 'PC', 'Monitor', 'Printer Scaneer', 'Server Room']:
-            count = type_counts_group.get(asset_type, 0)
-            if count > 0:
-                display_name = asset_type.replace('Printer Scaneer', 'Printer').replace('Server Room', 'Server')
-                html += f"""
+    
+    # Add type counts
+    for asset_type in ['Laptop', 'PC', 'Monitor', 'Printer Scaneer', 'Server Room']:
+        count = type_counts_group.get(asset_type, 0)
+        if count > 0:
+            display_name = asset_type.replace('Printer Scaneer', 'Printer').replace('Server Room', 'Server')
+            html += f"""
                     <div class="stat">
                         <div class="stat-label">{display_name}</div>
                         <div class="stat-value">{count}</div>
                     </div>
 """
-        
-        html += """
+    
+    html += """
                 </div>
                 
                 <div class="asset-type-section">
 """
-        
-        # Group assets by type
-        assets_by_type = defaultdict(list)
-        for asset in group_assets:
-            assets_by_type[asset['AssetType']].append(asset)
-        
-        # Display each asset type
-        for asset_type in ['Laptop', 'PC', 'Monitor', 'Printer Scaneer', 'Server Room']:
-            if asset_type not in assets_by_type:
-                continue
-            
-            type_assets = sorted(assets_by_type[asset_type], key=lambda x: x['CurrentValue'], reverse=True)
-            
-            html += f"""
+    return html
+
+def html_type_table(asset_type, type_assets):
+    """Table of one asset type within a group (assets already in display order)."""
+    html = f"""
                     <div class="asset-type-header">
                         {asset_type}s ({len(type_assets)}) - Total Value: BDT {sum(a['CurrentValue'] for a in type_assets):,.0f}
                     </div>
@@ -1118,36 +1356,36 @@ def generate_html(groups, group_values, group_counts, all_assets):
                         </thead>
                         <tbody>
 """
-            
-            for asset in type_assets:
-                # Build specs string
-                specs = []
-                if asset.get('Processor'):
-                    specs.append(f"CPU: {asset['Processor']}")
-                if asset.get('RAM'):
-                    specs.append(f"RAM: {asset['RAM']}GB")
-                if asset.get('Storage'):
-                    specs.append(f"Storage: {asset['Storage']}")
-                if asset.get('GPU'):
-                    specs.append(f"GPU: {asset['GPU']}")
-                if asset.get('Gen'):
-                    specs.append(f"Gen: {asset['Gen']}")
-                if asset.get('Location'):
-                    specs.append(f"Loc: {asset['Location']}")
-                
-                specs_str = '<br>'.join(specs[:4]) if specs else 'N/A'  # Limit to 4 lines
-                
-                # Get user info
-                user_info = asset.get('User', 'N/A')
-                
-                # Determine if new or reconditioned
-                is_recond = asset.get('PurchaseType') == 'reconditioned' or asset['DepreciationRate'] in ['60%', '70%', '80%']
-                status_badge = '<span class="recond-badge">RECOND</span>' if is_recond else '<span class="new-badge">NEW</span>'
-                
-                # Format depreciation with remark
-                depreciation_display = f"{asset['DepreciationRate']}<br><small>({asset.get('RemarkCategory', 'N/A')})</small>"
-                
-                html += f"""
+    
+    for asset in type_assets:
+        # Build specs string
+        specs = []
+        if asset.get('Processor'):
+            specs.append(f"CPU: {asset['Processor']}")
+        if asset.get('RAM'):
+            specs.append(f"RAM: {asset['RAM']}GB")
+        if asset.get('Storage'):
+            specs.append(f"Storage: {asset['Storage']}")
+        if asset.get('GPU'):
+            specs.append(f"GPU: {asset['GPU']}")
+        if asset.get('Gen'):
+            specs.append(f"Gen: {asset['Gen']}")
+        if asset.get('Location'):
+            specs.append(f"Loc: {asset['Location']}")
+        
+        specs_str = '<br>'.join(specs[:4]) if specs else 'N/A'  # Limit to 4 lines
+        
+        # Get user info
+        user_info = asset.get('User', 'N/A')
+        
+        # Determine if new or reconditioned
+        is_recond = asset.get('PurchaseType') == 'reconditioned' or asset['DepreciationRate'] in ['60%', '70%', '80%']
+        status_badge = '<span class="recond-badge">RECOND</span>' if is_recond else '<span class="new-badge">NEW</span>'
+        
+        # Format depreciation with remark
+        depreciation_display = f"{asset['DepreciationRate']}<br><small>({asset.get('RemarkCategory', 'N/A')})</small>"
+        
+        html += f"""
                             <tr>
                                 <td><strong>{asset.get('Serial', 'N/A')}</strong></td>
                                 <td>{asset.get('Name', 'N/A')} {status_badge}</td>
@@ -1159,51 +1397,203 @@ def generate_html(groups, group_values, group_counts, all_assets):
                                 <td><span class="value-badge">BDT {asset['CurrentValue']:,.0f}</span></td>
                             </tr>
 """
-            
-            html += """
+    
+    html += """
                         </tbody>
                     </table>
 """
-        
-        html += """
+    return html
+
+HTML_GROUP_END = """
                 </div>
             </div>
 """
-    
-    html += """
+
+HTML_DOCUMENT_END = """
         </div>
     </div>
 </body>
 </html>
 """
+
+def generate_html(groups, group_values, group_counts, all_assets):
+    """Generate HTML report."""
+    
+    total_value = sum(group_values.values())
+    target_value = total_value / len(groups)
+    
+    # Count asset types
+    type_counts = defaultdict(int)
+    for asset in all_assets:
+        type_counts[asset['AssetType']] += 1
+    
+    html = html_document_start(len(all_assets), type_counts, total_value, target_value, list(groups))
+    
+    # Generate sections for each group
+    for group_name in groups:
+        group_assets = groups[group_name]
+        
+        # Count assets by type in this group
+        type_counts_group = defaultdict(int)
+        for asset in group_assets:
+            type_counts_group[asset['AssetType']] += 1
+        
+        html += html_group_start(group_name, len(group_assets), group_values[group_name], target_value, type_counts_group)
+        
+        # Group assets by type
+        assets_by_type = defaultdict(list)
+        for asset in group_assets:
+            assets_by_type[asset['AssetType']].append(asset)
+        
+        # Display each asset type
+        for asset_type in ['Laptop', 'PC', 'Monitor', 'Printer Scaneer', 'Server Room']:
+            if asset_type not in assets_by_type:
+                continue
+            
+            type_assets = sorted(assets_by_type[asset_type], key=lambda x: x['CurrentValue'], reverse=True)
+            html += html_type_table(asset_type, type_assets)
+        
+        html += HTML_GROUP_END
+    
+    html += HTML_DOCUMENT_END
     
     return html
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Value the IT equipment inventory and divide it into equal-value groups.')
+    parser.add_argument('workbooks', nargs='*',
+                        help=f'equipment workbooks to combine, in order (default: {WORKBOOK_PATH!r}); '
+                             'a directory or file of CSV / Parquet / JSON Lines tables can stand in for a workbook')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='parse sheets/workbooks in this many worker processes (default: 1)')
+    parser.add_argument('--stream', action='store_true',
+                        help='bounded-memory mode: stream rows, value them inline and spill records to disk')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='parse every sheet even if an unchanged copy is in the ingestion cache')
+    parser.add_argument('--cache-dir', default='.ingest_cache',
+                        help='directory of the ingestion cache (default: .ingest_cache)')
+    parser.add_argument('--cache-size-mb', type=int, default=256,
+                        help='evict least-recently-used cache entries beyond this size (default: 256)')
+    parser.add_argument('--price-catalog', default=None,
+                        help='price catalog file (default: price_catalog.json next to this script)')
+    parser.add_argument('--groups', type=parse_group_names, default=GROUP_NAMES, metavar='N|NAMES',
+                        help=f'number of groups ({MIN_GROUPS}-{MAX_GROUPS}, named A, B, C, ...) or their '
+                             'comma-separated names (default: A,B,C)')
+    parser.add_argument('--partition', choices=['greedy', 'kk', 'balanced', 'location', 'portfolio'],
+                        default='greedy',
+                        help='partition engine: greedy, kk for Karmarkar-Karp differencing, balanced for '
+                             'value and per-type counts together, location to keep each Location in one '
+                             'group where it can, or portfolio to race several strategies across cores and '
+                             'keep the best (default: greedy)')
+    parser.add_argument('--balance', type=parse_balance_weights, default=None, metavar='WEIGHTS',
+                        help='weights of the balanced engine, e.g. value=1,count=0.5,type_value=0 '
+                             f'(default: {",".join(f"{k}={v:g}" for k, v in BALANCE_WEIGHTS.items())})')
+    parser.add_argument('--location-tolerance', type=float, metavar='SHARE', default=None,
+                        help='spread of the group totals the location engine accepts, as a share of the '
+                             'target (default: 0.01)')
+    parser.add_argument('--portfolio-time', type=float, metavar='SECONDS', default=None,
+                        help='time the portfolio strategies may run (default: 2)')
+    parser.add_argument('--portfolio-jobs', type=int, metavar='N', default=None,
+                        help='worker processes of the portfolio (default: one per CPU)')
+    parser.add_argument('--refine', type=float, metavar='SECONDS', default=None,
+                        help='improve the partition by local search (moves and swaps between groups) '
+                             'for up to SECONDS')
+    parser.add_argument('--anneal', action='store_true',
+                        help='with --refine: spend up to half the time on simulated annealing first')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of --anneal and the portfolio (default: 0)')
+    parser.add_argument('--incremental', nargs='?', const='all_assets_data.json', default=None, metavar='PATH',
+                        help='keep the groups of an earlier run (default: all_assets_data.json), placing only '
+                             'new assets and reassigning as few as needed to rebalance')
+    parser.add_argument('--constraints', default=None, metavar='PATH',
+                        help='JSON file of pinned assets and must-link / cannot-link rules to divide by')
+    parser.add_argument('--watch', type=float, metavar='SECONDS', default=None,
+                        help='keep running, check the price catalog every SECONDS and rewrite the reports '
+                             'when an edit reprices assets')
+    args = parser.parse_args(argv)
+    if args.constraints:
+        # Check the file against the groups now rather than after loading and valuing every asset
+        from group_constraints import load_constraints
+        try:
+            load_constraints(args.constraints, args.groups)
+        except (OSError, ValueError) as e:
+            parser.error(f'--constraints: {e}')
+    return args
+
+def partition_options(args):
+    """Partition options of parsed arguments, for divide_into_groups()."""
+    return {'weights': args.balance, 'location_tolerance': args.location_tolerance,
+            'portfolio_time': args.portfolio_time, 'portfolio_jobs': args.portfolio_jobs, 'refine': args.refine,
+            'anneal': args.anneal, 'seed': args.seed, 'incremental': args.incremental,
+            'constraints': args.constraints}
+
+def main(argv=None):
+    args = parse_args(argv)
     print("Starting asset processing with market-based pricing...")
     
-    # Read all sheets from combined Excel file
-    file_path = 'GTL IT Equipment Information 22 Jan 2026.xlsx'
-    sheet_names = ['Laptop', 'PC', 'Monitor', 'Printer Scaneer', 'Server Room']
-    
-    all_assets = []
+    # Read all sheets from the combined Excel file(s)
+    workbooks = args.workbooks or [WORKBOOK_PATH]
+    sheet_names = SHEET_NAMES
     
-    # Read all sheets
-    for sheet_name in sheet_names:
-        print(f"Reading {sheet_name}...")
-        assets = read_excel_data(file_path, sheet_name)
-        print(f"  Found {len(assets)} {sheet_name}(s)")
-        all_assets.extend(assets)
+    if args.stream:
+        from stream_pipeline import run_streaming
+        if args.jobs > 1:
+            print("  Note: --jobs is ignored in streaming mode")
+        if args.watch:
+            print("  Note: --watch is ignored in streaming mode")
+        for name in ('incremental', 'constraints'):
+            if getattr(args, name):
+                print(f"  Note: --{name} is ignored in streaming mode")
+        options = partition_options(args)
+        del options['incremental'], options['constraints']
+        use_price_catalog(args.price_catalog)
+        group_values = run_streaming(workbooks, sheet_names, engine=args.partition, group_names=args.groups, **options)
+        print("\nProcessing complete!")
+        print("   - Generated index.html")
+        print("   - Generated all_assets_data.json")
+        print("   - Generated all_assets_final.json")
+        print(f"\nTotal Value: BDT {sum(group_values.values()):,.2f}")
+        for group_name, group_value in group_values.items():
+            print(f"Group {group_name}: BDT {group_value:,.2f}")
+        return
     
-    print(f"\nTotal assets loaded: {len(all_assets)}")
+    cache = None
+    use_price_catalog(args.price_catalog, None if args.no_cache else args.cache_dir)
+    if not args.no_cache:
+        from ingest_cache import IngestCache
+        cache = IngestCache(args.cache_dir, args.cache_size_mb * 1024 * 1024)
+    all_assets = load_assets(workbooks, sheet_names, jobs=args.jobs, cache=cache)
+    write_reports(all_assets, engine=args.partition, group_names=args.groups, **partition_options(args))
     
+    if args.watch:
+        watch_price_catalog(all_assets, args.watch, engine=args.partition, group_names=args.groups,
+                            **partition_options(args))
+
+def write_reports(all_assets, revalue=True, engine='greedy', group_names=GROUP_NAMES, **options):
+    """Group the assets and write index.html, all_assets_data.json and all_assets_final.json."""
     # Divide into groups
-    print("\nDividing assets into 3 groups...")
-    groups, group_values, group_counts = divide_into_groups(all_assets)
+    print(f"\nDividing assets into {len(group_names)} groups...")
+    groups, group_values, group_counts = divide_into_groups(all_assets, revalue=revalue, engine=engine,
+                                                            group_names=group_names, **options)
+    if engine != 'greedy' or options.get('refine') or options.get('incremental') or options.get('constraints'):
+        label = ('constraints' if options.get('constraints') else 'incremental' if options.get('incremental')
+                 else engine + (' + refine' if options.get('refine') else ''))
+        locations = labels = None
+        if engine == 'location':
+            group_of = {id(asset): g for g, group_name in enumerate(group_names) for asset in groups[group_name]}
+            labels = [group_of[id(asset)] for asset in all_assets]
+            locations = [asset.get('Location') for asset in all_assets]
+        print_partition_comparison([asset['CurrentValue'] for asset in all_assets], list(group_values.values()), label,
+                                   [asset['AssetType'] for asset in all_assets], list(group_counts.values()),
+                                   locations, labels)
+    catalog = get_price_catalog()
+    print(f"  Price catalog {catalog.version} ({len(catalog)} models, {catalog.path})")
+    valuations = valuation_cache.VALUATION_CACHE
+    if valuations is not None and valuations.hits + valuations.misses:
+        print(f"  {valuations.summary()}")
     
     # Display results
     print("\nGroup Distribution:")
-    for group_name in ['A', 'B', 'C']:
+    for group_name in group_names:
         print(f"\nGroup {group_name}:")
         print(f"  Total Assets: {len(groups[group_name])}")
         print(f"  Total Value: BDT {group_values[group_name]:,.2f}")
@@ -1215,16 +1605,11 @@ def main():
     # all_assets_data.json
     output_data = {
         'groups': {},
-        'pricing_methodology': {
-            'description': 'Market-based pricing with depreciation',
-            'new_asset_depreciation': '30%',
-            'reconditioned_asset_depreciation': '60%',
-            'market_price_date': 'January 2026'
-        }
+        'pricing_methodology': PRICING_METHODOLOGY,
     }
-    for group_name in ['A', 'B', 'C']:
+    for group_name in group_names:
         output_data['groups'][group_name] = {
-            'assets': groups[group_name],
+            'assets': [public_fields(asset) for asset in groups[group_name]],
             'total_value': group_values[group_name],
             'count': len(groups[group_name])
         }
@@ -1234,7 +1619,7 @@ def main():
     
     # all_assets_final.json
     with open('all_assets_final.json', 'w', encoding='utf-8') as f:
-        json.dump(all_assets, f, indent=2, ensure_ascii=False)
+        json.dump([public_fields(asset) for asset in all_assets], f, indent=2, ensure_ascii=False)
     
     # Generate HTML
     print("\nGenerating HTML report...")
@@ -1248,9 +1633,70 @@ def main():
     print("   - Generated all_assets_data.json")
     print("   - Generated all_assets_final.json")
     print(f"\nTotal Value: BDT {sum(group_values.values()):,.2f}")
-    print(f"Group A: BDT {group_values['A']:,.2f}")
-    print(f"Group B: BDT {group_values['B']:,.2f}")
-    print(f"Group C: BDT {group_values['C']:,.2f}")
+    for group_name in group_names:
+        print(f"Group {group_name}: BDT {group_values[group_name]:,.2f}")
+
+
+def print_incremental_changes(assets, changes, names, path):
+    """Print what incremental re-partitioning kept, placed and reassigned."""
+    print(f"  Kept the groups of {changes['kept']} asset(s) from {path} ({changes['revalued']} revalued), "
+          f"placed {changes['added']} new, {changes['removed']} removed")
+    print(f"  {len(changes['moves'])} reassignment(s) to rebalance" + (':' if changes['moves'] else ''))
+    for i, old, new in changes['moves']:
+        asset = assets[i]
+        print(f"    {asset['AssetType']} {asset.get('Serial')} ({asset.get('Name', '')} {asset.get('Model', '')}".rstrip()
+              + f"): Group {names[old]} -> Group {names[new]}")
+
+def print_partition_comparison(values, totals, engine, asset_types=None, group_counts=None, locations=None,
+                               labels=None):
+    """Print the variance of the group totals from engine next to greedy's on the same values.
+    
+    Given the asset types and each group's {asset type: count}, the per-type
+    count skew (most minus fewest in a group) is compared too, and given each
+    asset's location and group index, how far locations are scattered.
+    """
+    from partitioning import count_skew, location_codes, location_scatter, partition_variance, type_counts
+    _, greedy_labels, _, greedy_totals = assign_groups(values, len(totals))
+    print(f"  Partition engine {engine}: variance {partition_variance(totals):,.2f}, "
+          f"spread BDT {max(totals) - min(totals):,.2f} "
+          f"(greedy: variance {partition_variance(greedy_totals):,.2f}, "
+          f"spread BDT {max(greedy_totals) - min(greedy_totals):,.2f})")
+    if asset_types is not None:
+        greedy_skew = count_skew(type_counts(greedy_labels, asset_types, len(totals)))
+        skew = count_skew({asset_type: [counts.get(asset_type, 0) for counts in group_counts]
+                           for asset_type in greedy_skew})
+        print("  Count skew per type: " + ', '.join(f"{asset_type} {skew[asset_type]} (greedy: {greedy_skew[asset_type]})"
+                                                    for asset_type in greedy_skew))
+    if locations is not None:
+        codes, names = location_codes(locations)
+        split, away = location_scatter(codes, labels, len(totals))
+        greedy_split, greedy_away = location_scatter(codes, greedy_labels, len(totals))
+        print(f"  Locations split between groups: {split} of {len(names)} (greedy: {greedy_split}), "
+              f"assets away from their location's main group: {away} (greedy: {greedy_away})")
+
+def watch_price_catalog(all_assets, interval, engine='greedy', group_names=GROUP_NAMES, **options):
+    """Poll the price catalog and rewrite the reports whenever a change reprices assets."""
+    print(f"\nWatching {get_price_catalog().path} for changes (Ctrl-C to stop)...")
+    last_error = None
+    try:
+        while True:
+            time.sleep(interval)
+            try:
+                revalued = reload_price_catalog(all_assets)
+            except (OSError, ValueError, KeyError) as e:
+                # Usually a save in progress; warn once per distinct problem
+                if str(e) != last_error:
+                    print(f"  Warning: Could not reload the price catalog, keeping the previous one: {e}")
+                last_error = str(e)
+                continue
+            last_error = None
+            if revalued is None:
+                continue
+            print(f"\nPrice catalog changed to {get_price_catalog().version}: revalued {len(revalued)} asset(s)")
+            if revalued:
+                write_reports(all_assets, revalue=False, engine=engine, group_names=group_names, **options)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,199 @@
+"""What-if valuations: many pricing and depreciation policies evaluated at once.
+
+A scenario is a dict (a JSON object in a scenarios file) with a ``name`` and
+any of these policy changes:
+    market_prices      - {asset type: {catalog key: price}} added to or replacing catalog entries
+    price_factor       - {asset type: factor} scaling market prices
+    depreciation       - new multipliers: "normal" / "reconditioned" as four values
+                         (excellent, good, moderate, no keyword), "proliant" /
+                         "special_serial" as one
+    depreciation_delta - {asset type: points} taken off the value multiplier,
+                         e.g. 0.10 when laptops depreciate 10% more
+    multiplier         - {asset type: multiplier} replacing the depreciation outright,
+                         e.g. 0.5 to value servers at 50%
+In the per-type maps "*" stands for every type not listed.
+
+Assets are classified and priced once (see batch_valuation.depreciation_classes).
+Each scenario then only re-indexes its own multiplier table and price vector,
+giving a scenarios x assets matrix of values. Every row is divided into groups
+by the assign_groups() greedy, run in lockstep across scenarios and split over
+worker processes with ``jobs`` > 1.
+
+    python scenarios.py SCENARIOS.json [workbooks ...] [--jobs N] [--output CSV]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from batch_valuation import (
+    DEPRECIATION_TABLES, NORMAL, PROLIANT, RECONDITIONED, SPECIAL_SERIAL, assets_frame, depreciation_classes,
+    market_prices,
+)
+from price_catalog import PriceCatalog
+from process_assets import (
+    GROUP_NAMES, SHEET_NAMES, WORKBOOK_PATH, assign_groups, get_price_catalog, load_assets, parse_group_names,
+    partition_names, use_price_catalog,
+)
+
+SCENARIO_KEYS = {'name', 'market_prices', 'price_factor', 'depreciation', 'depreciation_delta', 'multiplier'}
+
+# Scenarios per block from which the greedy runs in lockstep across them
+LOCKSTEP_MIN_SCENARIOS = 8
+
+
+def load_scenarios(path):
+    """Scenarios from a JSON file holding a list of them (or {"scenarios": [...]})."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    scenarios = data['scenarios'] if isinstance(data, dict) else data
+    for i, scenario in enumerate(scenarios):
+        unknown = set(scenario) - SCENARIO_KEYS
+        if unknown:
+            raise ValueError(f"Scenario {scenario.get('name', i)!r}: unknown key(s) {', '.join(sorted(unknown))}")
+    return scenarios
+
+
+def _per_type(mapping, asset_types, default):
+    """A per-type scenario setting as an array over asset_types."""
+    mapping = mapping or {}
+    return np.array([mapping.get(asset_type, mapping.get('*', default)) for asset_type in asset_types], dtype=float)
+
+
+def scenario_catalog(catalog, overrides):
+    """A copy of catalog with {asset type: {catalog key: price}} merged into its market prices."""
+    prices = {asset_type: dict(entries) for asset_type, entries in catalog.data['market_prices'].items()}
+    for asset_type, entries in overrides.items():
+        prices.setdefault(asset_type, {}).update(entries)
+    return PriceCatalog(dict(catalog.data, market_prices=prices))
+
+
+def scenario_multipliers(depreciation=None):
+    """Value multipliers [class][condition] (see DEPRECIATION_TABLES) with a scenario's changes."""
+    table = np.array(DEPRECIATION_TABLES, dtype=object)[:, :, 0].astype(float)
+    depreciation = depreciation or {}
+    for name, row in (('normal', NORMAL), ('reconditioned', RECONDITIONED), ('proliant', PROLIANT),
+                      ('special_serial', SPECIAL_SERIAL)):
+        if name in depreciation:
+            table[row] = depreciation[name]
+    return table
+
+
+def scenario_values(assets, scenarios, catalog=None):
+    """Scenarios x assets matrix of current values, rounded to 2 places."""
+    if catalog is None:
+        catalog = get_price_catalog()
+    frame, flags = assets_frame(assets)
+    classes, conditions = depreciation_classes(frame, flags)
+    type_codes, asset_types = pd.factorize(frame['AssetType'])
+    base_prices = market_prices(frame, catalog).astype(float)
+
+    repriced = {}
+    values = np.empty((len(scenarios), len(assets)))
+    for s, scenario in enumerate(scenarios):
+        prices = base_prices
+        if scenario.get('market_prices'):
+            key = json.dumps(scenario['market_prices'], sort_keys=True)
+            if key not in repriced:
+                repriced[key] = market_prices(frame, scenario_catalog(catalog, scenario['market_prices'])).astype(float)
+            prices = repriced[key]
+        prices = prices * _per_type(scenario.get('price_factor'), asset_types, 1.0)[type_codes]
+
+        multipliers = scenario_multipliers(scenario.get('depreciation'))[classes, conditions]
+        delta = _per_type(scenario.get('depreciation_delta'), asset_types, 0.0)[type_codes]
+        multipliers = np.maximum(multipliers - delta, 0.0)
+        fixed = _per_type(scenario.get('multiplier'), asset_types, np.nan)[type_codes]
+        multipliers = np.where(np.isnan(fixed), multipliers, fixed)
+        values[s] = np.round(prices * multipliers, 2)
+    return values
+
+
+def _group_block(values, group_count=len(GROUP_NAMES)):
+    """Final assign_groups() totals and asset counts for each row of values.
+
+    With enough rows the greedy runs in lockstep: every step hands each
+    scenario its next largest value, so the Python loop is over assets rather
+    than assets x scenarios. Sums and tie-breaks are the same as assign_groups().
+    """
+    if len(values) < LOCKSTEP_MIN_SCENARIOS:
+        totals = np.empty((len(values), group_count))
+        counts = np.empty((len(values), group_count), dtype=np.int64)
+        for s, row in enumerate(values):
+            _, labels, _, group_totals = assign_groups(row, group_count)
+            totals[s] = group_totals
+            counts[s] = np.bincount(labels, minlength=group_count)
+        return totals, counts
+
+    ordered = -np.sort(-values, axis=1, kind='stable')
+    rows = np.arange(len(values))
+    totals = np.zeros((len(values), group_count))
+    counts = np.zeros((len(values), group_count), dtype=np.int64)
+    for column in ordered.T:
+        group = totals.argmin(axis=1)
+        totals[rows, group] += column
+        counts[rows, group] += 1
+    return totals, counts
+
+
+def group_scenarios(values, jobs=1, group_count=len(GROUP_NAMES)):
+    """Divide the assets into groups under every scenario: (totals, counts), scenarios x groups."""
+    if jobs > 1 and len(values) > 1:
+        # One block per worker, so each still runs its scenarios in lockstep
+        blocks = np.array_split(values, min(len(values), jobs))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_group_block, blocks, [group_count] * len(blocks)))
+        return np.concatenate([totals for totals, _ in results]), np.concatenate([counts for _, counts in results])
+    return _group_block(values, group_count)
+
+
+def run_scenarios(assets, scenarios, catalog=None, jobs=1, group_names=GROUP_NAMES):
+    """Value and group the assets under every scenario; one report row per scenario.
+
+    Columns are the total value, its change from the first scenario, the group
+    totals, the spread between the largest and smallest group and the variance
+    of the group totals.
+    """
+    values = scenario_values(assets, scenarios, catalog)
+    totals, _ = group_scenarios(values, jobs, len(group_names))
+    report = pd.DataFrame(totals, columns=partition_names(group_names),
+                          index=[scenario.get('name', f'scenario {i + 1}') for i, scenario in enumerate(scenarios)])
+    report = report[group_names]
+    report.insert(0, 'Total', totals.sum(axis=1))
+    report.insert(1, 'Change', report['Total'] - report['Total'].iloc[0])
+    report['Spread'] = totals.max(axis=1) - totals.min(axis=1)
+    report['Variance'] = totals.var(axis=1)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Value and divide the inventory under many what-if policies.')
+    parser.add_argument('scenarios', help='JSON file with a list of scenarios')
+    parser.add_argument('workbooks', nargs='*',
+                        help=f'Excel workbooks or table sources to read (default: {WORKBOOK_PATH!r})')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='divide scenarios in this many worker processes (default: 1)')
+    parser.add_argument('--groups', type=parse_group_names, default=GROUP_NAMES, metavar='N|NAMES',
+                        help='number of groups or their comma-separated names (default: A,B,C)')
+    parser.add_argument('--price-catalog', default=None,
+                        help='price catalog file (default: price_catalog.json next to process_assets.py)')
+    parser.add_argument('--output', default=None, help='also write the report to this CSV file')
+    args = parser.parse_args(argv)
+
+    use_price_catalog(args.price_catalog)
+    scenarios = [{'name': 'baseline'}] + load_scenarios(args.scenarios)
+    assets = load_assets(args.workbooks or [WORKBOOK_PATH], SHEET_NAMES)
+
+    start = time.perf_counter()
+    report = run_scenarios(assets, scenarios, jobs=args.jobs, group_names=args.groups)
+    print(f"\n{len(scenarios)} scenario(s) x {len(assets)} assets in {time.perf_counter() - start:.3f}s:")
+    print(report.map(lambda value: f"{value:,.0f}").to_string())
+    if args.output:
+        report.to_csv(args.output, index_label='Scenario')
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""Bounded-memory variant of the asset pipeline for very large inventories.
+
+Asset records are streamed sheet by sheet, valued as they arrive and spilled to a
+temporary JSON Lines file. Only the fields the grouping needs (value, asset type,
+location and the record's position in the spill file) are kept in memory, in
+compact arrays. The output files are then written by reading records back from the spill,
+one group or asset type at a time, and match the in-memory pipeline byte for byte.
+"""
+import json
+import os
+import tempfile
+import time
+from array import array
+from collections import defaultdict
+
+import numpy as np
+
+import valuation_cache
+from asset_formats import is_table_source, stream_table_data
+from partitioning import partition
+from process_assets import (
+    GROUP_NAMES, HTML_DOCUMENT_END, HTML_GROUP_END, PRICING_METHODOLOGY, html_document_start, html_group_start,
+    html_type_table, partition_names, print_partition_comparison, public_fields, stream_excel_data, value_asset,
+)
+
+# Asset types in report order; other types are counted but not listed in the HTML
+REPORT_TYPES = ['Laptop', 'PC', 'Monitor', 'Printer Scaneer', 'Server Room']
+
+
+def _indented_json(value, level):
+    """json.dumps(value, indent=2) as it appears nested ``level`` levels deep."""
+    pad = '  ' * level
+    return pad + json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + pad)
+
+
+def _write_json_list(f, items, level):
+    """Write an iterable of objects as a JSON list nested ``level`` levels deep."""
+    first = True
+    for item in items:
+        f.write('[\n' if first else ',\n')
+        f.write(_indented_json(item, level + 1))
+        first = False
+    f.write('[]' if first else '\n' + '  ' * level + ']')
+
+
+class _Spill:
+    """Valued asset records on disk plus the compact columns kept in memory."""
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.offsets = array('q')
+        self.values = array('d')
+        self.type_codes = array('H')
+        self.type_names = []
+        self._type_index = {}
+        self.location_codes = array('I')
+        self.location_names = []
+        self._location_index = {}
+
+    def append(self, asset):
+        self.offsets.append(self.file.tell())
+        self.file.write(json.dumps(public_fields(asset), ensure_ascii=False).encode('utf-8') + b'\n')
+        self.values.append(asset['CurrentValue'])
+        asset_type = asset['AssetType']
+        if asset_type not in self._type_index:
+            self._type_index[asset_type] = len(self.type_names)
+            self.type_names.append(asset_type)
+        self.type_codes.append(self._type_index[asset_type])
+        location = asset.get('Location')
+        if location not in self._location_index:
+            self._location_index[location] = len(self.location_names)
+            self.location_names.append(location)
+        self.location_codes.append(self._location_index[location])
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def read(self, indices):
+        """Yield the records at the given positions, in that order."""
+        for i in indices:
+            self.file.seek(self.offsets[i])
+            yield json.loads(self.file.readline())
+
+    def close(self):
+        self.file.close()
+
+
+def run_streaming(workbooks, sheet_names, output_dir='.', engine='greedy', group_names=GROUP_NAMES, **options):
+    """Read, value and group workbooks with memory bounded by the compact columns.
+
+    Writes index.html, all_assets_data.json and all_assets_final.json like the
+    regular pipeline and returns the group totals. ``engine`` is the partition
+    engine and ``options`` go to partitioning.partition().
+    """
+    spill = _Spill()
+    try:
+        load_start = time.perf_counter()
+        for file_path in workbooks:
+            for sheet_name in sheet_names:
+                print(f"Streaming {file_path}: {sheet_name}..." if len(workbooks) > 1 else f"Streaming {sheet_name}...")
+                sheet_start = time.perf_counter()
+                count = 0
+                stream = stream_table_data if is_table_source(file_path) else stream_excel_data
+                for asset in stream(file_path, sheet_name):
+                    spill.append(value_asset(asset))
+                    count += 1
+                print(f"  Found {count} {sheet_name}(s) in {time.perf_counter() - sheet_start:.3f}s")
+        spill.file.flush()
+
+        columns = (spill.offsets, spill.values, spill.type_codes, spill.location_codes)
+        compact_bytes = sum(column.itemsize * len(column) for column in columns)
+        print(f"\nTotal assets loaded: {len(spill)} in {time.perf_counter() - load_start:.3f}s")
+        if valuation_cache.VALUATION_CACHE is not None:
+            print(f"  {valuation_cache.VALUATION_CACHE.summary()}")
+        print(f"  Kept in memory: {compact_bytes / 1e6:.1f} MB (spill file {spill.file.tell() / 1e6:.1f} MB)")
+
+        # Partition the compact value column, then name the groups in reverse (see partition_names)
+        print(f"\nDividing assets into {len(group_names)} groups...")
+        values = np.frombuffer(spill.values, dtype=float)
+        type_codes = np.frombuffer(spill.type_codes, dtype=np.uint16)
+        asset_types = np.array(spill.type_names, dtype=object)[type_codes]
+        locations = None
+        if engine == 'location':
+            location_codes = np.frombuffer(spill.location_codes, dtype=np.uint32)
+            locations = np.array(spill.location_names, dtype=object)[location_codes]
+        order, labels, running, totals = partition(values, len(group_names), engine, asset_types, locations=locations,
+                                                   **options)
+        final_index = [group_names.index(name) for name in partition_names(group_names)]
+        labels = np.asarray(final_index, dtype=np.int32)[labels]
+        group_values = {group_names[final_index[g]]: total for g, total in enumerate(totals)}
+        group_values = {name: group_values[name] for name in group_names}
+
+        members = {}
+        group_counts = {}
+        for g, group_name in enumerate(group_names):
+            members[group_name] = order[labels[order] == g]
+            counts = defaultdict(int)
+            for code in type_codes[members[group_name]].tolist():
+                counts[spill.type_names[code]] += 1
+            group_counts[group_name] = counts
+        if engine != 'greedy' or options.get('refine'):
+            label = engine + (' + refine' if options.get('refine') else '')
+            print_partition_comparison(values, list(group_values.values()), label, asset_types.tolist(),
+                                       list(group_counts.values()), locations, labels)
+
+        print("\nGroup Distribution:")
+        for group_name in group_names:
+            print(f"\nGroup {group_name}:")
+            print(f"  Total Assets: {len(members[group_name])}")
+            print(f"  Total Value: BDT {group_values[group_name]:,.2f}")
+            print(f"  Asset Types: {dict(group_counts[group_name])}")
+
+        def allocated(indices):
+            for i, asset in zip(indices, spill.read(indices)):
+                group_name = group_names[labels[i]]
+                asset['AllocationRemark'] = f"Assigned to balance total value (Group {group_name}: BDT {running[i]:,.0f})"
+                yield asset
+
+        print("\nGenerating JSON files...")
+        with open(os.path.join(output_dir, 'all_assets_data.json'), 'w', encoding='utf-8') as f:
+            f.write('{\n  "groups": {\n')
+            for g, group_name in enumerate(group_names):
+                f.write(f'    {json.dumps(group_name, ensure_ascii=False)}: {{\n      "assets": ')
+                _write_json_list(f, allocated(members[group_name].tolist()), 3)
+                f.write(f',\n      "total_value": {json.dumps(group_values[group_name])},\n')
+                f.write(f'      "count": {len(members[group_name])}\n    }}')
+                f.write(',\n' if g < len(group_names) - 1 else '\n')
+            f.write('  },\n  "pricing_methodology": ')
+            f.write(_indented_json(PRICING_METHODOLOGY, 1).lstrip())
+            f.write('\n}')
+
+        with open(os.path.join(output_dir, 'all_assets_final.json'), 'w', encoding='utf-8') as f:
+            _write_json_list(f, allocated(range(len(spill))), 0)
+
+        # The HTML report is written one asset type of one group at a time
+        print("\nGenerating HTML report...")
+        total_value = sum(group_values.values())
+        target_value = total_value / len(group_names)
+        type_counts = defaultdict(int)
+        for code, count in zip(*np.unique(type_codes, return_counts=True)):
+            type_counts[spill.type_names[code]] = int(count)
+
+        with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(html_document_start(len(spill), type_counts, total_value, target_value, group_names))
+            for group_name in group_names:
+                group_members = members[group_name]
+                f.write(html_group_start(group_name, len(group_members), group_values[group_name],
+                                         target_value, group_counts[group_name]))
+                for asset_type in REPORT_TYPES:
+                    if asset_type not in spill.type_names:
+                        continue
+                    code = spill.type_names.index(asset_type)
+                    type_members = group_members[type_codes[group_members] == code]
+                    if not len(type_members):
+                        continue
+                    type_assets = sorted(allocated(type_members.tolist()), key=lambda x: x['CurrentValue'], reverse=True)
+                    f.write(html_type_table(asset_type, type_assets))
+                f.write(HTML_GROUP_END)
+            f.write(HTML_DOCUMENT_END)
+
+        return group_values
+    finally:
+        spill.close()
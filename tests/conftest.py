@@ -0,0 +1,18 @@
+"""Make the repository's modules importable from the tests, and share the inventory."""
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+
+@pytest.fixture(scope='session')
+def inventory():
+    """The valued assets of the inventory workbook (copy before changing them)."""
+    from batch_valuation import value_assets
+    from process_assets import SHEET_NAMES, WORKBOOK_PATH, load_assets
+    if not (REPO / WORKBOOK_PATH).exists():
+        pytest.skip('inventory workbook not available')
+    return value_assets(load_assets([str(REPO / WORKBOOK_PATH)], SHEET_NAMES))
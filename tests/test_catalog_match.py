@@ -0,0 +1,46 @@
+"""Fuzzy catalog matches must agree with the asset on model numbers and processor tier."""
+import pytest
+
+from catalog_match import NgramIndex, processor_tier
+from price_catalog import load_price_catalog
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return load_price_catalog()
+
+
+def laptop(model, processor=None, name='DELL'):
+    asset = {'AssetType': 'Laptop', 'Name': name, 'Model': model, 'PurchaseType': 'new'}
+    if processor is not None:
+        asset['Processor'] = processor
+    return asset
+
+
+@pytest.mark.parametrize('text, tier', [
+    ('i5', 'i5'), ('Core i7-1165G7', 'i7'), ('Intel(R) Core(TM) i3', 'i3'), ('AMD Ryzen 5 5500U', 'ryzen5'),
+    ('i5 11th gen', 'i5'), ('Desktop i9 Gen 13', 'i9'), ('Dual Core', None), ('Xeon Silver 4310', None),
+    ('HP 15s-fq5317TU', None), ('', None),
+])
+def test_processor_tier(text, tier):
+    assert processor_tier(text) == tier
+
+
+def test_model_numbers_must_agree():
+    index = NgramIndex(['HP 440-G4 recond', 'HP 440-G2'])
+    assert index.match('440 G2', 0.3)[0] == 'HP 440-G2'
+    assert index.match('440 G3', 0.3) == (None, 0.0)
+
+
+def test_same_tier_takes_the_fuzzy_match(catalog):
+    assert catalog.lookup(laptop('Inspiron 3511', 'i5')) == ((75000, 75000), ('key', 'Dell Inspiron 3511'))
+    # Without a processor there is nothing to disagree with
+    assert catalog.lookup(laptop('Inspiron 3511'))[1] == ('key', 'Dell Inspiron 3511')
+
+
+def test_other_tier_falls_back_to_the_rules(catalog):
+    price, entry = catalog.lookup(laptop('Inspiron 3511', 'i3'))
+    assert entry[0] == 'rule'
+    assert price == (50000, 32000)
+    assert catalog.price(laptop('Inspiron 3511', 'i3')) == 50000
+
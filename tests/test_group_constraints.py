@@ -0,0 +1,125 @@
+"""Pinned, must-link and cannot-link constraints, and the checks on a constraints file."""
+import json
+from pathlib import Path
+
+import pytest
+
+from group_constraints import constrained_partition, load_constraints, must_link_sets
+from process_assets import parse_args
+
+NAMES = ['A', 'B', 'C']
+SHIPPED = Path(__file__).resolve().parent.parent / 'constraints.json'
+
+
+def make_assets():
+    """Twelve laptops and monitors with users and rooms, worth 1000 down to 890."""
+    users = ['Rahim', 'Karim', 'Rahim', 'In Stock', 'Nila', 'In Stock', 'Karim', 'Nila', 'Sumi', 'Rahim', 'Sumi', 'Tara']
+    return [{'AssetType': 'Laptop' if i % 2 else 'Monitor', 'Serial': i, 'Name': f'Device {i}', 'User': user,
+             'Location': 'Server Room' if i < 3 else 'Office', 'CurrentValue': 1000.0 - 10 * i}
+            for i, user in enumerate(users)]
+
+
+def divide(assets, constraints):
+    labels, report = constrained_partition(assets, [asset['CurrentValue'] for asset in assets], NAMES, constraints)
+    return [NAMES[label] for label in labels.tolist()], report
+
+
+def write(tmp_path, constraints):
+    path = tmp_path / 'constraints.json'
+    path.write_text(json.dumps(constraints), encoding='utf-8')
+    return str(path)
+
+
+def test_pins():
+    assets = make_assets()
+    groups, report = divide(assets, {'pinned': [{'match': {'Location': 'server room'}, 'group': 'C'},
+                                                {'match': {'Serial': 7}, 'group': 'A'}]})
+    assert [groups[i] for i in range(3)] == ['C'] * 3  # Case-insensitive substring
+    assert groups[7] == 'A'
+    assert report['pinned'] == 4 and report['broken'] == []
+
+
+def test_must_link_and_ignore_list():
+    assets = make_assets()
+    groups, report = divide(assets, {'must_link': ['User'], 'must_link_ignore': ['in stock']})
+    for user in ('Rahim', 'Karim', 'Nila', 'Sumi'):
+        assert len({group for group, asset in zip(groups, assets) if asset['User'] == user}) == 1
+    # "In Stock" links nothing: those two assets are sets of their own
+    sets = must_link_sets(assets, ['User'], ['In Stock'])[0]
+    assert sets[3] != sets[5]
+    assert report['sets'] == 4 and report['linked'] == 9
+
+
+def test_cannot_link():
+    assets = make_assets()
+    unconstrained = divide(assets, {})[0]
+    assert unconstrained[0] == unconstrained[5] and unconstrained[1] == unconstrained[7]
+    constraints = {'cannot_link': [[{'Serial': 0}, {'Serial': 5}], [{'AssetType': 'Laptop', 'User': 'Karim'},
+                                                                     {'AssetType': 'Laptop', 'User': 'Nila'}]]}
+    groups, report = divide(assets, constraints)
+    assert groups[0] != groups[5]
+    assert groups[1] != groups[7]
+    assert report['broken'] == [] and report['cannot_link'] == 2
+
+
+def test_constraints_together_stay_balanced():
+    assets = make_assets()
+    groups, report = divide(assets, {'pinned': [{'match': {'Serial': 0}, 'group': 'B'}], 'must_link': ['User'],
+                                     'must_link_ignore': ['In Stock'],
+                                     'cannot_link': [[{'User': 'Rahim'}, {'User': 'Sumi'}]]})
+    assert groups[0] == groups[2] == groups[9] == 'B'
+    assert groups[8] != 'B' and groups[10] != 'B'
+    totals = [sum(asset['CurrentValue'] for group, asset in zip(groups, assets) if group == name) for name in NAMES]
+    assert max(totals) - min(totals) == pytest.approx(report['spread'])
+    assert report['spread'] <= 1000
+
+
+def test_conflicts_are_reported_not_raised():
+    assets = make_assets()
+    groups, report = divide(assets, {'pinned': [{'match': {'Serial': 0}, 'group': 'A'},
+                                                {'match': {'Serial': 2}, 'group': 'B'}],
+                                     'must_link': ['User'],
+                                     'cannot_link': [[{'Serial': 1}, {'Serial': 6}]]})
+    assert groups[0] == groups[2] == 'A'
+    assert any('conflicts with pin #1' in message for message in report['broken'])
+    assert any('cannot-link #1' in message for message in report['broken'])  # Karim's laptops are linked
+
+
+def test_pins_over_the_target_limit_the_balance():
+    assets = make_assets()
+    _, report = divide(assets, {'pinned': [{'match': {'AssetType': 'Laptop'}, 'group': 'A'}]})
+    assert any('over the BDT' in message for message in report['limits'])
+    assert report['spread'] > report['unconstrained_spread']
+
+
+def test_shipped_constraints_hold_on_the_inventory(inventory):
+    values = [asset['CurrentValue'] for asset in inventory]
+    labels, report = constrained_partition(inventory, values, NAMES, load_constraints(SHIPPED, NAMES))
+    assert report['broken'] == [] and report['limits'] == []
+    assert len({labels[i] for i, asset in enumerate(inventory) if asset['AssetType'] == 'Server Room'}) == 1
+    assert report['spread'] <= report['unconstrained_spread']
+
+
+@pytest.mark.parametrize('constraints, groups, message', [
+    ({'pinned': [{'match': {'AssetType': 'PC'}, 'group': 'A'}]}, 'X,Y,Z', "names group 'A', not one of X, Y, Z"),
+    ({'pinned': [{'match': {'AssetType': 'PC'}, 'group': 'D'}]}, '3', "names group 'D'"),
+    ({'pinned': [{'group': 'A'}]}, '3', 'pin #1 needs a "match" selector'),
+    ({'cannot_link': [[{'Serial': 1}]]}, '3', 'cannot-link #1 must be a pair'),
+    ({'must_link': ['User'], 'pinning': []}, '3', 'unknown constraint key(s) pinning'),
+])
+def test_bad_constraints_are_argument_errors(tmp_path, capsys, constraints, groups, message):
+    with pytest.raises(SystemExit) as exit_info:
+        parse_args(['--constraints', write(tmp_path, constraints), '--groups', groups])
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_missing_constraints_file_is_an_argument_error(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(['--constraints', str(tmp_path / 'missing.json')])
+    assert 'No such file' in capsys.readouterr().err
+
+
+def test_good_constraints_pass_the_argument_check(tmp_path):
+    path = write(tmp_path, {'pinned': [{'match': {'AssetType': 'PC'}, 'group': 'B'}]})
+    assert parse_args(['--constraints', path]).constraints == path
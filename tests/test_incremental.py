@@ -0,0 +1,83 @@
+"""Incremental re-partitioning keeps earlier groups and only moves what rebalancing needs."""
+import json
+
+import numpy as np
+import pytest
+
+from partitioning import (
+    REBALANCE_TOLERANCE, _move_member, _sorted_members, asset_keys, incremental_partition, load_previous_assignment,
+)
+from process_assets import GROUP_NAMES, divide_into_groups, partition_names, public_fields
+
+
+def write_previous(tmp_path, assets):
+    """all_assets_data.json of a greedy division of the assets, as process_assets.py writes it."""
+    groups = divide_into_groups([dict(asset) for asset in assets], revalue=False)[0]
+    path = tmp_path / 'all_assets_data.json'
+    path.write_text(json.dumps({'groups': {name: {'assets': [public_fields(asset) for asset in members]}
+                                           for name, members in groups.items()}}), encoding='utf-8')
+    return str(path)
+
+
+def test_small_change_keeps_unchanged_assets_in_place(tmp_path, inventory):
+    path = write_previous(tmp_path, inventory)
+    previous = load_previous_assignment(path)
+    # Two assets retired, one revalued and a new laptop bought
+    assets = [dict(asset) for asset in inventory if asset['Serial'] not in (5, 6) or asset['AssetType'] != 'Monitor']
+    assets[0]['CurrentValue'] += 1000
+    assets.append({'AssetType': 'Laptop', 'Serial': 999, 'Name': 'New laptop', 'Model': 'X1', 'CurrentValue': 70000.0})
+    names = partition_names(GROUP_NAMES)
+    values = [asset['CurrentValue'] for asset in assets]
+    keys = asset_keys(assets)
+
+    labels, changes = incremental_partition(values, keys, previous, names)
+    assert (changes['kept'], changes['added'], changes['revalued'], changes['removed']) == (len(assets) - 1, 1, 1, 2)
+    moved = {i for i, _, _ in changes['moves']}
+    for i, key in enumerate(keys[:-1]):
+        if i not in moved:
+            assert names[labels[i]] == previous[key][0]
+    assert len(moved) <= 4
+    totals = np.bincount(labels, weights=values, minlength=len(names))
+    assert np.abs(totals - totals.mean()).max() <= REBALANCE_TOLERANCE * sum(values) / len(names)
+
+
+def test_unchanged_inventory_moves_nothing(tmp_path, inventory):
+    path = write_previous(tmp_path, inventory)
+    previous = load_previous_assignment(path)
+    values = [asset['CurrentValue'] for asset in inventory]
+    keys = asset_keys(inventory)
+    labels, changes = incremental_partition(values, keys, previous, partition_names(GROUP_NAMES))
+    assert changes['moves'] == [] and changes['added'] == changes['removed'] == 0
+    assert [partition_names(GROUP_NAMES)[label] for label in labels.tolist()] == [previous[key][0] for key in keys]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_rebalancing_after_removals(seed):
+    rng = np.random.default_rng(seed)
+    names = list('ABCD')
+    values = np.round(rng.uniform(100, 200, 20000), 2)
+    start = rng.integers(0, 4, len(values))
+    previous = {('asset', i): (names[start[i]], values[i]) for i in range(len(values))}
+    # Group A loses 3% of its assets, so placed assets have to move
+    kept = np.flatnonzero((start != 0) | (rng.random(len(values)) > 0.03))
+    labels, changes = incremental_partition(values[kept], [('asset', i) for i in kept.tolist()], previous, names)
+    moved = {i for i, _, _ in changes['moves']}
+    assert moved
+    assert all(labels[i] == start[kept[i]] for i in range(len(kept)) if i not in moved)
+    totals = np.bincount(labels, weights=values[kept], minlength=4)
+    assert np.abs(totals - totals.mean()).max() <= REBALANCE_TOLERANCE * values[kept].sum() / 4
+
+
+def test_group_members_stay_sorted_as_they_move():
+    rng = np.random.default_rng(5)
+    values = rng.integers(1, 50, 3000).astype(float)  # Many ties, ordered by index
+    labels = rng.integers(0, 3, len(values))
+    members = _sorted_members(values, labels, 3)
+    for i in rng.integers(0, len(values), 500).tolist():
+        target = (labels[i] + 1) % 3
+        _move_member(members, i, values[i], labels[i], target)
+        labels[i] = target
+    expected = _sorted_members(values, labels, 3)
+    for g in range(3):
+        assert np.array_equal(members[g][0], expected[g][0])
+        assert np.array_equal(members[g][1], expected[g][1])
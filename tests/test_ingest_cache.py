@@ -0,0 +1,50 @@
+"""Cached sheet parses must not outlive a change to what the parser reads."""
+from pathlib import Path
+
+import pytest
+
+import process_assets
+from ingest_cache import IngestCache
+from keyword_match import KeywordMatcher
+from process_assets import SHEET_NAMES, WORKBOOK_PATH, load_assets
+
+WORKBOOK = str(Path(__file__).resolve().parent.parent / WORKBOOK_PATH)
+
+pytestmark = pytest.mark.skipif(not Path(WORKBOOK).exists(), reason='inventory workbook not available')
+
+
+def cached_load(cache_dir):
+    cache = IngestCache(str(cache_dir))
+    return load_assets([WORKBOOK], SHEET_NAMES, cache=cache), cache
+
+
+def test_unchanged_sheets_come_from_the_cache(tmp_path):
+    first, cache = cached_load(tmp_path)
+    assert cache.misses == len(SHEET_NAMES)
+    again, cache = cached_load(tmp_path)
+    assert cache.hits == len(SHEET_NAMES) and cache.misses == 0
+    assert again == first
+
+
+def test_keyword_change_reparses_sheets(tmp_path, monkeypatch):
+    first, _ = cached_load(tmp_path)
+    # A keyword in the middle of the list moves the bits of the ones after it
+    keywords = list(process_assets.KEYWORDS.keywords)
+    keywords.insert(keywords.index('good') + 1, 'fine')
+    monkeypatch.setattr(process_assets, 'KEYWORDS', KeywordMatcher(keywords))
+
+    reparsed, cache = cached_load(tmp_path)
+    assert cache.hits == 0
+    assert reparsed == load_assets([WORKBOOK], SHEET_NAMES)
+    assert [asset['_keywords'] for asset in reparsed] != [asset['_keywords'] for asset in first]
+
+
+def test_schema_change_reparses_sheets(tmp_path, monkeypatch):
+    cached_load(tmp_path)
+    schema = dict(process_assets.SHEET_SCHEMAS['Monitor'])
+    schema['fields'] = [field for field in schema['fields'] if field[0] != 'User']
+    monkeypatch.setitem(process_assets.SHEET_SCHEMAS, 'Monitor', schema)
+
+    reparsed, cache = cached_load(tmp_path)
+    assert cache.hits == len(SHEET_NAMES) - 1
+    assert not any('User' in asset for asset in reparsed if asset['AssetType'] == 'Monitor')
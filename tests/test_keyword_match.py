@@ -0,0 +1,112 @@
+"""KeywordMatcher against plain substring search, and the remark/recondition rules built on it."""
+import random
+
+import pytest
+
+import keyword_match
+from keyword_match import KeywordMatcher
+from process_assets import (REMARK_KEYWORDS, RECONDITION_KEYWORDS, classify_depreciation, is_reconditioned_laptop,
+                            remark_condition)
+
+FRAGMENTS = ['good', 'Goodness', 'GOOD', 'excellent', 'Excel', 'moderate', 'MODERATELY', 'fair', 'unfair', 'Fai',
+             'recondition', 'Reconditioned', 'recond', 'he', 'she', 'hers', 'his', 'not ', ' ', ',', 'x', 'é', '\n']
+
+
+def substring_mask(keywords, text):
+    text = text.lower()
+    return sum(1 << i for i, keyword in enumerate(keywords) if keyword.lower() in text)
+
+
+def random_texts(count, seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 6))) for _ in range(count)]
+
+
+def old_remark_condition(remarks):
+    """remark_condition() as it was before the matcher: substring checks in REMARK_KEYWORDS order."""
+    remarks = remarks.lower()
+    for i, keywords in enumerate(REMARK_KEYWORDS):
+        if any(keyword in remarks for keyword in keywords):
+            return i
+    return len(REMARK_KEYWORDS)
+
+
+@pytest.mark.parametrize('keywords, text, found', [
+    (['good', 'goodness'], 'goodness', ['good', 'goodness']),
+    (['good', 'goodness'], 'good ness', ['good']),
+    (['goodness', 'good'], 'goodnes', ['good']),
+    (['he', 'she', 'his', 'hers'], 'ushers', ['he', 'she', 'hers']),
+    (['he', 'she', 'his', 'hers'], 'ahishe', ['he', 'she', 'his']),
+    (['ab', 'bc', 'abcd'], 'abc', ['ab', 'bc']),
+    (['aaa'], 'aa', []),
+    (['aaa'], 'baaaa', ['aaa']),
+    (['good'], '', []),
+])
+def test_overlapping_keywords(keywords, text, found):
+    matcher = KeywordMatcher(keywords)
+    assert matcher.scan(text) == matcher.mask(found)
+
+
+def test_case_folding():
+    matcher = KeywordMatcher(['Excellent', 'fair'])
+    assert matcher.keywords == ['excellent', 'fair']
+    assert matcher.mask(['EXCELLENT']) == 1
+    for text in ['EXCELLENT', 'Excellent condition', 'eXcElLeNt']:
+        assert matcher.scan(text) == 1
+    assert matcher.scan('Fair, EXCELLENT') == 3
+
+
+def test_mask_rejects_unknown_keywords():
+    with pytest.raises(ValueError):
+        KeywordMatcher(['good']).mask(['bad'])
+
+
+@pytest.mark.parametrize('keywords', [
+    ['good', 'goodness', 'excellent', 'moderate', 'fair', 'recondition'],
+    ['he', 'she', 'his', 'hers'],
+    ['fai', 'fair', 'unfair', 'air', 'r'],
+])
+def test_matches_substring_search(keywords):
+    matcher = KeywordMatcher(keywords)
+    for text in random_texts(2000):
+        assert matcher.scan(text) == substring_mask(keywords, text), text
+
+
+def test_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(keyword_match, 'KEYWORD_MEMO_LIMIT', 3)
+    matcher = KeywordMatcher(['good'])
+    texts = [f'good {i}' for i in range(5)] + ['bad']
+    for text in texts:
+        assert matcher.scan(text) == (text != 'bad')
+        assert len(matcher._memo) <= 3
+    # Remembered results are the same as fresh ones
+    assert [matcher.scan(text) for text in texts] == [1] * 5 + [0]
+
+
+def test_remark_condition_matches_substring_checks():
+    for text in random_texts(3000, seed=1):
+        assert remark_condition(text) == old_remark_condition(text), text
+
+
+def test_depreciation_matches_substring_checks():
+    """classify_depreciation() on scanned records equals the substring rules it replaced."""
+    rng = random.Random(2)
+    texts = random_texts(1500, seed=3)
+    for remarks in texts:
+        other = rng.choice(texts)
+        asset = {'AssetType': 'Laptop', 'Serial': 1, 'Name': 'HP', 'Model': other, 'Remarks': remarks}
+        reconditioned = any(keyword in value.lower()
+                            for value in (remarks, other, 'HP', 'Laptop') for keyword in RECONDITION_KEYWORDS)
+        assert is_reconditioned_laptop(asset) == reconditioned
+        condition = old_remark_condition(remarks)
+        multiplier, _, category = classify_depreciation(asset)
+        expected = classify_depreciation({'AssetType': 'Laptop', 'Serial': 1, 'Name': 'HP',
+                                          'PurchaseType': 'reconditioned' if reconditioned else 'new',
+                                          'Remarks': ['excellent', 'good', 'moderate', ''][condition]})
+        assert (multiplier, category) == expected[::2], (remarks, other)
+
+
+def test_recondition_only_counts_for_laptops():
+    assert not is_reconditioned_laptop({'AssetType': 'PC', 'Name': 'Reconditioned PC'})
+    assert is_reconditioned_laptop({'AssetType': 'Laptop', 'Name': 'HP', 'Remarks': 'RECONDITIONED unit'})
+    assert not is_reconditioned_laptop({'AssetType': 'Laptop', 'Name': 'HP', 'Remarks': 'recond'})
@@ -0,0 +1,79 @@
+"""The location engine keeps each Location in one group while balancing the totals."""
+import numpy as np
+import pytest
+
+from partitioning import LOCATION_TOLERANCE, location_codes, location_partition, location_scatter, partition
+from process_assets import assign_groups
+
+
+def spread_share(values, labels, group_count):
+    totals = np.bincount(labels, weights=values, minlength=group_count)
+    return (totals.max() - totals.min()) / (np.sum(values) / group_count)
+
+
+def rooms(seed, room_count=40, n=600, unplaced=0.2):
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.lognormal(9, 1, n), 2)
+    locations = [f'Room {room}' for room in rng.integers(0, room_count, n).tolist()]
+    for i in rng.choice(n, int(n * unplaced), replace=False).tolist():
+        locations[i] = rng.choice(['User', '', None])
+    return values, locations
+
+
+def test_inventory_keeps_every_location_together(inventory):
+    values = np.array([asset['CurrentValue'] for asset in inventory])
+    locations = [asset.get('Location') for asset in inventory]
+    codes = location_codes(locations)[0]
+    labels = location_partition(values, 3, locations)
+    assert location_scatter(codes, labels, 3) == (0, 0)
+    assert location_scatter(codes, assign_groups(values, 3)[1], 3)[0] > 0
+    assert spread_share(values, labels, 3) <= LOCATION_TOLERANCE
+
+
+@pytest.mark.parametrize('seed, group_count', [(0, 2), (1, 3), (2, 5)])
+def test_small_locations_are_never_split(seed, group_count):
+    values, locations = rooms(seed)
+    labels = location_partition(values, group_count, locations)
+    assert location_scatter(location_codes(locations)[0], labels, group_count) == (0, 0)
+    assert spread_share(values, labels, group_count) <= LOCATION_TOLERANCE
+
+
+def test_unplaced_assets_balance_freely():
+    values, locations = rooms(3)
+    codes = location_codes(locations)[0]
+    assert (codes[[i for i, location in enumerate(locations) if location in ('User', '', None)]] == -1).all()
+    labels = location_partition(values, 3, locations)
+    # Unplaced assets land in every group
+    assert len(set(labels[codes == -1].tolist())) == 3
+
+
+def test_a_location_over_the_target_is_the_only_one_split():
+    values, locations = rooms(4)
+    # Room 0 holds half the inventory, more than a third can take
+    values = np.concatenate([values, np.full(300, values.sum() / 300)])
+    locations = locations + ['Room 0'] * 300
+    labels = location_partition(values, 3, locations)
+    codes, names = location_codes(locations)
+    split = [names[code] for code in range(len(names)) if len(set(labels[codes == code].tolist())) > 1]
+    assert split == ['room 0']
+    assert spread_share(values, labels, 3) <= LOCATION_TOLERANCE
+
+
+def test_tolerance_trades_balance_for_fewer_splits():
+    values, locations = rooms(5, room_count=8, unplaced=0)
+    codes = location_codes(locations)[0]
+    # Eight rooms and no unplaced assets: only splitting rooms gets within 0.01%
+    tight = location_partition(values, 3, locations, tolerance=0.0001)
+    assert spread_share(values, tight, 3) <= 0.0001
+    assert location_scatter(codes, tight, 3)[0] > 0
+    loose = location_partition(values, 3, locations, tolerance=0.01)
+    assert spread_share(values, loose, 3) <= 0.01
+    assert location_scatter(codes, loose, 3) == (0, 0)
+
+
+def test_engine_through_partition():
+    values, locations = rooms(6)
+    order, labels, running, totals = partition(values, 3, 'location', locations=locations)
+    assert np.array_equal(labels, location_partition(values, 3, locations))
+    assert sorted(order.tolist()) == list(range(len(values)))
+    assert sum(totals) == pytest.approx(values.sum())
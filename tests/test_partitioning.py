@@ -0,0 +1,100 @@
+"""Partition engines: complete, deterministic, and no worse than greedy where they promise to be."""
+import itertools
+
+import numpy as np
+import pytest
+
+import partitioning
+from partitioning import (
+    balanced_partition, karmarkar_karp, partition, partition_variance, refine_partition,
+)
+from process_assets import assign_groups
+
+ENGINES = ['greedy', 'kk', 'balanced', 'location']
+
+
+class FakeClock:
+    """perf_counter() that advances a fixed step per call, so time budgets end after a fixed amount of work."""
+
+    def __init__(self, step=1e-4):
+        self.now = 0.0
+        self.step = step
+
+    def perf_counter(self):
+        self.now += self.step
+        return self.now
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(partitioning.time, 'perf_counter', clock.perf_counter)
+    return clock
+
+
+def random_inventory(seed, n=500):
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.lognormal(9, 1.5, n), 2)
+    asset_types = rng.choice(['Laptop', 'PC', 'Monitor', 'Printer'], n).tolist()
+    locations = rng.choice(['IT Room', 'Design', 'Accounts', 'User', ''], n).tolist()
+    return values, asset_types, locations
+
+
+def run(engine, values, group_count, asset_types, locations):
+    return partition(values, group_count, engine, asset_types, locations=locations)
+
+
+@pytest.mark.parametrize('engine, group_count, seed', list(itertools.product(ENGINES, [2, 3, 7], [0, 1])))
+def test_every_value_in_exactly_one_group(engine, group_count, seed):
+    values, asset_types, locations = random_inventory(seed)
+    order, labels, running, totals = run(engine, values, group_count, asset_types, locations)
+    assert sorted(order.tolist()) == list(range(len(values)))
+    assert labels.shape == (len(values),)
+    assert labels.min() >= 0 and labels.max() < group_count
+    assert totals == pytest.approx(np.bincount(labels, weights=values, minlength=group_count).tolist())
+    assert sum(totals) == pytest.approx(values.sum())
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_are_deterministic(engine):
+    values, asset_types, locations = random_inventory(2)
+    first = run(engine, values, 3, asset_types, locations)
+    second = run(engine, values, 3, asset_types, locations)
+    assert np.array_equal(first[1], second[1])
+
+
+@pytest.mark.parametrize('anneal', [False, True])
+def test_refinement_is_deterministic_for_a_seed(fake_clock, anneal):
+    values, asset_types, _ = random_inventory(3, 2000)
+    start = assign_groups(values, 3)[1]
+    first = refine_partition(values, start, 3, 0.01, anneal=anneal, seed=7)[0]
+    second = refine_partition(values, start, 3, 0.01, anneal=anneal, seed=7)[0]
+    assert np.array_equal(first, second)
+
+
+def test_refinement_keeps_type_counts(fake_clock):
+    values, asset_types, _ = random_inventory(4)
+    start = balanced_partition(values, 3, asset_types)
+    labels = refine_partition(values, start, 3, 0.01, asset_types, anneal=True, seed=1)[0]
+    for asset_type in set(asset_types):
+        of_type = np.array(asset_types) == asset_type
+        assert np.array_equal(np.bincount(labels[of_type], minlength=3), np.bincount(start[of_type], minlength=3))
+
+
+def test_refinement_never_raises_the_variance():
+    for seed in range(5):
+        values, _, _ = random_inventory(seed)
+        start = karmarkar_karp(values, 4)
+        labels, trajectory, converged = refine_partition(values, start, 4, 5.0)
+        assert converged
+        variances = [variance for _, variance in trajectory]
+        assert variances == sorted(variances, reverse=True)
+        assert partition_variance(np.bincount(labels, weights=values, minlength=4)) <= variances[0]
+
+
+def test_kk_and_refine_beat_greedy_on_the_inventory(inventory):
+    values = [asset['CurrentValue'] for asset in inventory]
+    greedy = partition_variance(partition(values, 3, 'greedy')[3])
+    assert partition_variance(partition(values, 3, 'kk')[3]) <= greedy
+    assert partition_variance(partition(values, 3, 'greedy', refine=5.0)[3]) <= greedy
+    assert partition_variance(partition(values, 3, 'kk', refine=5.0)[3]) <= greedy
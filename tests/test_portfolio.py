@@ -0,0 +1,83 @@
+"""The portfolio keeps the best division its strategies find, and stops at the variance floor."""
+import itertools
+import json
+
+import numpy as np
+import pytest
+
+from partitioning import partition_variance
+from portfolio import (
+    at_floor, portfolio_partition, portfolio_strategies, record_run, run_portfolio, variance_floor, winner_stats,
+)
+
+
+def variance(values, labels, group_count):
+    return partition_variance(np.bincount(labels, weights=values, minlength=group_count))
+
+
+def best_variance(values, group_count):
+    """Lowest variance over every division, by brute force."""
+    return min(variance(values, np.array(labels), group_count)
+               for labels in itertools.product(range(group_count), repeat=len(values)))
+
+
+@pytest.mark.parametrize('values, group_count', [
+    ([1.0, 1.0, 1.0], 3), ([1.0, 1.0], 3), ([3.0, 5.0, 7.0, 11.0, 2.5], 2), ([0.25, 0.5, 1.25, 2.0, 4.0, 0.75], 3),
+    ([1200.0, 800.0, 650.0, 400.0, 150.0, 50.0, 50.0], 3),
+])
+def test_variance_floor_is_a_lower_bound(values, group_count):
+    floor = variance_floor(values, group_count)
+    assert floor <= best_variance(np.array(values), group_count) + 1e-9
+
+
+def test_variance_floor_of_equal_values():
+    assert variance_floor([100.0] * 6, 3) == 0.0
+    assert variance_floor([100.0] * 7, 3) == pytest.approx(100.0 ** 2 * 1 * 2 / 9)
+    assert variance_floor([], 3) == 0.0
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_winner_is_the_best_strategy_run(jobs):
+    rng = np.random.default_rng(11)
+    values = np.round(rng.lognormal(9, 1.5, 400), 2)
+    labels, results = portfolio_partition(values, 3, budget=0.5, jobs=jobs, seed=3)
+    assert sorted(result['strategy'] for result in results) == sorted(portfolio_strategies(seed=3))
+    finished = [result for result in results if result['variance'] is not None]
+    best = min(result['variance'] for result in finished)
+    assert results[0]['variance'] == best
+    assert np.array_equal(results[0]['labels'], labels)
+    assert variance(values, labels, 3) == pytest.approx(best)
+    # Greedy always runs, so the winner is at least as good
+    greedy = next(result for result in results if result['strategy'] == 'greedy')
+    assert best <= greedy['variance']
+
+
+def test_strategies_stop_once_the_floor_is_reached():
+    values = np.full(30, 100.0)
+    labels, results = portfolio_partition(values, 3, budget=5.0, jobs=1)
+    assert results[0]['strategy'] == 'greedy'
+    assert at_floor(results[0]['variance'], variance_floor(values, 3))
+    assert all(result['variance'] is None for result in results[1:])
+    assert np.bincount(labels, minlength=3).tolist() == [10, 10, 10]
+
+
+def test_runs_are_logged(tmp_path, capsys):
+    log = tmp_path / 'runs.jsonl'
+    rng = np.random.default_rng(12)
+    for seed in range(2):
+        run_portfolio(np.round(rng.lognormal(8, 1, 60), 2), 3, budget=0.2, jobs=1, seed=seed, log=str(log))
+    assert 'won with variance' in capsys.readouterr().out
+    entries = [json.loads(line) for line in log.read_text(encoding='utf-8').splitlines()]
+    assert [entry['assets'] for entry in entries] == [60, 60]
+    assert all(entry['winner'] == entry['runs'][0]['strategy'] for entry in entries)
+    wins, runs = winner_stats(str(log))
+    assert runs == 2 and sum(wins.values()) == 2
+
+
+def test_record_run_keeps_the_winner_first(tmp_path):
+    log = tmp_path / 'runs.jsonl'
+    results = [{'strategy': 'kk', 'variance': 1.0, 'seconds': 0.01},
+               {'strategy': 'greedy', 'variance': 4.0, 'seconds': 0.001}]
+    record_run(results, 10, 3, 1.0, 1, str(log))
+    entry = json.loads(log.read_text(encoding='utf-8'))
+    assert entry['winner'] == 'kk' and [run['strategy'] for run in entry['runs']] == ['kk', 'greedy']
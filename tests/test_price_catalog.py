@@ -0,0 +1,52 @@
+"""A catalog chosen with --price-catalog must value every asset, in both pipelines."""
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+WORKBOOK = 'GTL IT Equipment Information 22 Jan 2026.xlsx'
+
+# Numbers in the catalog that are not prices
+NOT_PRICES = {'gen_min', 'fuzzy_match_threshold', 'version', 'price_uncertainty', 'format'}
+
+
+def doubled(entry):
+    """A catalog entry with every price doubled."""
+    if isinstance(entry, bool):
+        return entry
+    if isinstance(entry, (int, float)):
+        return entry * 2
+    if isinstance(entry, list):
+        return [doubled(item) for item in entry]
+    if isinstance(entry, dict):
+        return {key: item if key in NOT_PRICES else doubled(item) for key, item in entry.items()}
+    return entry
+
+
+def total_value(directory, *args):
+    subprocess.run([sys.executable, 'process_assets.py', '--no-cache', *args], cwd=directory, check=True,
+                   stdout=subprocess.DEVNULL)
+    with open(directory / 'all_assets_data.json', encoding='utf-8') as f:
+        return sum(group['total_value'] for group in json.load(f)['groups'].values())
+
+
+@pytest.mark.parametrize('mode', [[], ['--stream']], ids=['in-memory', 'stream'])
+def test_price_catalog_option_reprices_assets(tmp_path, mode):
+    if not (REPO / WORKBOOK).exists():
+        pytest.skip('inventory workbook not available')
+    for path in REPO.glob('*.py'):
+        shutil.copy(path, tmp_path)
+    shutil.copy(REPO / WORKBOOK, tmp_path)
+    shutil.copy(REPO / 'price_catalog.json', tmp_path)
+    catalog = json.loads((REPO / 'price_catalog.json').read_text(encoding='utf-8'))
+    for key in ('market_prices', 'price_rules', 'default_price'):
+        if key in catalog:
+            catalog[key] = doubled(catalog[key])
+    (tmp_path / 'doubled.json').write_text(json.dumps(catalog), encoding='utf-8')
+
+    default = total_value(tmp_path, *mode)
+    assert total_value(tmp_path, *mode, '--price-catalog', 'doubled.json') == pytest.approx(2 * default)
@@ -0,0 +1,115 @@
+"""Sheet schemas: header aliases, optional and quiet columns, type coercion, and table / workbook parity."""
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from asset_formats import FORMAT_EXTENSIONS, convert_workbook, read_table_data
+from process_assets import SHEET_NAMES, WORKBOOK_PATH, compile_sheet_schema, load_assets, read_excel_data
+
+WORKBOOK = Path(__file__).resolve().parent.parent / WORKBOOK_PATH
+
+
+def extract(sheet_name, header, rows):
+    compiled = compile_sheet_schema(sheet_name, header)
+    return None if compiled is None else compiled(pd.DataFrame(rows, dtype=object))
+
+
+def without_keywords(assets):
+    return [{key: value for key, value in asset.items() if key != '_keywords'} for asset in assets]
+
+
+def test_alias_headers_and_column_order(capsys):
+    # "S/L", "Device Name" and "Value Ratio" are aliases; headers are stripped and case-folded
+    header = ['Remarks', ' device name ', 'S/L', 'Extra', 'MODEL', 'Value Ratio', 'Function', 'Location', 'Status']
+    assets = extract('Printer Scaneer', header, [['Good', 'EPSON', 7, 'x', 'L3250', '1', 'Print', 'Office', 'OK']])
+    assert without_keywords(assets) == [{'AssetType': 'Printer Scaneer', 'Serial': 7, 'Name': 'EPSON',
+                                         'Model': 'L3250', 'Function': 'Print', 'Location': 'Office', 'Level': '1',
+                                         'Status': 'OK', 'Remarks': 'Good'}]
+    assert 'Note' not in capsys.readouterr().out
+
+
+def test_leftmost_matching_column_wins():
+    # Server Room sheets have two "S/L" columns: the first is the serial, the second is ignored
+    header = ['S/L', 'Device Name', 'Model', 'S/L', 'Status', 'Remarks']
+    assets = extract('Server Room', header, [[3, 'Switch', 'TL-SG1024D', 'ABC123', 'Running', None]])
+    assert assets[0]['Serial'] == 3 and 'ABC123' not in assets[0].values()
+
+
+def test_missing_optional_columns_are_noted(capsys):
+    assets = extract('Monitor', ['Serial', 'Name', 'Model'], [[1, 'Dell Monitor', 'D1918Ho']])
+    out = capsys.readouterr().out
+    assert 'Note: Monitor has no column for: User (User), Location (Location)' in out
+    assert without_keywords(assets) == [{'AssetType': 'Monitor', 'Serial': 1, 'Name': 'Dell Monitor',
+                                         'Model': 'D1918Ho'}]
+
+
+def test_quiet_columns_are_not_noted(capsys):
+    header = ['Serial', 'Name', 'Model', 'User', 'Location', 'Level', 'Status', 'Remarks']
+    extract('Monitor', header, [[1, 'Dell Monitor', 'D1918Ho', 'Nila', 'Office', '1', None, 'Good']])
+    assert 'PurchaseDate' not in capsys.readouterr().out
+
+
+def test_missing_required_column_skips_the_sheet(capsys):
+    assert extract('Monitor', ['Serial', 'Model'], [[1, 'D1918Ho']]) is None
+    assert 'Monitor is missing required column(s): Name (Name)' in capsys.readouterr().out
+
+
+def test_type_coercion():
+    header = ['Serial', 'Name', 'Model', 'RAM', 'Gen', 'Purchase Date', 'Remarks']
+    rows = [
+        [1.0, '  DELL  ', 'Inspiron 3511', '8', 11.0, '2024-03-15', 'Good'],
+        ['2', 'HP', 440, 'eight', None, '22 Jan 2026', None],
+        [3, 'HP', 'X', 16, '12', '22/01/2026', ''],
+        ['abc', 'Not an asset', None, None, None, None, None],  # No numeric serial
+        [4, None, 'No name', None, None, None, None],  # No name
+        [5, 'Lenovo', 'X230', None, None, 'sometime', None],
+    ]
+    assets = without_keywords(extract('PC', header, rows))
+    assert [asset['Serial'] for asset in assets] == [1, 2, 3, 5]
+    assert assets[0] == {'AssetType': 'PC', 'Serial': 1, 'Name': 'DELL', 'Model': 'Inspiron 3511', 'RAM': 8,
+                         'Gen': 11, 'PurchaseDate': '2024-03-15', 'Remarks': 'Good'}
+    assert assets[1]['Model'] == '440' and 'RAM' not in assets[1] and 'Gen' not in assets[1]
+    assert assets[1]['PurchaseDate'] == '2026-01-22' and assets[2]['PurchaseDate'] == '2026-01-22'
+    assert assets[2]['Gen'] == 12 and assets[2]['Remarks'] == ''
+    assert 'PurchaseDate' not in assets[3]
+
+
+def test_sections_and_purchase_type_column():
+    header = ['Category', 'Serial', 'Name', 'Model', 'PurchaseType']
+    rows = [
+        ['New Purchase Laptop Information', None, None, None, None],
+        [None, 1, 'DELL', 'Inspiron 3511', None],
+        ['Recondition Laptop Information', None, None, None, None],
+        [None, 2, 'HP', '440-G2', None],
+        [None, 3, 'HP', '830 G5', 'new'],
+    ]
+    assets = extract('Laptop', header, rows)
+    assert [asset['PurchaseType'] for asset in assets] == ['new', 'reconditioned', 'new']
+
+
+def test_workbook_rows_match_a_written_workbook(tmp_path):
+    """The same sheet read through openpyxl rows and through pandas gives the same records."""
+    path = tmp_path / 'inventory.xlsx'
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'Monitor'
+    sheet.append(['Monitor Information'])
+    sheet.append(['S/L', 'Name', 'Model', 'User', 'Location', 'Value Ratio', 'Status', 'Remarks'])
+    sheet.append([1, 'Dell Monitor', 'D1918Ho', 'Nila', 'N/A', '1', None, 'Good'])
+    sheet.append([2.0, 'HP Monitor', 'LV1911', None, '3rd Floor', '2', 'OK', 'Moderate'])
+    workbook.save(path)
+    loaded = load_assets([str(path)], ['Monitor'])
+    assert loaded == read_excel_data(str(path), 'Monitor')
+    assert [asset['Serial'] for asset in loaded] == [1, 2] and 'Location' not in loaded[0]
+
+
+@pytest.mark.skipif(not WORKBOOK.exists(), reason='inventory workbook not available')
+@pytest.mark.parametrize('fmt', sorted(FORMAT_EXTENSIONS))
+def test_tables_match_the_workbook(tmp_path, fmt):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    convert_workbook(str(WORKBOOK), str(tmp_path), fmt)
+    for sheet_name in SHEET_NAMES:
+        assert read_table_data(str(tmp_path), sheet_name) == read_excel_data(str(WORKBOOK), sheet_name)
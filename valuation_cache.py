@@ -0,0 +1,59 @@
+"""Valuation results shared between assets with the same valuation signature.
+
+The cache lives here rather than in process_assets.py: running that script
+loads it as __main__, and modules that import process_assets load a second copy,
+so state kept in either copy is not seen by the other. Every copy reads
+VALUATION_CACHE from this module, and selecting or reloading a price catalog
+through any of them clears it.
+"""
+from collections import OrderedDict
+
+# Distinct asset signatures kept by the valuation cache
+VALUATION_CACHE_SIZE = 65536
+
+
+class ValuationCache:
+    """Valuation results keyed by asset signature, evicted least-recently-used beyond max_entries."""
+    
+    def __init__(self, max_entries=VALUATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """Return the cached valuation for a key, or None on a miss."""
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)  # Mark as recently used
+        self.hits += 1
+        return result
+    
+    def put(self, key, result):
+        self.entries[key] = result
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        self.entries.clear()
+    
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'uncached': self.uncached,
+                'evictions': self.evictions, 'entries': len(self.entries), 'hit_rate': self.hit_rate()}
+    
+    def summary(self):
+        return (f"Valuation cache: {self.hits} hit(s), {self.misses} miss(es) ({self.hit_rate():.1%} hits), "
+                f"{self.uncached} per-serial override(s) not cached, {self.evictions} eviction(s)")
+
+
+# Shared by every value_asset() call; set to None to disable
+VALUATION_CACHE = ValuationCache()